@@ -2,8 +2,11 @@
 Space Research System - Fixed Main Application
 With proper authentication, role-based access control, and all features
 """
+import os
+import time
 import dash
-from dash import dcc, html, Input, Output, State, dash_table, callback_context
+from dash import dcc, html, Input, Output, State, dash_table, callback_context, DiskcacheManager
+import diskcache
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import plotly.graph_objects as go
@@ -11,10 +14,16 @@ import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime
 import json
+from flask import abort, send_file
+import plotly.io as pio
 
 # Import our modules
 from config.database import db
-from utils.auth import auth, store_session, load_session, check_authentication, get_user_role
+from utils.auth import auth, store_session, load_session, end_session, check_authentication, get_user_role
+from utils.importer import start_import, get_import_job
+from utils.exporter import parse_filters, write_export, redeem_export_link, discard_export
+from utils.snapshots import snapshot_scheduler, freshness_label
+from utils.profiler import callback_profiler, install_callback_profiler
 
 # Page components moved to the `pages` package (modularized)
 from pages import (
@@ -36,11 +45,30 @@ from pages import (
     unauthorized_page,
     admin_dashboard_page,
 )
+from pages.missions import create_mission_cards
+from pages.employees import create_org_chart
+from pages.satellites import create_ground_track
+from pages.analytics import create_overview
+from pages.telemetry import ALERTS_SHOWN, RECENT_TELEMETRY_SHOWN, alert_rule_rows, alert_rule_options
+from utils.alert_rules import compile_rule
 
 # ============================================
 # INITIALIZE DASH APP
 # ============================================
 
+# Serialize callback responses with orjson when it is installed (several
+# times faster than the stdlib encoder for large row lists and figures)
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
+
+# Data exports run as background callbacks in their own processes, queued
+# through a local disk cache, so they never hold a request worker
+background_cache = diskcache.Cache(os.getenv('DASH_CACHE_DIR', os.path.join(os.path.dirname(__file__), '.dash_cache')))
+background_callback_manager = DiskcacheManager(background_cache)
+
 app = dash.Dash(
     __name__,
     external_stylesheets=[
@@ -50,6 +78,8 @@ app = dash.Dash(
     ],
     external_scripts=[],  # REMOVED custom.js, Dash loads it from /assets automatically
     suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
+    compress=True,  # gzip/brotli responses via flask-compress
     title="Space Research - Mission Control",
     meta_tags=[
         {"name": "viewport", "content": "width=device-width, initial-scale=1.0"},
@@ -59,6 +89,12 @@ app = dash.Dash(
 
 server = app.server
 
+
+@server.before_request
+def start_background_work():
+    """Materialize analytics datasets in serving processes only (see utils/snapshots.py)"""
+    snapshot_scheduler.start()
+
 # ============================================
 # NAVBAR COMPONENT
 # ============================================
@@ -214,11 +250,13 @@ def update_navbar(session_data):
 @app.callback(
     Output('session-store', 'data', allow_duplicate=True),
     Input('url', 'pathname'),
+    State('session-store', 'data'),
     prevent_initial_call=True
 )
-def clear_session_on_logout(pathname):
+def clear_session_on_logout(pathname, session_data):
     """When user hits /logout, clear the browser session-store and sign out server-side."""
     if pathname == '/logout':
+        end_session(session_data)
         try:
             auth.sign_out()
         except Exception:
@@ -230,11 +268,13 @@ def clear_session_on_logout(pathname):
 @app.callback(
     Output('session-store', 'data', allow_duplicate=True),
     Input('logout-link', 'n_clicks'),
+    State('session-store', 'data'),
     prevent_initial_call=True
 )
-def clear_session_on_logout_click(n_clicks):
+def clear_session_on_logout_click(n_clicks, session_data):
     """Clear client session when logout link is clicked (extra robustness)."""
     if n_clicks and n_clicks > 0:
+        end_session(session_data)
         try:
             auth.sign_out()
         except Exception:
@@ -670,10 +710,20 @@ def update_clock(n):
 # ADMIN DASHBOARD - REFRESH CALLBACKS
 # ============================================
 # ... (omitted, no changes) ...
+# Decimal places kept for floats sent to tables
+TABLE_FLOAT_DIGITS = 4
+
+def _compact_rows(rows, digits=TABLE_FLOAT_DIGITS):
+    """Round floats so table payloads don't carry full double precision"""
+    return [
+        {k: round(v, digits) if isinstance(v, float) else v for k, v in row.items()}
+        for row in rows
+    ]
+
 def _refresh_admin_table(table_id, data_func):
     try:
         data = data_func()
-        return (data or [],)
+        return (_compact_rows(data or []),)
     except Exception as e:
         print(f"Error refreshing {table_id}: {e}")
         return ([],)
@@ -1442,6 +1492,160 @@ def confirm_delete_research_fact(n_clicks, selected_rows, table_data, trigger_da
     except Exception as e:
         return dbc.Alert(f"Error: {str(e)}", color="danger"), dash.no_update, True
 
+# ============================================
+# ADMIN DASHBOARD - BULK IMPORT
+# ============================================
+@app.callback(
+    [Output('import-job-id', 'data'),
+     Output('import-progress-interval', 'disabled'),
+     Output('import-progress', 'children'),
+     Output('import-errors-table', 'data')],
+    Input('import-upload', 'contents'),
+    [State('import-upload', 'filename'),
+     State('import-entity', 'value')],
+    prevent_initial_call=True
+)
+def start_bulk_import(contents, filename, entity):
+    if not contents:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+    
+    try:
+        job_id = start_import(entity, filename, contents)
+        return job_id, False, dbc.Alert(f"Importing {filename}...", color="info"), []
+    except Exception as e:
+        return None, True, dbc.Alert(f"Error: {str(e)}", color="danger"), []
+
+@app.callback(
+    [Output('import-progress', 'children', allow_duplicate=True),
+     Output('import-errors-table', 'data', allow_duplicate=True),
+     Output('import-progress-interval', 'disabled', allow_duplicate=True),
+     Output('admin-action-trigger', 'data', allow_duplicate=True)],
+    Input('import-progress-interval', 'n_intervals'),
+    [State('import-job-id', 'data'),
+     State('admin-action-trigger', 'data')],
+    prevent_initial_call=True
+)
+def poll_bulk_import(n_intervals, job_id, trigger_data):
+    job = get_import_job(job_id) if job_id else None
+    if not job:
+        return dbc.Alert("Import job not found", color="warning"), [], True, dash.no_update
+    
+    total = job['total_rows']
+    progress_label = f"{job['processed']:,} / {total:,} rows" if total else f"{job['processed']:,} rows"
+    finished = job['status'] != 'running'
+    color = {'running': 'info', 'done': 'success' if not job['failed'] else 'warning'}.get(job['status'], 'danger')
+    
+    progress = dbc.Alert([
+        html.Div([
+            html.Strong(job['message'] or f"Importing {job['filename']}..."),
+        ], className="mb-2"),
+        dbc.Progress(
+            value=(100 * job['processed'] / total) if total else (100 if finished else 50),
+            striped=not finished, animated=not finished, className="mb-2"
+        ),
+        html.Small(
+            f"{progress_label} · {job['written']:,} written · {job['failed']:,} failed · "
+            f"{job['rows_per_second']:,.0f} rows/s · {job['elapsed']:.1f}s"
+        ),
+    ], color=color)
+    
+    # Refresh the admin tables once the import has landed
+    trigger = (trigger_data or 0) + 1 if finished and job['written'] else dash.no_update
+    return progress, job['errors'], finished, trigger
+
+# ============================================
+# ADMIN DASHBOARD - DATA EXPORT
+# ============================================
+@app.callback(
+    Output('system-action-feedback', 'children'),
+    Input('btn-export-data', 'n_clicks'),
+    [State('export-table', 'value'),
+     State('export-format', 'value'),
+     State('export-filter', 'value'),
+     State('session-store', 'data')],
+    background=True,
+    running=[
+        (Output('btn-export-data', 'disabled'), True, False),
+        (Output('btn-cancel-export', 'disabled'), False, True),
+    ],
+    cancel=[Input('btn-cancel-export', 'n_clicks')],
+    progress=[Output('export-progress', 'value'), Output('export-progress', 'label')],
+    prevent_initial_call=True
+)
+def prepare_export(set_progress, n_clicks, table, fmt, filter_text, session_data):
+    """Write the export to a file in a background job, then hand out a download link"""
+    if not n_clicks:
+        return dash.no_update
+    
+    if get_user_role(session_data) != 'admin':
+        return dbc.Alert("Only administrators can export data", color="danger")
+    
+    reported = [0.0]
+
+    def report(written):
+        # set_progress goes through the job cache; twice a second is plenty
+        if time.time() - reported[0] >= 0.5:
+            reported[0] = time.time()
+            set_progress((100, f"{written / 1e6:.1f} MB written"))
+
+    try:
+        set_progress((100, "Starting"))
+        token = write_export(table, fmt, parse_filters(filter_text), progress=report)
+        set_progress((0, ""))
+        return dbc.Alert([
+            html.I(className="fas fa-check-circle me-2"),
+            f"Export of '{table}' is ready: ",
+            html.A("Download", href=f"/export/{token}", target="_blank", className="alert-link"),
+            html.Small(" (link is single-use and expires in 5 minutes)", className="ms-2"),
+        ], color="success")
+    except Exception as e:
+        return dbc.Alert(f"Error: {str(e)}", color="danger")
+
+@server.route('/export/<token>')
+def download_export(token):
+    """Send an export file written by prepare_export (single use)"""
+    export = redeem_export_link(token)
+    if not export:
+        abort(404)
+    response = send_file(export['path'], mimetype=export['mimetype'],
+                         as_attachment=True, download_name=export['filename'])
+    response.call_on_close(lambda: discard_export(export))
+    return response
+
+# ============================================
+# ADMIN DASHBOARD - CALLBACK PROFILER
+# ============================================
+@app.callback(
+    [Output('profiler-table', 'data'),
+     Output('profiler-feedback', 'children')],
+    [Input('profiler-enabled', 'value'),
+     Input('profiler-sampling', 'value'),
+     Input('btn-profiler-refresh', 'n_clicks'),
+     Input('btn-profiler-reset', 'n_clicks'),
+     Input('btn-profiler-dump', 'n_clicks')],
+    State('session-store', 'data'),
+    prevent_initial_call=True
+)
+def manage_callback_profiler(enabled, sampling, n_refresh, n_reset, n_dump, session_data):
+    if get_user_role(session_data) != 'admin':
+        return dash.no_update, dbc.Alert("Only administrators can use the profiler", color="danger")
+    
+    ctx = callback_context
+    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    feedback = None
+    if trigger_id in ('profiler-enabled', 'profiler-sampling'):
+        callback_profiler.set_enabled(enabled, sampling=sampling)
+    elif trigger_id == 'btn-profiler-reset':
+        callback_profiler.reset()
+    elif trigger_id == 'btn-profiler-dump':
+        try:
+            paths = callback_profiler.dump()
+            feedback = dbc.Alert([html.Div("Profile written to:")] + [html.Code(path, className="d-block") for path in paths],
+                                 color="success")
+        except Exception as e:
+            feedback = dbc.Alert(f"Error writing profile: {str(e)}", color="danger")
+    return callback_profiler.snapshot(), feedback
+
 # ============================================
 # SATELLITES PAGE CRUD
 # ============================================
@@ -1623,6 +1827,50 @@ def confirm_page_delete_satellite(n_clicks, selected_rows, table_data):
 def refresh_page_missions_table(action_trigger):
     return _refresh_admin_table('missions-table', db.get_all_missions)[0]
 
+@app.callback(
+    [Output('missions-grid', 'children'),
+     Output('missions-table', 'data', allow_duplicate=True)],
+    Input('mission-search', 'value'),
+    prevent_initial_call=True
+)
+def search_missions(query):
+    """Filter the mission cards and table by the search box"""
+    if query and query.strip():
+        missions = db.search_missions(query, limit=50)
+        rows = [{k: v for k, v in m.items() if k != '_score'} for m in missions]
+    else:
+        rows = db.get_all_missions()
+    return create_mission_cards(rows), rows
+
+@app.callback(
+    Output('mission-search-suggestion-data', 'data'),
+    Input('mission-search', 'value'),
+    prevent_initial_call=True
+)
+def suggest_missions(query):
+    """Typeahead labels for the mission search box, tagged with the query they answer"""
+    if not query or not query.strip():
+        return {'query': query or '', 'labels': []}
+    suggestions = db.suggest(query, sources=['missions'], limit=8)
+    return {'query': query, 'labels': [s['label'] for s in suggestions]}
+
+# Fill the datalist only if the answer is for what is in the box now, so a
+# slow response to an older prefix never replaces newer suggestions
+app.clientside_callback(
+    """
+    function(data, current) {
+        if (!data || data.query !== (current || '')) return window.dash_clientside.no_update;
+        return data.labels.map(label => ({
+            namespace: 'dash_html_components', type: 'Option', props: {value: label}
+        }));
+    }
+    """,
+    Output('mission-search-suggestions', 'children'),
+    Input('mission-search-suggestion-data', 'data'),
+    State('mission-search', 'value'),
+    prevent_initial_call=True
+)
+
 @app.callback(
     [Output('page-modal-mission', 'is_open'),
      Output('page-mission-modal-title', 'children'),
@@ -1798,10 +2046,194 @@ def confirm_page_delete_mission(n_clicks, selected_rows, table_data):
     except Exception as e:
         return dbc.Alert(f"Error: {str(e)}", color="danger"), dash.no_update, True
 
+# ============================================
+# SATELLITES PAGE - GROUND TRACKS
+# ============================================
+@app.callback(
+    Output('ground-track-graph', 'figure'),
+    [Input('ground-track-satellites', 'value'),
+     Input('ground-track-hours', 'value'),
+     Input('ground-track-interval', 'n_intervals')]
+)
+def update_ground_track(sat_ids, hours, n_intervals):
+    """Propagate the selected satellites over the chosen window (1-minute steps)"""
+    now = datetime.now().timestamp()
+    try:
+        steps = int(float(hours or 1.5) * 60)
+    except ValueError:
+        steps = 90
+    tracks = None
+    if sat_ids:
+        tracks = db.get_satellite_positions([now + 60 * i for i in range(steps + 1)], sat_ids)
+    current = db.get_satellite_positions([now])
+    return create_ground_track(tracks, current)
+
+@app.callback(
+    [Output('pass-schedule-table', 'data'),
+     Output('pass-schedule-feedback', 'children')],
+    [Input('pass-location', 'value'),
+     Input('pass-date', 'date'),
+     Input('pass-min-elevation', 'value')]
+)
+def update_pass_schedule(loc_id, day, min_elevation):
+    """Rise/culmination/set times over the chosen location for one UTC day"""
+    if not loc_id:
+        return [], dbc.Alert("Add a location with latitude and longitude to see passes.", color="info")
+    location = db.get_location_by_id(loc_id)
+    if not location or location.get('latitude') is None or location.get('longitude') is None:
+        return [], dbc.Alert("This location has no coordinates.", color="warning")
+    passes = db.get_passes(location['latitude'], location['longitude'], day,
+                           float(min_elevation) if min_elevation is not None else None)
+    if passes is None:
+        return [], dbc.Alert("Could not predict passes.", color="danger")
+    rows = [{
+        'sat_name': p['sat_name'],
+        'rise': p['rise_time'][11:19],
+        'culmination': p['culmination_time'][11:19],
+        'set': p['set_time'][11:19],
+        'max_elevation': p['max_elevation'],
+        'duration_min': round(p['duration_seconds'] / 60, 1),
+        'note': 'Crosses midnight' if p['truncated'] else '',
+    } for p in passes]
+    return rows, html.Small(f"{len(rows)} passes", className="text-secondary")
+
+# ============================================
+# TELEMETRY PAGE - LIVE UPDATES
+# ============================================
+
+@app.callback(
+    [Output('telemetry-table', 'data'),
+     Output('telemetry-alerts-table', 'data'),
+     Output('telemetry-alert-count', 'children'),
+     Output('telemetry-alert-count', 'color')],
+    Input('telemetry-update', 'n_intervals'),
+    prevent_initial_call=True
+)
+def refresh_telemetry(n_intervals):
+    """Check new telemetry for anomalies and refresh both tables"""
+    alerts = db.get_telemetry_alerts(limit=ALERTS_SHOWN)
+    recent = list(reversed(db.get_telemetry_since(None, RECENT_TELEMETRY_SHOWN)))
+    return recent, alerts, str(len(alerts)), "danger" if alerts else "secondary"
+
+@app.callback(
+    [Output('alert-rule-feedback', 'children'),
+     Output('alert-rules-table', 'data'),
+     Output('alert-rule-delete-select', 'options'),
+     Output('alert-rule-expression', 'value')],
+    [Input('alert-rule-add-btn', 'n_clicks'),
+     Input('alert-rule-delete-btn', 'n_clicks')],
+    [State('alert-rule-expression', 'value'),
+     State('alert-rule-name', 'value'),
+     State('alert-rule-severity', 'value'),
+     State('alert-rule-delete-select', 'value'),
+     State('session-store', 'data')],
+    prevent_initial_call=True
+)
+def manage_alert_rules(n_add, n_delete, expression, name, severity, rule_id, session_data):
+    """Add or delete telemetry alert rules"""
+    ctx = callback_context
+    if not ctx.triggered:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
+    if get_user_role(session_data) != 'admin':
+        return dbc.Alert("Only administrators can change alert rules", color="danger"), dash.no_update, dash.no_update, dash.no_update
+
+    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    expression_value = dash.no_update
+    if trigger_id == 'alert-rule-add-btn':
+        try:
+            compile_rule(expression, severity=severity)
+        except ValueError as e:
+            return dbc.Alert(str(e), color="warning"), dash.no_update, dash.no_update, dash.no_update
+        result = db.add_alert_rule({'expression': expression.strip(), 'name': name or None,
+                                    'severity': severity or 'warning', 'enabled': True})
+        if not result:
+            return dbc.Alert("Error: Failed to save alert rule.", color="danger"), dash.no_update, dash.no_update, dash.no_update
+        feedback = dbc.Alert("Alert rule added", color="success")
+        expression_value = ""
+    else:
+        if not rule_id:
+            return dbc.Alert("Please select a rule to delete.", color="warning"), dash.no_update, dash.no_update, dash.no_update
+        if not db.delete_alert_rule(rule_id):
+            return dbc.Alert("Error: Failed to delete alert rule.", color="danger"), dash.no_update, dash.no_update, dash.no_update
+        feedback = dbc.Alert("Alert rule deleted", color="success")
+
+    rules = db.get_alert_rules() or []
+    return feedback, alert_rule_rows(rules), alert_rule_options(rules), expression_value
+
+# ============================================
+# EMPLOYEES PAGE - ORG CHART
+# ============================================
+@app.callback(
+    [Output('org-chart-graph', 'figure'),
+     Output('org-chart-expanded', 'data')],
+    [Input('org-chart-graph', 'clickData'),
+     Input('org-chart-reset', 'n_clicks')],
+    State('org-chart-expanded', 'data'),
+    prevent_initial_call=True
+)
+def update_org_chart(click_data, reset_clicks, state):
+    """Expand or collapse the clicked employee's reports"""
+    ctx = callback_context
+    trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
+    expanded = list((state or {}).get('expanded', []))
+    collapsed = list((state or {}).get('collapsed', []))
+    if trigger_id == 'org-chart-reset':
+        expanded, collapsed = [], []
+    elif click_data:
+        point = click_data['points'][0].get('customdata')
+        if not point:
+            return dash.no_update, dash.no_update
+        emp_id, is_open = point
+        # Undo an earlier toggle first, otherwise override the default depth
+        if emp_id in expanded:
+            expanded.remove(emp_id)
+        elif emp_id in collapsed:
+            collapsed.remove(emp_id)
+        elif is_open:
+            collapsed.append(emp_id)
+        else:
+            expanded.append(emp_id)
+    tree = db.get_org_tree(expanded=expanded, collapsed=collapsed)
+    return create_org_chart(tree), {'expanded': expanded, 'collapsed': collapsed}
+
 # ============================================
 # ANALYTICS PAGE CALLBACKS
 # ============================================
 # --- NEW CALLBACKS ---
+@app.callback(
+    [Output('analytics-dept-summary-table', 'data'),
+     Output('analytics-join-table', 'data'),
+     Output('analytics-overview', 'children'),
+     Output('analytics-dept-summary-freshness', 'children'),
+     Output('analytics-join-freshness', 'children'),
+     Output('analytics-overview-freshness', 'children'),
+     Output('analytics-snapshot-versions', 'data')],
+    Input('analytics-snapshot-interval', 'n_intervals'),
+    State('analytics-snapshot-versions', 'data'),
+    prevent_initial_call=True
+)
+def refresh_analytics_snapshots(n_intervals, shown_versions):
+    """Swap in newer snapshots and keep the freshness labels current"""
+    shown_versions = shown_versions or {}
+    dept_summary = snapshot_scheduler.get('department_summary')
+    hierarchy = snapshot_scheduler.get('employee_hierarchy')
+    mission_stats = snapshot_scheduler.get('mission_stats')
+    satellite_stats = snapshot_scheduler.get('satellite_stats')
+
+    def changed(*snapshots):
+        return any(snap['version'] != shown_versions.get(snap['name']) for snap in snapshots)
+
+    return (
+        (dept_summary['data'] or []) if changed(dept_summary) else dash.no_update,
+        (hierarchy['data'] or []) if changed(hierarchy) else dash.no_update,
+        create_overview(mission_stats, satellite_stats) if changed(mission_stats, satellite_stats) else dash.no_update,
+        freshness_label(dept_summary),
+        freshness_label(hierarchy),
+        freshness_label(mission_stats),
+        snapshot_scheduler.versions(),
+    )
+
 @app.callback(
     Output('nested-query-table', 'data'),
     Input('run-nested-query-btn', 'n_clicks'),
@@ -1809,7 +2241,9 @@ def confirm_page_delete_mission(n_clicks, selected_rows, table_data):
 )
 def run_nested_query(n_clicks):
     if n_clicks:
-        data = db.get_employees_above_avg_salary()
+        data = snapshot_scheduler.get('above_average')['data']
+        if data is None:
+            data = db.get_employees_above_avg_salary()
         return data
     return dash.no_update
 
@@ -1825,9 +2259,8 @@ def run_employee_procedures(n_clicks, emp_id):
     
     try:
         emp_id = int(emp_id)
-        details = db.call_get_employee_details(emp_id)
-        years = db.call_get_years_of_service(emp_id)
-        subs = db.call_count_subordinates(emp_id)
+        details = db.get_employee_analytics([emp_id])
+        hierarchy = db.get_hierarchy_summary(emp_id) or {}
 
         if not details:
             return dbc.Alert(f"No employee found with ID {emp_id}", color="danger")
@@ -1843,8 +2276,13 @@ def run_employee_procedures(n_clicks, emp_id):
                 html.P(f"Supervisor: {data.get('supervisor_name')}", className="mb-1"),
                 html.P(f"Salary: ${data.get('salary'):,.0f}", className="mb-1"),
                 html.P(f"Hire Date: {data.get('hire_date')}", className="mb-1"),
-                html.P(f"Years of Service: {years}", className="mb-1"),
-                html.P(f"Subordinates: {subs}", className="mb-1"),
+                html.P(f"Years of Service: {data.get('years_of_service')}", className="mb-1"),
+                html.P(f"Subordinates: {data.get('direct_subordinates') or 0} direct, "
+                       f"{data.get('total_subordinates') or 0} total", className="mb-1"),
+                html.P(f"Team Payroll: ${hierarchy.get('subtree_salary') or 0:,.0f}", className="mb-1"),
+                html.P("Chain of Command: " + (" → ".join(
+                    s.get('emp_name') or str(s.get('emp_id')) for s in hierarchy.get('chain_of_command', [])
+                ) or "Top level"), className="mb-1"),
                 html.P(f"Satellites Managed: {data.get('satellites_managed')}", className="mb-1"),
             ])
         ], className="stat-card")
@@ -1852,6 +2290,25 @@ def run_employee_procedures(n_clicks, emp_id):
     except Exception as e:
         return dbc.Alert(f"Error: {str(e)}", color="danger")
 
+@app.callback(
+    [Output('analytics-batch-table', 'data'),
+     Output('analytics-batch-feedback', 'children')],
+    Input('analytics-run-batch-btn', 'n_clicks'),
+    State('analytics-batch-ids-input', 'value'),
+    prevent_initial_call=True
+)
+def run_batch_employee_analytics(n_clicks, ids_text):
+    if not n_clicks:
+        return dash.no_update, dash.no_update
+    try:
+        emp_ids = [int(i) for i in (ids_text or '').replace(' ', ',').split(',') if i.strip()] or None
+    except ValueError:
+        return dash.no_update, dbc.Alert("Employee IDs must be numbers separated by commas.", color="warning")
+    data = db.get_employee_analytics(emp_ids)
+    if not data:
+        return [], dbc.Alert("No matching employees found.", color="info")
+    return data, None
+
 @app.callback(
     Output('analytics-report-table', 'data'),
     Input('analytics-run-report-btn', 'n_clicks'),
@@ -1859,7 +2316,9 @@ def run_employee_procedures(n_clicks, emp_id):
 )
 def run_salary_report(n_clicks):
     if n_clicks:
-        data = db.call_generate_salary_report()
+        data = snapshot_scheduler.get('salary_report')['data']
+        if data is None:
+            data = db.get_salary_report()
         return data
     return dash.no_update
 
@@ -1919,6 +2378,10 @@ app.clientside_callback(
     Input('clock-update', 'n_intervals')
 )
 
+# Wrap every callback registered above; a no-op pass-through until the
+# profiler is enabled (DASH_PROFILE=1 or the admin System Settings tab)
+install_callback_profiler(app)
+
 # ============================================
 # RUN APP
 # ============================================
@@ -2,16 +2,92 @@
 FastAPI Backend - Advanced API for Space Research System
 Optional: Use this for complex operations, stored procedures, etc.
 """
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from starlette.datastructures import Headers
+from typing import Optional
 from datetime import datetime
+import hashlib
 import uvicorn
 
+from backend.models import (
+    Employee, Satellite, Mission, MissionKey, EmployeeBulkRequest, SatelliteBulkRequest,
+    MissionBulkRequest, TelemetryPoint, TelemetryBulkRequest, AlertRule, UserLogin, RoleUpdate,
+    UserSignup,
+)
 from config.database import db, supabase
-from utils.auth import auth
+from utils.auth import auth, role_cache
+from utils.exporter import stream_export
+from utils.ratelimit import rate_limiter, endpoint_class, retry_after_header
+from utils.search import SEARCH_SOURCES, SUGGEST_MAX_LIMIT
+from utils.orbit import to_timestamp, time_grid, fleet_propagator
+from utils.anomaly import anomaly_detector, ANOMALY_MAX_ALERTS
+from utils.alert_rules import compile_rule
+
+# ============================================
+# RATE LIMITING
+# ============================================
+
+# Never limited, so load balancers can always probe
+UNLIMITED_PATHS = ("/", "/health")
+
+class RateLimitMiddleware:
+    """
+    Admission control in front of every endpoint
+
+    Plain ASGI rather than BaseHTTPMiddleware so a streamed export keeps its
+    in-flight slot until the last chunk has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        authorization = Headers(scope=scope).get("authorization")
+        token = authorization.split(" ", 1)[-1] if authorization else None
+        ip = scope["client"][0] if scope.get("client") else "unknown"
+        endpoint = endpoint_class(scope["method"], scope["path"])
+
+        wait = rate_limiter.acquire(endpoint, ip, token)
+        if wait:
+            response = ORJSONResponse(
+                {"detail": "Too many requests"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": retry_after_header(wait)}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rate_limiter.release(endpoint)
+
+# ============================================
+# COMPRESSION
+# ============================================
+
+# gzip level for JSON responses: level 9 (Starlette's default) spends about
+# twice the server time of level 5 for ~5% smaller bodies (benchmarks/README.md)
+GZIP_COMPRESS_LEVEL = 5
+
+# Streamed downloads that are already compressed (gzip'd NDJSON, Parquet)
+# or large enough that buffering each chunk through gzip only adds latency
+UNCOMPRESSED_PATH_PREFIXES = ("/api/export/",)
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes streamed export downloads through untouched"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(UNCOMPRESSED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
 # ============================================
 # INITIALIZE FASTAPI
@@ -20,9 +96,13 @@ from utils.auth import auth
 app = FastAPI(
     title="Space Research API",
     description="Backend API for Space Research System",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Rate limits (added before CORS so 429s still carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,52 +110,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
-security = HTTPBearer()
+# Compress JSON responses larger than 1 KB (exports are sent as they are)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1000, compresslevel=GZIP_COMPRESS_LEVEL)
 
-# ============================================
-# PYDANTIC MODELS
-# ============================================
-
-class Employee(BaseModel):
-    emp_id: Optional[int] = None
-    emp_name: str
-    position: str
-    salary: float
-    hire_date: str
-    phone: Optional[str] = None
-    supervisor_id: Optional[int] = None
-    dept_id: Optional[int] = None
-
-class Satellite(BaseModel):
-    sat_id: Optional[int] = None
-    sat_name: str
-    launch_date: str
-    status: str
-    orbit_type: str
-    mass: float
-    manager_id: Optional[int] = None
-
-class Mission(BaseModel):
-    mission_id: int
-    pad_id: int
-    loc_id: int
-    mission_name: str
-    launch_date: str
-    end_date: Optional[str] = None
-    status: str
-    objective: Optional[str] = None
-    budget: float
-
-class UserLogin(BaseModel):
-    email: EmailStr
-    password: str
-
-class UserSignup(BaseModel):
-    email: EmailStr
-    password: str
-    username: Optional[str] = None
+security = HTTPBearer()
 
 # ============================================
 # AUTHENTICATION DEPENDENCY
@@ -99,6 +140,101 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
             detail="Invalid authentication credentials"
         )
 
+async def get_current_claims(current_user = Depends(verify_token)):
+    """Claims (user_id, email, role) for the caller, from the role cache"""
+    user = getattr(current_user, 'user', None)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials"
+        )
+    # Never user_metadata: the caller can edit it
+    claims = role_cache.get(user.id)
+    return {**claims, 'email': claims.get('email') or user.email}
+
+def require_role(*roles):
+    """Dependency that rejects callers whose role is not in roles"""
+    async def check_role(claims: dict = Depends(get_current_claims)):
+        if claims.get('role') not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Requires role: {', '.join(roles)}"
+            )
+        return claims
+    return check_role
+
+require_admin = require_role('admin')
+
+# ============================================
+# BULK HELPERS
+# ============================================
+
+# Upper bound on rows accepted by a single bulk request
+BULK_MAX_ROWS = 10000
+
+def _run_bulk(operation, rows, keys, add, upsert, delete):
+    """
+    Dispatch a bulk request and summarise the per-row results
+
+    The writes are synchronous, so the bulk endpoints are plain defs:
+    Starlette runs them in its threadpool instead of on the event loop.
+    """
+    items = keys if operation == "delete" else rows
+    if not items:
+        raise HTTPException(status_code=400, detail="No rows supplied")
+    if len(items) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per request")
+
+    if operation == "delete":
+        results = delete(keys)
+    else:
+        payload = [row.dict(exclude_none=True) for row in rows]
+        results = upsert(payload) if operation == "upsert" else add(payload)
+
+    succeeded = sum(1 for r in results if r.get("success"))
+    return {
+        "operation": operation,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+# ============================================
+# CONDITIONAL GET HELPERS
+# ============================================
+
+# Seconds a client may reuse a polled response before revalidating
+LIST_MAX_AGE = 10
+ANALYTICS_MAX_AGE = 30
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Proxies may weaken the tag (W/"...") after re-encoding
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def conditional_json(request: Request, data, max_age: int = LIST_MAX_AGE):
+    """
+    JSON response with a content-hash ETag; 304 when If-None-Match matches
+
+    The hash is over the serialized body rather than a version counter, so
+    every API worker derives the same tag for the same data.
+    """
+    response = ORJSONResponse(content=data)
+    etag = '"' + hashlib.blake2b(response.body, digest_size=16).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}, must-revalidate",
+        "Vary": "Authorization",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return response
+
 # ============================================
 # AUTHENTICATION ENDPOINTS
 # ============================================
@@ -137,6 +273,15 @@ async def get_current_user(current_user: dict = Depends(verify_token)):
     """Get current authenticated user"""
     return current_user
 
+@app.put("/api/users/{user_id}/role")
+async def update_user_role(user_id: str, request: RoleUpdate, current_user: dict = Depends(require_admin)):
+    """Change a user's role (invalidates their cached claims)"""
+    result = auth.set_user_role(user_id, request.role)
+    if not result.get("success"):
+        code = 404 if result.get("error") == "User not found" else 400
+        raise HTTPException(status_code=code, detail=result.get("error"))
+    return result
+
 # ============================================
 # EMPLOYEE ENDPOINTS
 # ============================================
@@ -147,6 +292,36 @@ async def get_employees(current_user: dict = Depends(verify_token)):
     employees = db.get_all_employees()
     return employees
 
+@app.post("/api/employees/bulk")
+def bulk_employees(request: EmployeeBulkRequest, current_user: dict = Depends(require_admin)):
+    """Insert, upsert or delete many employees in chunked requests"""
+    return _run_bulk(request.operation, request.rows, request.ids,
+                     db.add_employees, db.upsert_employees, db.delete_employees)
+
+@app.get("/api/employees/tree")
+async def get_employee_tree(
+    root: Optional[int] = None,
+    depth: int = 2,
+    expand: Optional[str] = None,
+    collapse: Optional[str] = None,
+    max_nodes: int = 500,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Org chart with precomputed coordinates; expand / collapse are comma
+    separated employee ids whose reports are shown / hidden regardless of depth
+    """
+    try:
+        expanded = [int(e) for e in expand.split(',') if e.strip()] if expand else []
+        collapsed = [int(e) for e in collapse.split(',') if e.strip()] if collapse else []
+    except ValueError:
+        raise HTTPException(status_code=400, detail="expand and collapse must be comma separated employee ids")
+    tree = db.get_org_tree(root=root, depth=max(1, depth), expanded=expanded,
+                           collapsed=collapsed, max_nodes=max_nodes)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return tree
+
 @app.get("/api/employees/{emp_id}")
 async def get_employee(emp_id: int, current_user: dict = Depends(verify_token)):
     """Get employee by ID"""
@@ -155,8 +330,16 @@ async def get_employee(emp_id: int, current_user: dict = Depends(verify_token)):
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
+@app.get("/api/employees/{emp_id}/hierarchy")
+async def get_employee_hierarchy(emp_id: int, current_user: dict = Depends(verify_token)):
+    """Subordinate counts, team salary and chain of command for an employee"""
+    summary = db.get_hierarchy_summary(emp_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return summary
+
 @app.post("/api/employees")
-async def create_employee(employee: Employee, current_user: dict = Depends(verify_token)):
+async def create_employee(employee: Employee, current_user: dict = Depends(require_admin)):
     """Create new employee"""
     employee_data = employee.dict(exclude_none=True)
     result = db.add_employee(employee_data)
@@ -168,7 +351,7 @@ async def create_employee(employee: Employee, current_user: dict = Depends(verif
 async def update_employee(
     emp_id: int,
     employee: Employee,
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(require_admin)
 ):
     """Update employee"""
     employee_data = employee.dict(exclude_none=True)
@@ -178,7 +361,7 @@ async def update_employee(
     raise HTTPException(status_code=404, detail="Employee not found")
 
 @app.delete("/api/employees/{emp_id}")
-async def delete_employee(emp_id: int, current_user: dict = Depends(verify_token)):
+async def delete_employee(emp_id: int, current_user: dict = Depends(require_admin)):
     """Delete employee"""
     result = db.delete_employee(emp_id)
     if result:
@@ -190,10 +373,69 @@ async def delete_employee(emp_id: int, current_user: dict = Depends(verify_token
 # ============================================
 
 @app.get("/api/satellites")
-async def get_satellites(current_user: dict = Depends(verify_token)):
+async def get_satellites(request: Request, current_user: dict = Depends(verify_token)):
     """Get all satellites"""
     satellites = db.get_all_satellites()
-    return satellites
+    return conditional_json(request, satellites)
+
+@app.post("/api/satellites/bulk")
+def bulk_satellites(request: SatelliteBulkRequest, current_user: dict = Depends(require_admin)):
+    """Insert, upsert or delete many satellites in chunked requests"""
+    return _run_bulk(request.operation, request.rows, request.ids,
+                     db.add_satellites, db.upsert_satellites, db.delete_satellites)
+
+# Fixed paths must be declared before /api/satellites/{sat_id}
+@app.get("/api/satellites/operational")
+async def get_operational_satellites(request: Request, current_user: dict = Depends(verify_token)):
+    """Get operational satellites only"""
+    satellites = db.get_operational_satellites()
+    return conditional_json(request, satellites)
+
+# Most time steps accepted by one positions request (a day at 30 s)
+POSITIONS_MAX_TIMES = 2881
+# Most satellite x time points per positions request (~10 MB of JSON)
+POSITIONS_MAX_POINTS = 250000
+
+# Plain def: propagation is CPU-bound and runs in the threadpool, not on the event loop
+@app.get("/api/satellites/positions")
+def get_satellite_positions(
+    t: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    step: int = 60,
+    sat_ids: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """
+    Propagated satellite positions
+
+    t is a comma separated list of ISO-8601 or unix times (default: now);
+    alternatively start/end/step (seconds) describe an even time grid.
+    sat_ids is comma separated (omit for the whole fleet).
+    """
+    try:
+        if start or end:
+            if not (start and end) or step <= 0:
+                raise ValueError("start and end are both required and step must be positive")
+            times = time_grid(start, end, step)
+        elif t:
+            times = [to_timestamp(value) for value in t.split(',') if value.strip()]
+        else:
+            times = [datetime.now().timestamp()]
+        ids = [int(i) for i in sat_ids.split(',') if i.strip()] if sat_ids else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid time or sat_ids: {e}")
+    if len(times) > POSITIONS_MAX_TIMES:
+        raise HTTPException(status_code=413, detail=f"At most {POSITIONS_MAX_TIMES} times per request")
+    if len(times) * fleet_propagator.count(ids) > POSITIONS_MAX_POINTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {POSITIONS_MAX_POINTS} satellite positions per request; narrow sat_ids or the time range"
+        )
+    positions = db.get_satellite_positions(times, ids)
+    if positions is None:
+        raise HTTPException(status_code=500, detail="Could not propagate satellite positions")
+    return positions
 
 @app.get("/api/satellites/{sat_id}")
 async def get_satellite(sat_id: int, current_user: dict = Depends(verify_token)):
@@ -203,27 +445,28 @@ async def get_satellite(sat_id: int, current_user: dict = Depends(verify_token))
         raise HTTPException(status_code=404, detail="Satellite not found")
     return satellite
 
-@app.get("/api/satellites/operational")
-async def get_operational_satellites(current_user: dict = Depends(verify_token)):
-    """Get operational satellites only"""
-    satellites = db.get_operational_satellites()
-    return satellites
-
 # ============================================
 # MISSION ENDPOINTS
 # ============================================
 
 @app.get("/api/missions")
-async def get_missions(current_user: dict = Depends(verify_token)):
+async def get_missions(request: Request, current_user: dict = Depends(verify_token)):
     """Get all missions"""
     missions = db.get_all_missions()
-    return missions
+    return conditional_json(request, missions)
 
 @app.get("/api/missions/active")
-async def get_active_missions(current_user: dict = Depends(verify_token)):
+async def get_active_missions(request: Request, current_user: dict = Depends(verify_token)):
     """Get active missions"""
     missions = db.get_active_missions()
-    return missions
+    return conditional_json(request, missions)
+
+@app.post("/api/missions/bulk")
+def bulk_missions(request: MissionBulkRequest, current_user: dict = Depends(require_admin)):
+    """Insert, upsert or delete many missions in chunked requests"""
+    keys = [key.dict() for key in request.keys]
+    return _run_bulk(request.operation, request.rows, keys,
+                     db.add_missions, db.upsert_missions, db.delete_missions)
 
 @app.get("/api/missions/{mission_id}/{pad_id}/{loc_id}")
 async def get_mission(
@@ -238,6 +481,52 @@ async def get_mission(
         raise HTTPException(status_code=404, detail="Mission not found")
     return mission
 
+# ============================================
+# LOCATION & PASS ENDPOINTS
+# ============================================
+
+@app.get("/api/locations")
+async def get_locations(request: Request, current_user: dict = Depends(verify_token)):
+    """Get all locations"""
+    locations = db.get_all_locations()
+    return conditional_json(request, locations)
+
+# Plain def: a cache miss predicts passes for the whole fleet (CPU-bound), so it
+# runs in the threadpool, not on the event loop
+@app.get("/api/passes")
+def get_passes(
+    request: Request,
+    loc_id: Optional[int] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    day: Optional[str] = None,
+    min_elevation: float = 10.0,
+    sat_ids: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Rise/set windows over a location (loc_id, or lat and lon) for one UTC day (default today)"""
+    if loc_id is not None:
+        location = db.get_location_by_id(loc_id)
+        if not location:
+            raise HTTPException(status_code=404, detail="Location not found")
+        lat, lon = location.get('latitude'), location.get('longitude')
+        if lat is None or lon is None:
+            raise HTTPException(status_code=400, detail="Location has no coordinates")
+    elif lat is None or lon is None:
+        raise HTTPException(status_code=400, detail="Give loc_id, or lat and lon")
+    if not (-90 <= float(lat) <= 90 and -180 <= float(lon) <= 180 and 0 <= min_elevation < 90):
+        raise HTTPException(status_code=400, detail="lat, lon or min_elevation out of range")
+    try:
+        ids = [int(i) for i in sat_ids.split(',') if i.strip()] if sat_ids else None
+        if day:
+            datetime.fromisoformat(day[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="day must be YYYY-MM-DD and sat_ids comma separated ids")
+    passes = db.get_passes(lat, lon, day, min_elevation, ids)
+    if passes is None:
+        raise HTTPException(status_code=500, detail="Could not predict passes")
+    return conditional_json(request, passes, ANALYTICS_MAX_AGE)
+
 # ============================================
 # TELEMETRY ENDPOINTS
 # ============================================
@@ -248,6 +537,99 @@ async def get_all_telemetry(current_user: dict = Depends(verify_token)):
     telemetry = db.get_all_telemetry()
     return telemetry
 
+@app.post("/api/telemetry/bulk")
+async def ingest_telemetry(request: TelemetryBulkRequest, current_user: dict = Depends(require_admin)):
+    """Insert telemetry points and return the anomaly alerts they raised"""
+    first_alert = anomaly_detector.last_alert_id
+    results = db.add_telemetry([row.dict(exclude_none=True) for row in request.rows])
+    written = {r['data']['telemetry_id'] for r in results
+               if r['success'] and r.get('data') and 'telemetry_id' in r['data']}
+    alerts = [a for a in anomaly_detector.recent_alerts(first_alert, limit=ANOMALY_MAX_ALERTS)
+              if a['telemetry_id'] in written]
+    return {'results': results, 'alerts': alerts}
+
+@app.get("/api/telemetry/alerts")
+async def get_telemetry_alerts(
+    since_id: int = 0,
+    sat_id: Optional[int] = None,
+    limit: int = 100,
+    current_user: dict = Depends(verify_token)
+):
+    """Anomaly alerts, newest first; pass the highest alert_id seen as since_id to poll"""
+    return db.get_telemetry_alerts(since_id, sat_id, max(1, min(limit, ANOMALY_MAX_ALERTS)))
+
+# Plain def: a run reads, encodes, stores and deletes synchronously, so it
+# runs in the threadpool, not on the event loop
+@app.post("/api/telemetry/archive")
+def archive_telemetry(before: str, delete_raw: bool = False, current_user: dict = Depends(require_admin)):
+    """Compress telemetry older than before into the archive (and optionally delete the raw rows)"""
+    try:
+        datetime.fromisoformat(before.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="before must be an ISO timestamp")
+    stats = db.archive_telemetry(before, delete_raw)
+    if stats is None:
+        raise HTTPException(status_code=500, detail="Could not archive telemetry")
+    return stats
+
+@app.get("/api/telemetry/archive")
+async def read_telemetry_archive(
+    sat_id: int,
+    data_type: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Archived points of one series; timestamps are unix milliseconds"""
+    try:
+        for value in (start, end):
+            if value:
+                datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO timestamps")
+    archived = db.read_telemetry_archive(sat_id, data_type, start, end)
+    if archived is None:
+        raise HTTPException(status_code=500, detail="Could not read telemetry archive")
+    times, values = archived
+    return {'sat_id': sat_id, 'data_type': data_type,
+            'timestamps': times.astype('int64').tolist(), 'values': values.tolist()}
+
+@app.get("/api/alert-rules")
+async def get_alert_rules(current_user: dict = Depends(verify_token)):
+    """Get all telemetry alert rules"""
+    return db.get_alert_rules()
+
+def _checked_rule(rule: AlertRule):
+    try:
+        compile_rule(rule.expression, severity=rule.severity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return rule.dict(exclude_none=True)
+
+@app.post("/api/alert-rules")
+async def create_alert_rule(rule: AlertRule, current_user: dict = Depends(require_admin)):
+    """Create a telemetry alert rule, e.g. 'battery_voltage < 24 for 30s on sat_id in {1, 2}'"""
+    result = db.add_alert_rule(_checked_rule(rule))
+    if not result:
+        raise HTTPException(status_code=400, detail="Failed to create alert rule")
+    return result
+
+@app.put("/api/alert-rules/{rule_id}")
+async def update_alert_rule(rule_id: int, rule: AlertRule, current_user: dict = Depends(require_admin)):
+    """Update a telemetry alert rule"""
+    result = db.update_alert_rule(rule_id, _checked_rule(rule))
+    if not result:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return result
+
+@app.delete("/api/alert-rules/{rule_id}")
+async def delete_alert_rule(rule_id: int, current_user: dict = Depends(require_admin)):
+    """Delete a telemetry alert rule"""
+    success = db.delete_alert_rule(rule_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"message": "Alert rule deleted successfully"}
+
 @app.get("/api/telemetry/{sat_id}")
 async def get_satellite_telemetry(
     sat_id: int,
@@ -263,54 +645,107 @@ async def get_satellite_telemetry(
 # ============================================
 
 @app.get("/api/analytics/mission-stats")
-async def get_mission_statistics(current_user: dict = Depends(verify_token)):
+async def get_mission_statistics(request: Request, current_user: dict = Depends(verify_token)):
     """Get mission statistics"""
     stats = db.get_mission_statistics()
-    return stats
+    return conditional_json(request, stats, ANALYTICS_MAX_AGE)
 
 @app.get("/api/analytics/satellite-stats")
-async def get_satellite_statistics(current_user: dict = Depends(verify_token)):
+async def get_satellite_statistics(request: Request, current_user: dict = Depends(verify_token)):
     """Get satellite statistics"""
     stats = db.get_satellite_statistics()
-    return stats
+    return conditional_json(request, stats, ANALYTICS_MAX_AGE)
 
 @app.get("/api/analytics/department-summary")
-async def get_department_summary(current_user: dict = Depends(verify_token)):
+async def get_department_summary(request: Request, current_user: dict = Depends(verify_token)):
     """Get department summary"""
     summary = db.get_department_summary()
-    return summary
+    return conditional_json(request, summary, ANALYTICS_MAX_AGE)
+
+@app.get("/api/analytics/salary-report")
+async def get_salary_report(request: Request, current_user: dict = Depends(verify_token)):
+    """Salary grade and department rank for every employee"""
+    return conditional_json(request, db.get_salary_report(), ANALYTICS_MAX_AGE)
+
+@app.get("/api/analytics/department-salaries")
+async def get_department_salaries(request: Request, current_user: dict = Depends(verify_token)):
+    """Salary count, total, average, min and max per department"""
+    return conditional_json(request, db.get_department_salary_stats(), ANALYTICS_MAX_AGE)
+
+@app.get("/api/analytics/employees")
+async def get_employee_analytics(
+    request: Request,
+    ids: Optional[str] = None,
+    current_user: dict = Depends(verify_token)
+):
+    """Details, years of service and subordinate counts; ids is comma separated (omit for all)"""
+    emp_ids = None
+    if ids:
+        try:
+            emp_ids = [int(i) for i in ids.split(',') if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids must be comma separated employee ids")
+    return conditional_json(request, db.get_employee_analytics(emp_ids), ANALYTICS_MAX_AGE)
 
 # ============================================
 # SEARCH ENDPOINTS
 # ============================================
 
+@app.get("/api/search/suggest")
+async def search_suggest(
+    q: str,
+    source: Optional[str] = None,
+    limit: int = 8,
+    current_user: dict = Depends(verify_token)
+):
+    """Typeahead suggestions; source is a comma separated subset of missions, employees, research_facts"""
+    sources = None
+    if source:
+        sources = [s.strip() for s in source.split(',') if s.strip()]
+        unknown = [s for s in sources if s not in SEARCH_SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search source: {', '.join(unknown)}")
+    return db.suggest(q, sources=sources, limit=max(1, min(limit, SUGGEST_MAX_LIMIT)))
+
 @app.get("/api/search/missions")
 async def search_missions(
     q: str,
+    limit: int = 20,
     current_user: dict = Depends(verify_token)
 ):
     """Search missions"""
-    missions = db.search_missions(q)
+    missions = db.search_missions(q, limit=limit)
     return missions
 
 @app.get("/api/search/employees")
 async def search_employees(
     q: str,
+    limit: int = 20,
     current_user: dict = Depends(verify_token)
 ):
     """Search employees"""
-    employees = db.search_employees(q)
+    employees = db.search_employees(q, limit=limit)
     return employees
 
+@app.get("/api/search/research-facts")
+async def search_research_facts(
+    q: str,
+    limit: int = 20,
+    current_user: dict = Depends(verify_token)
+):
+    """Search research facts"""
+    facts = db.search_research_facts(q, limit=limit)
+    return facts
+
 # ============================================
 # DEPARTMENT ENDPOINTS
 # ============================================
 
 @app.get("/api/departments")
-async def get_departments(current_user: dict = Depends(verify_token)):
+async def get_departments(request: Request, current_user: dict = Depends(verify_token)):
     """Get all departments"""
     departments = db.get_all_departments()
-    return departments
+    return conditional_json(request, departments)
 
 @app.get("/api/departments/{dept_id}")
 async def get_department(dept_id: int, current_user: dict = Depends(verify_token)):
@@ -330,6 +765,43 @@ async def get_equipment(current_user: dict = Depends(verify_token)):
     equipment = db.get_all_equipment()
     return equipment
 
+# ============================================
+# EXPORT ENDPOINTS
+# ============================================
+
+# Plain def, and StreamingResponse iterates the synchronous page generator in
+# the threadpool, so neither the setup nor the paged reads run on the event loop
+@app.get("/api/export/{table}")
+def export_table(
+    table: str,
+    request: Request,
+    format: str = "csv",
+    current_user: dict = Depends(require_admin)
+):
+    """Stream a table as CSV, gzip'd NDJSON or Parquet; other query params are equality filters"""
+    filters = {k: v for k, v in request.query_params.items() if k != "format"}
+    try:
+        chunks, mimetype, filename = stream_export(table, format, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        chunks,
+        media_type=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# ============================================
+# METRICS
+# ============================================
+
+@app.get("/api/metrics")
+async def get_metrics(current_user: dict = Depends(require_admin)):
+    """Rate-limit and in-flight counters for this API process"""
+    return {
+        "rate_limits": rate_limiter.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 # ============================================
 # HEALTH CHECK
 # ============================================
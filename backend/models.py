@@ -0,0 +1,91 @@
+"""
+API Models - request and record schemas shared by the REST API and the app
+
+Kept apart from backend/api.py so the Dash app (bulk import) can validate
+rows without importing the FastAPI application.
+"""
+from pydantic import BaseModel, EmailStr
+from typing import List, Literal, Optional
+
+class Employee(BaseModel):
+    emp_id: Optional[int] = None
+    emp_name: str
+    position: str
+    salary: float
+    hire_date: str
+    phone: Optional[str] = None
+    supervisor_id: Optional[int] = None
+    dept_id: Optional[int] = None
+
+class Satellite(BaseModel):
+    sat_id: Optional[int] = None
+    sat_name: str
+    launch_date: str
+    status: str
+    orbit_type: str
+    mass: float
+    manager_id: Optional[int] = None
+
+class Mission(BaseModel):
+    mission_id: int
+    pad_id: int
+    loc_id: int
+    mission_name: str
+    launch_date: str
+    end_date: Optional[str] = None
+    status: str
+    objective: Optional[str] = None
+    budget: float
+
+class MissionKey(BaseModel):
+    mission_id: int
+    pad_id: int
+    loc_id: int
+
+class EmployeeBulkRequest(BaseModel):
+    operation: Literal["insert", "upsert", "delete"] = "insert"
+    rows: List[Employee] = []
+    ids: List[int] = []
+
+class SatelliteBulkRequest(BaseModel):
+    operation: Literal["insert", "upsert", "delete"] = "insert"
+    rows: List[Satellite] = []
+    ids: List[int] = []
+
+class MissionBulkRequest(BaseModel):
+    operation: Literal["insert", "upsert", "delete"] = "insert"
+    rows: List[Mission] = []
+    keys: List[MissionKey] = []
+
+class TelemetryPoint(BaseModel):
+    sat_id: int
+    timestamp: Optional[str] = None
+    data_type: Optional[str] = None
+    value: Optional[float] = None
+    unit: Optional[str] = None
+    status: Optional[str] = None
+    altitude: Optional[float] = None
+    velocity: Optional[float] = None
+    temperature: Optional[float] = None
+    battery_level: Optional[float] = None
+
+class TelemetryBulkRequest(BaseModel):
+    rows: List[TelemetryPoint]
+
+class AlertRule(BaseModel):
+    expression: str
+    name: Optional[str] = None
+    severity: Literal["info", "warning", "critical"] = "warning"
+    enabled: bool = True
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+class RoleUpdate(BaseModel):
+    role: Literal["user", "admin"]
+
+class UserSignup(BaseModel):
+    email: EmailStr
+    password: str
+    username: Optional[str] = None
@@ -0,0 +1,188 @@
+"""
+Response size and latency benchmark - stdlib JSON vs orjson + gzip
+
+Builds payloads shaped like the API's and the dashboard's largest responses
+and reports, per payload, the bytes on the wire and the time to produce them:
+
+- encode: stdlib json.dumps (before) vs orjson.dumps (after)
+- wire: the same payload served by a FastAPI route with JSONResponse and no
+  compression (before) vs ORJSONResponse behind GZipMiddleware at Starlette's
+  default level 9 and at level 5, which backend/api.py uses (after),
+  measured through the ASGI test client
+- dash: a callback-sized table with full float precision (before) vs rounded
+  to 4 decimal places (after), compressed with gzip and, when installed,
+  brotli as flask-compress would
+
+Run from the repository root:
+
+    python benchmarks/bench_responses.py [--repeat N]
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import statistics
+import time
+
+import orjson
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ============================================
+# PAYLOADS
+# ============================================
+def telemetry_rows(count=5000):
+    rng = random.Random(1)
+    return [{
+        'telemetry_id': i,
+        'sat_id': 1 + i % 20,
+        'timestamp': f"2025-01-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+        'altitude': 400 + rng.random() * 50,
+        'velocity': 7.6 + rng.random() * 0.1,
+        'temperature': -20 + rng.random() * 40,
+        'battery_level': 50 + rng.random() * 50,
+        'status': rng.choice(['Nominal', 'Nominal', 'Nominal', 'Warning']),
+    } for i in range(count)]
+
+
+def employee_rows(count=2000):
+    rng = random.Random(2)
+    positions = ['Engineer', 'Scientist', 'Technician', 'Manager', 'Analyst']
+    return [{
+        'emp_id': i,
+        'emp_name': f"Employee {i}",
+        'position': rng.choice(positions),
+        'salary': round(40000 + rng.random() * 120000, 2),
+        'hire_date': f"20{10 + i % 15}-0{1 + i % 9}-1{i % 9}",
+        'dept_id': 1 + i % 12,
+        'dept_name': f"Department {1 + i % 12}",
+        'supervisor_id': i // 5 or None,
+    } for i in range(count)]
+
+
+def satellite_positions(satellites=50, steps=120):
+    rows = []
+    for sat in range(satellites):
+        for step in range(steps):
+            angle = 2 * math.pi * (step / steps + sat / satellites)
+            rows.append({'sat_id': sat, 'time': f"2025-01-01T00:{step // 2:02d}:{step % 2 * 30:02d}Z",
+                         'x': 6778.137 * math.cos(angle), 'y': 6778.137 * math.sin(angle),
+                         'z': 1234.5678 * math.sin(angle * 0.5), 'lat': 51.6 * math.sin(angle),
+                         'lon': math.degrees(angle) - 180, 'alt': 400 + 10 * math.cos(angle)})
+    return rows
+
+
+PAYLOADS = {
+    'telemetry (5k rows)': telemetry_rows,
+    'employees (2k rows)': employee_rows,
+    'positions (50 sats x 120)': satellite_positions,
+}
+
+
+def round_floats(value, digits=4):
+    """What the dashboard now does to table data before sending it"""
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {k: round_floats(v, digits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [round_floats(v, digits) for v in value]
+    return value
+
+
+# ============================================
+# MEASUREMENTS
+# ============================================
+def timed(func, repeat):
+    """(median milliseconds, last result) over repeat calls"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def bench_encode(payload, repeat):
+    before_ms, before = timed(lambda: json.dumps(payload).encode(), repeat)
+    after_ms, after = timed(lambda: orjson.dumps(payload), repeat)
+    return (len(before), before_ms), (len(after), after_ms)
+
+
+# gzip levels measured for the API (9 is Starlette's default, 5 is what
+# backend/api.py configures)
+WIRE_GZIP_LEVELS = (9, 5)
+
+
+def bench_wire(payload, repeat):
+    before_app = FastAPI()
+    before_app.get('/data')(lambda: JSONResponse(payload))
+    apps = [before_app]
+    for level in WIRE_GZIP_LEVELS:
+        after_app = FastAPI(default_response_class=ORJSONResponse)
+        after_app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=level)
+        # Built directly, as conditional_json does; returning the payload
+        # would first run it through FastAPI's jsonable_encoder
+        after_app.get('/data')(lambda: ORJSONResponse(payload))
+        apps.append(after_app)
+
+    results = []
+    for app in apps:
+        client = TestClient(app)
+        ms, response = timed(lambda: client.get('/data', headers={'Accept-Encoding': 'gzip'}), repeat)
+        results.append((response.num_bytes_downloaded, ms))
+    return results
+
+
+def bench_dash(payload, repeat):
+    rounded = round_floats(payload)
+    results = []
+    for data in (payload, rounded):
+        body = orjson.dumps(data)
+        gzip_ms, gzipped = timed(lambda: gzip.compress(body, 6), repeat)
+        row = [len(body), len(gzipped), gzip_ms]
+        if brotli is not None:
+            br_ms, compressed = timed(lambda: brotli.compress(body, quality=4), repeat)
+            row += [len(compressed), br_ms]
+        results.append(row)
+    return results
+
+
+def kb(size):
+    return f"{size / 1024:,.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=10, help="runs per measurement (median reported)")
+    args = parser.parse_args()
+
+    for name, build in PAYLOADS.items():
+        payload = build()
+        print(f"\n== {name} ==")
+        (b_size, b_ms), (a_size, a_ms) = bench_encode(payload, args.repeat)
+        print(f"  encode   before {kb(b_size):>12} {b_ms:8.2f} ms   after {kb(a_size):>12} {a_ms:8.2f} ms")
+        (b_size, b_ms), *after = bench_wire(payload, args.repeat)
+        for level, (a_size, a_ms) in zip(WIRE_GZIP_LEVELS, after):
+            print(f"  wire gz{level} before {kb(b_size):>12} {b_ms:8.2f} ms   after {kb(a_size):>12} {a_ms:8.2f} ms"
+                  f"   ({b_size / a_size:.1f}x smaller)")
+        before, after = bench_dash(payload, args.repeat)
+        for label, row in (('full', before), ('rounded', after)):
+            line = f"  dash {label:<8} json {kb(row[0]):>10}  gzip {kb(row[1]):>10} {row[2]:7.2f} ms"
+            if len(row) > 3:
+                line += f"  brotli {kb(row[3]):>10} {row[4]:7.2f} ms"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,16 @@ Database Configuration - Supabase PostgreSQL Connection
 Enhanced with Research Facts and better error handling
 """
 import os
+import threading
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from postgrest import APIResponse
+from postgrest.exceptions import APIError
 # --- IMPORT IS CORRECT ---
 import pandas as pd
 
+from utils.cache import shared_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -23,6 +27,23 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 # Service client (for admin operations)
 supabase_admin: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY) if SUPABASE_SERVICE_KEY else supabase
 
+# PostgreSQL error code for a duplicate primary key
+UNIQUE_VIOLATION = '23505'
+# PostgREST / PostgreSQL codes for a function that does not exist
+MISSING_FUNCTION_CODES = {'PGRST202', '42883'}
+# PostgREST code for a relationship it cannot embed
+MISSING_RELATIONSHIP_CODE = 'PGRST200'
+# How often add_research_fact retries a fact_id taken by a concurrent insert
+FACT_ID_MAX_RETRIES = 20
+# Rows per request for the bulk insert/upsert/delete helpers
+BULK_CHUNK_SIZE = 500
+# Rows per request when paging through a table for export
+EXPORT_CHUNK_SIZE = 1000
+# Lifetime of cached list reads; writes through Database invalidate sooner
+READ_CACHE_TTL = 30
+# Lifetime of cached user id -> username entries
+USERNAME_CACHE_TTL = 3600
+
 
 class Database:
     """Database operations wrapper"""
@@ -42,6 +63,57 @@ class Database:
         else:
             self.admin_raw_client = self.client
 
+        # --- USERNAME RESOLUTION FOR RESEARCH FACTS ---
+        # Flipped off once PostgREST reports the relationship missing
+        self._embed_fact_users = True
+
+        # --- RESEARCH FACT ID ALLOCATION ---
+        # Falls back to client-side allocation if the procedure is missing
+        self._fact_rpc_available = True
+        self._fact_id_hints = {}
+        self._fact_id_lock = threading.Lock()
+
+        # --- BATCHED EMPLOYEE ANALYTICS ---
+        # Falls back to a local vectorized pass if the function is missing
+        self._analytics_rpc_available = True
+
+        # --- CHANGE TRACKING ---
+        # Every write bumps its table's version in the shared cache (seen by
+        # every worker) and notifies this process's listeners, so caches and
+        # indexes know when to refresh
+        self._change_listeners = {}
+        self._change_lock = threading.Lock()
+
+    # ============================================
+    # CHANGE TRACKING
+    # ============================================
+    def table_version(self, table):
+        """Number of writes made to a table through Database, by any worker sharing the cache"""
+        return shared_cache.version(f"table:{table}")
+
+    def on_change(self, table, listener):
+        """
+        Register listener(table, op, rows) for writes to a table
+
+        op is 'insert', 'update', 'upsert' or 'delete'; rows are the rows
+        PostgREST returned for the write (may be empty).
+        """
+        with self._change_lock:
+            self._change_listeners.setdefault(table, []).append(listener)
+
+    def _record_change(self, table, op, rows=None):
+        shared_cache.bump(f"table:{table}")
+        with self._change_lock:
+            listeners = list(self._change_listeners.get(table, []))
+        for listener in listeners:
+            try:
+                listener(table, op, rows or [])
+            except Exception as e:
+                print(f"Error in change listener for {table}: {e}")
+
+    def _cached_read(self, name, tables, query, *parts):
+        """query() cached until one of tables is written (errors are not cached)"""
+        return shared_cache.get_or_load(name, [f"table:{t}" for t in tables], query, *parts, ttl=READ_CACHE_TTL)
 
     # ============================================
     # DEPARTMENT OPERATIONS
@@ -50,8 +122,8 @@ class Database:
     def get_all_departments(self):
         """Get all departments"""
         try:
-            response = self.client.table('department').select('*').order('dept_id').execute()
-            return response.data
+            return self._cached_read('departments', ('department',), lambda: (
+                self.client.table('department').select('*').order('dept_id').execute().data))
         except Exception as e:
             print(f"Error fetching departments: {e}")
             return []
@@ -69,6 +141,7 @@ class Database:
         """Add new department"""
         try:
             response = self.admin.table('department').insert(dept_data).execute()
+            self._record_change('department', 'insert', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error adding department: {e}")
@@ -78,6 +151,7 @@ class Database:
         """Update department"""
         try:
             response = self.admin.table('department').update(dept_data).eq('dept_id', dept_id).execute()
+            self._record_change('department', 'update', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating department: {e}")
@@ -87,6 +161,7 @@ class Database:
         """Delete department"""
         try:
             response = self.admin.table('department').delete().eq('dept_id', dept_id).execute()
+            self._record_change('department', 'delete', response.data)
             return True
         except Exception as e:
             print(f"Error deleting department: {e}")
@@ -122,6 +197,7 @@ class Database:
         """Add new employee"""
         try:
             response = self.admin.table('employee').insert(employee_data).execute()
+            self._record_change('employee', 'insert', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error adding employee: {e}")
@@ -131,6 +207,7 @@ class Database:
         """Update employee"""
         try:
             response = self.admin.table('employee').update(employee_data).eq('emp_id', emp_id).execute()
+            self._record_change('employee', 'update', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating employee: {e}")
@@ -140,6 +217,7 @@ class Database:
         """Delete employee"""
         try:
             response = self.admin.table('employee').delete().eq('emp_id', emp_id).execute()
+            self._record_change('employee', 'delete', response.data)
             return True
         except Exception as e:
             print(f"Error deleting employee: {e}")
@@ -152,8 +230,8 @@ class Database:
     def get_all_satellites(self):
         """Get all satellites with status"""
         try:
-            response = self.client.table('satellite_status_report').select('*').order('sat_id').execute()
-            return response.data
+            return self._cached_read('satellites', ('satellite',), lambda: (
+                self.client.table('satellite_status_report').select('*').order('sat_id').execute().data))
         except Exception as e:
             print(f"Error fetching satellites from view: {e}")
             try:
@@ -175,6 +253,7 @@ class Database:
         """Add new satellite"""
         try:
             response = self.admin.table('satellite').insert(sat_data).execute()
+            self._record_change('satellite', 'insert', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error adding satellite: {e}")
@@ -184,6 +263,7 @@ class Database:
         """Update satellite"""
         try:
             response = self.admin.table('satellite').update(sat_data).eq('sat_id', sat_id).execute()
+            self._record_change('satellite', 'update', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating satellite: {e}")
@@ -193,6 +273,7 @@ class Database:
         """Delete satellite"""
         try:
             response = self.admin.table('satellite').delete().eq('sat_id', sat_id).execute()
+            self._record_change('satellite', 'delete', response.data)
             return True
         except Exception as e:
             print(f"Error deleting satellite: {e}")
@@ -201,12 +282,69 @@ class Database:
     def get_operational_satellites(self):
         """Get only operational satellites"""
         try:
-            response = self.client.table('satellite').select('*').eq('status', 'Operational').execute()
-            return response.data
+            return self._cached_read('operational_satellites', ('satellite',), lambda: (
+                self.client.table('satellite').select('*').eq('status', 'Operational').execute().data))
         except Exception as e:
             print(f"Error fetching operational satellites: {e}")
             return []
 
+    # ============================================
+    # ORBIT OPERATIONS
+    # ============================================
+    def get_orbital_elements(self):
+        """Stored mean orbital elements (one row per satellite)"""
+        try:
+            return self._cached_read('orbital_elements', ('orbital_element',), lambda: (
+                self.client.table('orbital_element').select('*').execute().data))
+        except Exception as e:
+            print(f"Error fetching orbital elements: {e}")
+            return []
+
+    def upsert_orbital_elements(self, rows):
+        """Insert or update orbital elements by sat_id"""
+        return self._bulk_write('orbital_element', rows, upsert=True, on_conflict='sat_id')
+
+    def get_satellite_positions(self, times, sat_ids=None):
+        """Propagated latitude, longitude, altitude and speed of satellites at times"""
+        try:
+            from utils.orbit import fleet_propagator
+            return fleet_propagator.tracks(times, sat_ids)
+        except Exception as e:
+            print(f"Error propagating satellite positions: {e}")
+            return None
+
+    def get_all_locations(self):
+        """Get all locations (ground sites with coordinates)"""
+        try:
+            return self._cached_read('locations', ('location',), lambda: (
+                self.client.table('location').select('*').order('loc_id').execute().data))
+        except Exception as e:
+            print(f"Error fetching locations: {e}")
+            return []
+
+    def get_location_by_id(self, loc_id):
+        """Get location by ID"""
+        try:
+            response = self.client.table('location').select('*').eq('loc_id', loc_id).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error fetching location: {e}")
+            return None
+
+    def get_passes(self, lat, lon, day=None, min_elevation=None, sat_ids=None):
+        """Satellite passes over a location during one UTC day, ordered by rise time"""
+        try:
+            from utils.passes import pass_predictor, PASS_MIN_ELEVATION_DEG
+            passes = pass_predictor.day_passes(
+                lat, lon, day, PASS_MIN_ELEVATION_DEG if min_elevation is None else min_elevation)
+            if sat_ids is not None:
+                wanted = {int(s) for s in sat_ids}
+                passes = [p for p in passes if p['sat_id'] in wanted]
+            return passes
+        except Exception as e:
+            print(f"Error predicting passes: {e}")
+            return None
+
     # ============================================
     # MISSION OPERATIONS
     # ============================================
@@ -214,8 +352,8 @@ class Database:
     def get_all_missions(self):
         """Get all missions"""
         try:
-            response = self.client.table('mission').select('*').order('mission_id').execute()
-            return response.data
+            return self._cached_read('missions', ('mission',), lambda: (
+                self.client.table('mission').select('*').order('mission_id').execute().data))
         except Exception as e:
             print(f"Error fetching missions: {e}")
             return []
@@ -224,6 +362,7 @@ class Database:
         """Add new mission"""
         try:
             response = self.admin.table('mission').insert(mission_data).execute()
+            self._record_change('mission', 'insert', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error adding mission: {e}")
@@ -238,6 +377,7 @@ class Database:
                         .eq('pad_id', pad_id)
                         .eq('loc_id', loc_id)
                         .execute())
+            self._record_change('mission', 'update', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating mission: {e}")
@@ -252,6 +392,7 @@ class Database:
                         .eq('pad_id', pad_id)
                         .eq('loc_id', loc_id)
                         .execute())
+            self._record_change('mission', 'delete', response.data)
             return True
         except Exception as e:
             print(f"Error deleting mission: {e}")
@@ -311,6 +452,153 @@ class Database:
             print(f"Error fetching telemetry: {e}")
             return []
 
+    def get_telemetry_since(self, after_id=None, limit=5000):
+        """
+        Telemetry rows with telemetry_id above after_id, oldest first
+
+        With no after_id, the latest limit rows (still oldest first).
+        """
+        try:
+            query = self.client.table('telemetry').select('*')
+            if after_id is None:
+                response = query.order('telemetry_id', desc=True).limit(limit).execute()
+                return list(reversed(response.data or []))
+            response = query.gt('telemetry_id', after_id).order('telemetry_id').limit(limit).execute()
+            return response.data
+        except Exception as e:
+            print(f"Error fetching telemetry: {e}")
+            return []
+
+    def get_telemetry_by_ids(self, telemetry_ids):
+        """Telemetry rows with these telemetry_ids, oldest first"""
+        try:
+            response = (self.client.table('telemetry').select('*')
+                        .in_('telemetry_id', list(telemetry_ids)).order('telemetry_id').execute())
+            return response.data
+        except Exception as e:
+            print(f"Error fetching telemetry: {e}")
+            return []
+
+    def add_telemetry(self, rows):
+        """Insert telemetry points; the anomaly detector checks them as they are written"""
+        from utils.alert_rules import rule_engine  # noqa: F401 - registers the telemetry listeners
+        return self._bulk_write('telemetry', rows)
+
+    def get_telemetry_alerts(self, since_id=0, sat_id=None, limit=100):
+        """Anomaly alerts (newest first), after analysing telemetry written since the last check"""
+        try:
+            from utils.alert_rules import rule_engine  # noqa: F401 - registers the telemetry listeners
+            from utils.anomaly import anomaly_detector
+            anomaly_detector.poll()
+            return anomaly_detector.recent_alerts(since_id, sat_id, limit)
+        except Exception as e:
+            print(f"Error checking telemetry anomalies: {e}")
+            return []
+
+    def get_telemetry_before(self, before, after_id=None, limit=EXPORT_CHUNK_SIZE):
+        """Telemetry rows older than before with telemetry_id above after_id, by telemetry_id"""
+        query = self.admin.table('telemetry').select('*').lt('timestamp', before)
+        if after_id is not None:
+            query = query.gt('telemetry_id', after_id)
+        return query.order('telemetry_id').limit(limit).execute().data
+
+    def delete_telemetry(self, telemetry_ids):
+        """Delete many telemetry rows by telemetry_id"""
+        return self._bulk_delete('telemetry', 'telemetry_id', list(telemetry_ids))
+
+    def add_archive_blocks(self, blocks):
+        """Store compressed telemetry archive blocks (a block already stored is overwritten, not duplicated)"""
+        return self._bulk_write('telemetry_archive', blocks, upsert=True,
+                                on_conflict='sat_id,data_type,first_telemetry_id', chunk_size=50)
+
+    def get_archive_watermarks(self):
+        """{(sat_id, data_type): highest telemetry_id already in an archive block}"""
+        marks = {}
+        after_id = None
+        while True:
+            query = self.admin.table('telemetry_archive').select(
+                'archive_id', 'sat_id', 'data_type', 'last_telemetry_id')
+            if after_id is not None:
+                query = query.gt('archive_id', after_id)
+            rows = query.order('archive_id').limit(EXPORT_CHUNK_SIZE).execute().data or []
+            for row in rows:
+                key = (row.get('sat_id'), row.get('data_type'))
+                marks[key] = max(marks.get(key, 0), row.get('last_telemetry_id') or 0)
+            if len(rows) < EXPORT_CHUNK_SIZE:
+                return marks
+            after_id = rows[-1]['archive_id']
+
+    def get_archive_blocks(self, sat_id, data_type, start=None, end=None):
+        """Archive blocks of one series overlapping [start, end], oldest first"""
+        try:
+            query = (self.admin.table('telemetry_archive').select('*')
+                     .eq('sat_id', sat_id).eq('data_type', data_type))
+            if start is not None:
+                query = query.gte('end_time', start)
+            if end is not None:
+                query = query.lte('start_time', end)
+            return query.order('start_time').execute().data
+        except Exception as e:
+            print(f"Error fetching telemetry archive: {e}")
+            return []
+
+    def archive_telemetry(self, before, delete_raw=False):
+        """Compress telemetry older than before into the archive"""
+        try:
+            from utils.archive import telemetry_archive
+            return telemetry_archive.archive(before, delete_raw)
+        except Exception as e:
+            print(f"Error archiving telemetry: {e}")
+            return None
+
+    def read_telemetry_archive(self, sat_id, data_type, start=None, end=None):
+        """Archived (timestamps, values) NumPy arrays of one series for a time range"""
+        try:
+            from utils.archive import telemetry_archive
+            return telemetry_archive.read(sat_id, data_type, start, end)
+        except Exception as e:
+            print(f"Error reading telemetry archive: {e}")
+            return None
+
+    def get_alert_rules(self):
+        """Get all telemetry alert rules"""
+        try:
+            return self._cached_read('alert_rules', ('alert_rule',), lambda: (
+                self.client.table('alert_rule').select('*').order('rule_id').execute().data))
+        except Exception as e:
+            print(f"Error fetching alert rules: {e}")
+            return []
+
+    def add_alert_rule(self, rule_data):
+        """Add a telemetry alert rule"""
+        try:
+            response = self.admin.table('alert_rule').insert(rule_data).execute()
+            self._record_change('alert_rule', 'insert', response.data)
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error adding alert rule: {e}")
+            return None
+
+    def update_alert_rule(self, rule_id, rule_data):
+        """Update a telemetry alert rule"""
+        try:
+            response = self.admin.table('alert_rule').update(rule_data).eq('rule_id', rule_id).execute()
+            self._record_change('alert_rule', 'update', response.data)
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error updating alert rule: {e}")
+            return None
+
+    def delete_alert_rule(self, rule_id):
+        """Delete a telemetry alert rule"""
+        try:
+            response = self.admin.table('alert_rule').delete().eq('rule_id', rule_id).execute()
+            self._record_change('alert_rule', 'delete', response.data)
+            return True
+        except Exception as e:
+            print(f"Error deleting alert rule: {e}")
+            return False
+
     def get_all_equipment(self):
         """Get all equipment"""
         try:
@@ -322,18 +610,38 @@ class Database:
 
     def get_all_research_facts(self):
         """Get all research facts, with usernames (flat, no errors)"""
+        # Resolve usernames in the same request via the research_fact -> user
+        # foreign key; drop back to the cached id -> username map if the
+        # relationship cannot be embedded.
+        if self._embed_fact_users:
+            try:
+                response = (self.client.table('research_fact')
+                            .select('*, user(username)')
+                            .order('date_added', desc=True)
+                            .execute())
+                result = []
+                for fact in response.data or []:
+                    fact_copy = fact.copy()
+                    user = fact_copy.pop('user', None) or {}
+                    fact_copy['username'] = user.get('username') or 'Unknown'
+                    result.append(fact_copy)
+                return result
+            except Exception as e:
+                if getattr(e, 'code', None) == MISSING_RELATIONSHIP_CODE:
+                    print(f"Embedded user lookup unavailable, using username cache: {e}")
+                    self._embed_fact_users = False
+                else:
+                    print(f"Error fetching research facts with usernames, using username cache: {e}")
+
         try:
             facts_response = self.client.table('research_fact').select('*').order('date_added', desc=True).execute()
-            users_response = self.client.table('user').select('user_id', 'username').execute()
-
             facts = facts_response.data or []
-            users = users_response.data or []
-            user_map = {u['user_id']: u.get('username', 'Unknown') for u in users}
+            user_map = self.get_usernames({f.get('user_id') for f in facts})
 
             result = []
             for fact in facts:
                 fact_copy = fact.copy()
-                fact_copy['username'] = user_map.get(fact_copy['user_id'], 'Unknown')
+                fact_copy['username'] = user_map.get(fact_copy.get('user_id'), 'Unknown')
                 result.append(fact_copy)
             return result
         except Exception as e:
@@ -344,24 +652,92 @@ class Database:
             except:
                 return []
 
+    def get_usernames(self, user_ids):
+        """Resolve user ids to usernames, fetching only ids not already cached"""
+        # Versioned so invalidate_username_cache() can drop every entry at once
+        key = shared_cache.versioned_key('username', ('usernames',))
+        names = {uid: shared_cache.get(key + str(uid)) for uid in user_ids if uid}
+        missing = [uid for uid, name in names.items() if name is None]
+        if missing:
+            try:
+                response = self.client.table('user').select('user_id', 'username').in_('user_id', missing).execute()
+                found = {u['user_id']: u.get('username') or 'Unknown' for u in response.data or []}
+                for uid in missing:
+                    # Unknown ids are cached too; sign-up invalidates them
+                    names[uid] = found.get(uid, 'Unknown')
+                    shared_cache.set(key + str(uid), names[uid], USERNAME_CACHE_TTL)
+            except Exception as e:
+                print(f"Error fetching usernames: {e}")
+        return {uid: name or 'Unknown' for uid, name in names.items()}
+
+    def invalidate_username_cache(self, user_id=None):
+        """Drop one cached username (or all of them), e.g. after a sign-up"""
+        if user_id is None:
+            shared_cache.bump('usernames')
+        else:
+            shared_cache.delete(shared_cache.versioned_key('username', ('usernames',)) + str(user_id))
 
     def add_research_fact(self, fact_data):
-        """Add new research fact"""
+        """Add new research fact, allocating the next per-user fact_id atomically"""
+        if self._fact_rpc_available:
+            try:
+                response: APIResponse = self.admin_raw_client.rpc(
+                    'add_research_fact',
+                    {
+                        'user_id_param': fact_data['user_id'],
+                        'fact_title_param': fact_data.get('fact_title'),
+                        'description_param': fact_data.get('description'),
+                        'category_param': fact_data.get('category'),
+                        'source_param': fact_data.get('source'),
+                        'date_added_param': fact_data.get('date_added'),
+                    }
+                ).execute()
+                self._record_change('research_fact', 'insert', response.data)
+                return response.data[0] if response.data else None
+            except Exception as e:
+                if getattr(e, 'code', None) not in MISSING_FUNCTION_CODES:
+                    # The insert may have happened; retrying client-side could duplicate it
+                    print(f"Error adding research fact: {e}")
+                    return None
+                print(f"add_research_fact procedure unavailable, allocating client-side: {e}")
+                self._fact_rpc_available = False
+
         try:
-            existing = self.admin.table('research_fact').select('fact_id').eq('user_id', fact_data['user_id']).execute()
-            
-            if existing.data:
-                max_fact_id = max([f.get('fact_id', 0) for f in existing.data])
-                fact_data['fact_id'] = max_fact_id + 1
-            else:
-                fact_data['fact_id'] = 1
-            
-            response = self.admin.table('research_fact').insert(fact_data).execute()
-            return response.data[0] if response.data else None
+            user_id = fact_data['user_id']
+            for _ in range(FACT_ID_MAX_RETRIES):
+                row = dict(fact_data, fact_id=self._next_fact_id(user_id))
+                try:
+                    response = self.admin.table('research_fact').insert(row).execute()
+                except APIError as e:
+                    if e.code != UNIQUE_VIOLATION:
+                        raise
+                    # Another writer took this id; re-read the current maximum
+                    with self._fact_id_lock:
+                        self._fact_id_hints.pop(user_id, None)
+                    continue
+                self._record_change('research_fact', 'insert', response.data)
+                return response.data[0] if response.data else None
+            print(f"Error adding research fact: fact_id still conflicting after {FACT_ID_MAX_RETRIES} attempts")
+            return None
         except Exception as e:
             print(f"Error adding research fact: {e}")
             return None
 
+    def _next_fact_id(self, user_id):
+        """Reserve the next fact_id for a user (one indexed read on a cold hint)"""
+        with self._fact_id_lock:
+            next_id = self._fact_id_hints.get(user_id)
+            if next_id is None:
+                response = (self.admin.table('research_fact')
+                            .select('fact_id')
+                            .eq('user_id', user_id)
+                            .order('fact_id', desc=True)
+                            .limit(1)
+                            .execute())
+                next_id = (response.data[0]['fact_id'] + 1) if response.data else 1
+            self._fact_id_hints[user_id] = next_id + 1
+            return next_id
+
     def update_research_fact(self, fact_id, user_id, fact_data):
         """Update research fact"""
         try:
@@ -370,6 +746,7 @@ class Database:
                        .eq('fact_id', fact_id)
                        .eq('user_id', user_id)
                        .execute())
+            self._record_change('research_fact', 'update', response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating research fact: {e}")
@@ -383,11 +760,193 @@ class Database:
                        .eq('fact_id', fact_id)
                        .eq('user_id', user_id)
                        .execute())
+            self._record_change('research_fact', 'delete', response.data)
             return True
         except Exception as e:
             print(f"Error deleting research fact: {e}")
             return False
 
+    # ============================================
+    # BULK OPERATIONS
+    # ============================================
+    def _bulk_write(self, table, rows, upsert=False, on_conflict=None, chunk_size=None):
+        """
+        Insert or upsert many rows in as few requests as possible.
+
+        Rows are grouped by their column set (PostgREST needs matching keys
+        within one request) and sent in chunks. If a chunk is rejected its
+        rows are retried one at a time so every row gets its own result.
+
+        Returns:
+            list: One {'index', 'success', 'data' | 'error'} dict per input row
+        """
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        groups = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(tuple(sorted(row)), []).append(index)
+
+        def write(payload):
+            query = self.admin.table(table)
+            if upsert:
+                query = query.upsert(payload, on_conflict=on_conflict or '')
+            else:
+                query = query.insert(payload)
+            return query.execute().data or []
+
+        results = [None] * len(rows)
+        for indexes in groups.values():
+            for start in range(0, len(indexes), chunk_size):
+                chunk = indexes[start:start + chunk_size]
+                try:
+                    data = write([rows[i] for i in chunk])
+                    for offset, i in enumerate(chunk):
+                        results[i] = {'index': i, 'success': True,
+                                      'data': data[offset] if offset < len(data) else None}
+                    continue
+                except Exception as e:
+                    print(f"Bulk write to {table} failed for a chunk of {len(chunk)}, retrying row by row: {e}")
+                for i in chunk:
+                    try:
+                        data = write(rows[i])
+                        results[i] = {'index': i, 'success': True, 'data': data[0] if data else None}
+                    except Exception as row_error:
+                        results[i] = {'index': i, 'success': False, 'error': str(row_error)}
+        self._record_change(table, 'upsert' if upsert else 'insert',
+                            [r['data'] for r in results if r['success'] and r.get('data')])
+        return results
+
+    def _bulk_delete(self, table, key_column, ids, chunk_size=None):
+        """Delete rows whose key_column is in ids, one request per chunk"""
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        results = []
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            try:
+                response = self.admin.table(table).delete().in_(key_column, chunk).execute()
+                self._record_change(table, 'delete', response.data)
+                deleted = {row.get(key_column) for row in response.data or []}
+                for offset, key in enumerate(chunk):
+                    if key in deleted:
+                        results.append({'index': start + offset, 'success': True, 'data': {key_column: key}})
+                    else:
+                        results.append({'index': start + offset, 'success': False, 'error': 'Not found'})
+            except Exception as e:
+                print(f"Error bulk deleting from {table}: {e}")
+                results.extend({'index': start + offset, 'success': False, 'error': str(e)}
+                               for offset in range(len(chunk)))
+        return results
+
+    def add_employees(self, rows):
+        """Insert many employees"""
+        return self._bulk_write('employee', rows)
+
+    def upsert_employees(self, rows):
+        """Insert or update many employees by emp_id"""
+        return self._bulk_write('employee', rows, upsert=True, on_conflict='emp_id')
+
+    def delete_employees(self, emp_ids):
+        """Delete many employees by emp_id"""
+        return self._bulk_delete('employee', 'emp_id', list(emp_ids))
+
+    def add_satellites(self, rows):
+        """Insert many satellites"""
+        return self._bulk_write('satellite', rows)
+
+    def upsert_satellites(self, rows):
+        """Insert or update many satellites by sat_id"""
+        return self._bulk_write('satellite', rows, upsert=True, on_conflict='sat_id')
+
+    def delete_satellites(self, sat_ids):
+        """Delete many satellites by sat_id"""
+        return self._bulk_delete('satellite', 'sat_id', list(sat_ids))
+
+    def add_missions(self, rows):
+        """Insert many missions"""
+        return self._bulk_write('mission', rows)
+
+    def upsert_missions(self, rows):
+        """Insert or update many missions by composite ID"""
+        return self._bulk_write('mission', rows, upsert=True, on_conflict='mission_id,pad_id,loc_id')
+
+    def delete_missions(self, keys, chunk_size=None):
+        """
+        Delete many missions by composite ID
+
+        Args:
+            keys: Iterable of dicts with mission_id, pad_id and loc_id
+        """
+        keys = [(int(k['mission_id']), int(k['pad_id']), int(k['loc_id'])) for k in keys]
+        chunk_size = chunk_size or BULK_CHUNK_SIZE
+        results = []
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            condition = ','.join(f"and(mission_id.eq.{m},pad_id.eq.{p},loc_id.eq.{l})" for m, p, l in chunk)
+            try:
+                response = self.admin.table('mission').delete().or_(condition).execute()
+                self._record_change('mission', 'delete', response.data)
+                deleted = {(r.get('mission_id'), r.get('pad_id'), r.get('loc_id')) for r in response.data or []}
+                for offset, key in enumerate(chunk):
+                    if key in deleted:
+                        results.append({'index': start + offset, 'success': True,
+                                        'data': dict(zip(('mission_id', 'pad_id', 'loc_id'), key))})
+                    else:
+                        results.append({'index': start + offset, 'success': False, 'error': 'Not found'})
+            except Exception as e:
+                print(f"Error bulk deleting missions: {e}")
+                results.extend({'index': start + offset, 'success': False, 'error': str(e)}
+                               for offset in range(len(chunk)))
+        return results
+
+    # ============================================
+    # EXPORT OPERATIONS
+    # ============================================
+    def iter_table(self, table, order_by, filters=None, chunk_size=None):
+        """
+        Yield a table or view page by page (admin client, bypasses RLS)
+
+        Pages are always ordered by order_by, which must identify a row, so a
+        row never lands on two pages or none. A single column is paged by
+        keyset (key > last key) so deep pages cost the same as the first; a
+        composite key is paged by row range.
+
+        Args:
+            table: Table or view name
+            order_by: Unique column, or tuple of columns forming a unique key
+            filters: Optional {column: value} equality filters
+            chunk_size: Rows per request
+
+        Yields:
+            list: Rows of one page
+        """
+        chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+        filters = filters or {}
+        columns = (order_by,) if isinstance(order_by, str) else tuple(order_by)
+        key_column = columns[0] if len(columns) == 1 else None
+        offset = 0
+        last_key = None
+        while True:
+            query = self.admin.table(table).select('*')
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            for column in columns:
+                query = query.order(column)
+            if key_column:
+                if last_key is not None:
+                    query = query.gt(key_column, last_key)
+                query = query.limit(chunk_size)
+            else:
+                query = query.range(offset, offset + chunk_size - 1)
+
+            rows = query.execute().data or []
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            offset += len(rows)
+            if key_column:
+                last_key = rows[-1][key_column]
+
     # ============================================
     # ANALYTICS & STATISTICS
     # ============================================
@@ -395,8 +954,8 @@ class Database:
     def get_department_summary(self):
         """Get department summary statistics"""
         try:
-            response = self.client.table('department_summary').select('*').execute()
-            return response.data
+            return self._cached_read('department_summary', ('department', 'employee', 'satellite'), lambda: (
+                self.client.table('department_summary').select('*').execute().data))
         except Exception as e:
             print(f"Error fetching department summary: {e}")
             return []
@@ -435,7 +994,93 @@ class Database:
     # ============================================
     # SEARCH OPERATIONS
     # ============================================
-    # ... (omitted, no changes) ...
+    def search_missions(self, query, limit=20):
+        """Rank missions by name, objective and status"""
+        return self._search('missions', query, limit)
+
+    def search_employees(self, query, limit=20):
+        """Rank employees by name, position and department"""
+        return self._search('employees', query, limit)
+
+    def search_research_facts(self, query, limit=20):
+        """Rank research facts by title, description, category and author"""
+        return self._search('research_facts', query, limit)
+
+    def suggest(self, query, sources=None, limit=8):
+        """Typeahead completions for a partial query"""
+        try:
+            from utils.search import search_service
+            return search_service.suggest(query, sources=sources, limit=limit)
+        except Exception as e:
+            print(f"Error fetching suggestions: {e}")
+            return []
+
+    def _search(self, source, query, limit):
+        try:
+            # Imported here: the search index itself loads rows through db
+            from utils.search import search_service
+            return search_service.search(source, query, limit=limit)
+        except Exception as e:
+            print(f"Error searching {source}: {e}")
+            return []
+
+    # ============================================
+    # HIERARCHY OPERATIONS
+    # ============================================
+    def count_subordinates(self, emp_id, transitive=False):
+        """Direct (or transitive) subordinate count from the hierarchy index"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.count_subordinates(emp_id, transitive=transitive)
+        except Exception as e:
+            print(f"Error counting subordinates: {e}")
+            return None
+
+    def get_chain_of_command(self, emp_id):
+        """Supervisors of an employee, nearest first"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.chain_of_command(emp_id)
+        except Exception as e:
+            print(f"Error fetching chain of command: {e}")
+            return []
+
+    def get_subtree_salary(self, emp_id):
+        """Total salary of an employee's reporting tree"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.subtree_salary(emp_id)
+        except Exception as e:
+            print(f"Error summing subtree salary: {e}")
+            return None
+
+    def get_hierarchy_summary(self, emp_id):
+        """Subordinate counts, team salary and chain of command for an employee"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.summary(emp_id)
+        except Exception as e:
+            print(f"Error fetching hierarchy summary: {e}")
+            return None
+
+    def get_org_tree(self, root=None, depth=2, expanded=(), collapsed=(), max_nodes=500):
+        """Org-chart nodes and edges with precomputed layout coordinates"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.tree(root=root, depth=depth, expanded=expanded,
+                                        collapsed=collapsed, max_nodes=max_nodes)
+        except Exception as e:
+            print(f"Error building org tree: {e}")
+            return None
+
+    def get_employee_hierarchy(self):
+        """Employees joined to supervisor and department, served from the index"""
+        try:
+            from utils.hierarchy import hierarchy_index
+            return hierarchy_index.joined_rows()
+        except Exception as e:
+            print(f"Error fetching employee hierarchy: {e}")
+            return self.get_all_employees()
 
     # ============================================
     # --- ANALYTICS FUNCTIONS (FIXED) ---
@@ -468,8 +1113,37 @@ class Database:
             print(f"Error calling GenerateSalaryReport procedure: {e}")
             return []
 
+    def get_salary_report(self):
+        """
+        Salary grades and department ranks, cached until employees or departments change
+
+        The generate_salary_report procedure is the only source of salary
+        grades, so the report always comes from it.
+        """
+        try:
+            return self._cached_read('salary_report', ('employee', 'department'), lambda: (
+                self.admin_raw_client.rpc('generate_salary_report', {}).execute().data))
+        except Exception as e:
+            print(f"Error calling GenerateSalaryReport procedure: {e}")
+            return []
+
+    def get_department_salary_stats(self):
+        """Per-department salary count, total, average, min and max"""
+        try:
+            from utils.salary import salary_analytics
+            return salary_analytics.department_stats()
+        except Exception as e:
+            print(f"Error fetching department salary stats: {e}")
+            return []
+
     def get_employees_above_avg_salary(self):
         """Runs the correlated subquery for employees above dept avg"""
+        try:
+            from utils.salary import salary_analytics
+            return salary_analytics.above_average()
+        except Exception as e:
+            print(f"Error reading salary aggregates, recomputing: {e}")
+
         try:
             employees = self.get_all_employees()
             if not employees:
@@ -518,5 +1192,72 @@ class Database:
         except Exception as e:
             print(f"Error calling CountSubordinates function: {e}")
             return None
+
+    def get_employee_analytics(self, emp_ids=None):
+        """
+        Details, years of service and subordinate counts for many employees
+
+        One get_employee_analytics RPC replaces the three per-employee calls;
+        without it the same columns are computed locally in one vectorized pass.
+
+        Args:
+            emp_ids: Employee ids to include (None for every employee)
+
+        Returns:
+            list: One dict per employee, ordered by emp_id
+        """
+        if emp_ids is not None:
+            emp_ids = sorted({int(e) for e in emp_ids})
+            if not emp_ids:
+                return []
+        if self._analytics_rpc_available:
+            try:
+                response: APIResponse = self.admin_raw_client.rpc(
+                    'get_employee_analytics',
+                    {'emp_ids_param': emp_ids}
+                ).execute()
+                return response.data
+            except Exception as e:
+                if getattr(e, 'code', None) in MISSING_FUNCTION_CODES:
+                    print(f"get_employee_analytics procedure unavailable, computing locally: {e}")
+                    self._analytics_rpc_available = False
+                else:
+                    print(f"Error calling get_employee_analytics, computing locally: {e}")
+
+        try:
+            return self._employee_analytics_local(emp_ids)
+        except Exception as e:
+            print(f"Error computing employee analytics: {e}")
+            return []
+
+    def _employee_analytics_local(self, emp_ids):
+        from utils.hierarchy import hierarchy_index
+
+        rows = hierarchy_index.joined_rows()
+        if emp_ids is not None:
+            wanted = set(emp_ids)
+            rows = [r for r in rows if r.get('emp_id') in wanted]
+        if not rows:
+            return []
+
+        df = pd.DataFrame(rows)
+        # Full years, like EXTRACT(YEAR FROM AGE(CURRENT_DATE, hire_date))
+        hired = pd.to_datetime(df['hire_date'], errors='coerce')
+        today = pd.Timestamp.today().normalize()
+        before_anniversary = (hired.dt.month * 100 + hired.dt.day) > (today.month * 100 + today.day)
+        df['years_of_service'] = (today.year - hired.dt.year - before_anniversary.astype(int)).astype('Int64')
+
+        df['direct_subordinates'] = [hierarchy_index.count_subordinates(e) for e in df['emp_id']]
+        df['total_subordinates'] = [hierarchy_index.count_subordinates(e, transitive=True) for e in df['emp_id']]
+
+        satellites = self.client.table('satellite').select('manager_id').execute().data or []
+        managed = pd.Series([s.get('manager_id') for s in satellites], dtype='object').value_counts()
+        df['satellites_managed'] = df['emp_id'].map(managed).fillna(0).astype(int)
+
+        columns = ['emp_id', 'emp_name', 'position', 'dept_name', 'supervisor_name', 'salary',
+                   'hire_date', 'years_of_service', 'direct_subordinates', 'total_subordinates',
+                   'satellites_managed']
+        df = df.reindex(columns=columns).astype(object)
+        return df.where(df.notna(), None).to_dict('records')
 # Create global database instance
 db = Database()
\ No newline at end of file
@@ -1,6 +1,8 @@
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 from config.database import db
+from utils.exporter import EXPORTABLE_TABLES
+from utils.profiler import callback_profiler
 from datetime import datetime
 
 def admin_dashboard_page():
@@ -130,6 +132,15 @@ def admin_dashboard_page():
             active_label_style={"color": "#06b6d4"}
         ),
         
+        # Bulk Import Tab
+        dbc.Tab(
+            create_bulk_import_tab(),
+            label="Bulk Import",
+            tab_id="tab-import",
+            label_style={"color": "#e5e7eb"},
+            active_label_style={"color": "#06b6d4"}
+        ),
+        
         # System Settings Tab
         dbc.Tab(
             create_system_settings_tab(),
@@ -745,6 +756,83 @@ def create_research_facts_management_tab(research_facts):
     ])
 
 
+def create_bulk_import_tab():
+    """Create CSV/Parquet bulk import interface"""
+    return html.Div([
+        html.H4([html.I(className="fas fa-file-import me-2"), "Bulk Import"], className="mb-2"),
+        html.P("Upload a CSV or Parquet file with one record per row. Column names must match the table fields; "
+               "rows with an existing ID are updated, the rest are inserted.", className="text-secondary small"),
+        
+        dbc.Card([
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Import Into"),
+                        dbc.Select(
+                            id="import-entity",
+                            options=[
+                                {"label": "Employees", "value": "employees"},
+                                {"label": "Satellites", "value": "satellites"},
+                                {"label": "Missions", "value": "missions"},
+                            ],
+                            value="employees"
+                        ),
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("File"),
+                        dcc.Upload(
+                            id="import-upload",
+                            children=html.Div([
+                                html.I(className="fas fa-cloud-upload-alt me-2"),
+                                "Drag and drop or ",
+                                html.A("select a .csv / .parquet file", className="text-info"),
+                            ]),
+                            accept=".csv,.parquet,.pq",
+                            multiple=False,
+                            className="text-center p-3",
+                            style={"border": "1px dashed rgba(255, 255, 255, 0.3)", "borderRadius": "8px", "cursor": "pointer"},
+                        ),
+                    ], md=8),
+                ]),
+            ])
+        ], className="glass-card mb-3"),
+        
+        dcc.Store(id='import-job-id'),
+        dcc.Interval(id='import-progress-interval', interval=500, n_intervals=0, disabled=True),
+        html.Div(id="import-progress", className="mb-3"),
+        
+        dash_table.DataTable(
+            id='import-errors-table',
+            columns=[
+                {"name": "Row", "id": "row"},
+                {"name": "Error", "id": "error"},
+            ],
+            data=[],
+            style_table={'overflowX': 'auto', 'background': 'transparent'},
+            style_cell={
+                'textAlign': 'left',
+                'padding': '12px',
+                'whiteSpace': 'normal',
+                'height': 'auto',
+                'backgroundColor': 'rgba(0, 0, 0, 0.2)',
+                'color': '#e5e7eb',
+                'border': '1px solid rgba(255, 255, 255, 0.1)',
+                'fontFamily': 'Inter, sans-serif'
+            },
+            style_header={
+                'backgroundColor': 'rgba(239, 68, 68, 0.2)',
+                'fontWeight': '700',
+                'color': '#ef4444',
+                'textTransform': 'uppercase',
+                'fontSize': '0.875rem',
+                'letterSpacing': '0.05em',
+                'border': '1px solid rgba(239, 68, 68, 0.3)'
+            },
+            page_size=10,
+        ),
+    ])
+
+
 def create_system_settings_tab():
     """Create system settings and monitoring interface"""
     # ----- THIS IS THE CORRECTED FUNCTION -----
@@ -804,18 +892,12 @@ def create_system_settings_tab():
                         html.Small("Reload all database tables", className="text-secondary d-block"),
                     ], md=4),
                     
-                    # --- FIXED "EXPORT DATA" BUTTON ---
                     dbc.Col([
-                        html.A( # Wrap button in a link
-                            dbc.Button([
-                                html.I(className="fas fa-download me-2"),
-                                "Export Data"
-                            ], id="btn-export-data", color="info", className="w-100 mb-2"),
-                            # Use the correct Project ID and URL for SQL Editor
-                            href="https://supabase.com/dashboard/project/hhjvwdfwlftyylkpvyyv/sql/new",
-                            target="_blank" # Open in new tab
-                        ),
-                        html.Small("Go to SQL Editor for manual backup", className="text-secondary d-block"),
+                        dbc.Button([
+                            html.I(className="fas fa-download me-2"),
+                            "Export Data"
+                        ], id="btn-export-data", color="info", className="w-100 mb-2", n_clicks=0),
+                        html.Small("Download a table as CSV, NDJSON or Parquet", className="text-secondary d-block"),
                     ], md=4),
                     
                     # --- FIXED "VIEW LOGS" BUTTON ---
@@ -835,5 +917,96 @@ def create_system_settings_tab():
             ])
         ], className="glass-card"),
         
+        dbc.Card([
+            dbc.CardHeader([html.I(className="fas fa-file-export me-2"), "Data Export"]),
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Label("Table"),
+                        dbc.Select(
+                            id="export-table",
+                            options=[{"label": name, "value": name} for name in EXPORTABLE_TABLES],
+                            value="telemetry"
+                        ),
+                    ], md=4),
+                    dbc.Col([
+                        dbc.Label("Format"),
+                        dbc.Select(
+                            id="export-format",
+                            options=[
+                                {"label": "CSV", "value": "csv"},
+                                {"label": "NDJSON (gzip)", "value": "ndjson"},
+                                {"label": "Parquet", "value": "parquet"},
+                            ],
+                            value="csv"
+                        ),
+                    ], md=3),
+                    dbc.Col([
+                        dbc.Label("Filter (optional)"),
+                        dbc.Input(id="export-filter", placeholder="e.g. sat_id=3, status=Nominal"),
+                    ], md=5),
+                ]),
+                html.Small("Exports are written page by page in a background job; use the Export Data button above to start one.",
+                           className="text-secondary d-block mt-2"),
+                html.Div([
+                    dbc.Progress(id="export-progress", value=0, label="", striped=True, animated=True,
+                                 className="flex-grow-1 me-2", style={"height": "18px"}),
+                    dbc.Button("Cancel", id="btn-cancel-export", color="secondary", outline=True, size="sm", disabled=True),
+                ], className="d-flex align-items-center mt-2"),
+            ])
+        ], className="glass-card mt-4"),
+        
+        dbc.Card([
+            dbc.CardHeader([html.I(className="fas fa-stopwatch me-2"), "Callback Profiler"]),
+            dbc.CardBody([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Switch(id="profiler-enabled", label="Record callback timings",
+                                   value=callback_profiler.enabled),
+                        dbc.Switch(id="profiler-sampling", label="Sample calls with cProfile",
+                                   value=callback_profiler.sampling),
+                    ], md=6),
+                    dbc.Col([
+                        dbc.Button([html.I(className="fas fa-sync-alt me-2"), "Refresh"],
+                                   id="btn-profiler-refresh", color="primary", outline=True, size="sm", className="me-2"),
+                        dbc.Button([html.I(className="fas fa-eraser me-2"), "Reset"],
+                                   id="btn-profiler-reset", color="secondary", outline=True, size="sm", className="me-2"),
+                        dbc.Button([html.I(className="fas fa-file-download me-2"), "Dump to File"],
+                                   id="btn-profiler-dump", color="info", outline=True, size="sm"),
+                    ], md=6, className="text-md-end"),
+                ], className="mb-3"),
+                html.Div(id="profiler-feedback"),
+                dash_table.DataTable(
+                    id="profiler-table",
+                    columns=[
+                        {"name": "Callback", "id": "callback"},
+                        {"name": "Calls", "id": "calls", "type": "numeric"},
+                        {"name": "Errors", "id": "errors", "type": "numeric"},
+                        {"name": "Total ms", "id": "total_ms", "type": "numeric"},
+                        {"name": "Avg ms", "id": "avg_ms", "type": "numeric"},
+                        {"name": "p95 ms", "id": "p95_ms", "type": "numeric"},
+                        {"name": "Max ms", "id": "max_ms", "type": "numeric"},
+                        {"name": "DB ms", "id": "db_ms", "type": "numeric"},
+                        {"name": "DB calls", "id": "db_calls", "type": "numeric"},
+                        {"name": "Avg KB in", "id": "avg_kb_in", "type": "numeric"},
+                        {"name": "Avg KB out", "id": "avg_kb_out", "type": "numeric"},
+                    ],
+                    data=callback_profiler.snapshot(),
+                    sort_action="native",
+                    page_size=15,
+                    style_table={'overflowX': 'auto'},
+                    style_cell={
+                        'backgroundColor': 'rgba(0, 0, 0, 0.2)',
+                        'color': '#e5e7eb',
+                        'border': '1px solid rgba(255, 255, 255, 0.1)',
+                    },
+                    style_header={
+                        'backgroundColor': 'rgba(99, 102, 241, 0.2)',
+                        'color': '#06b6d4',
+                    },
+                ),
+            ])
+        ], className="glass-card mt-4"),
+        
         html.Div(id="system-action-feedback", className="mt-3"),
     ])
\ No newline at end of file
@@ -1,6 +1,6 @@
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
-from config.database import db
+from utils.snapshots import snapshot_scheduler, freshness_label
 import pandas as pd
 
 def analytics_page():
@@ -9,13 +9,27 @@ def analytics_page():
     Addresses rubric items for Procedures, Functions, Nested, Join, and Aggregate queries.
     """
     
+    # Every dataset comes from a materialized snapshot; nothing here queries
+    # the database, and analytics-snapshot-interval swaps in newer versions
+    dept_summary = snapshot_scheduler.get('department_summary')
+    hierarchy = snapshot_scheduler.get('employee_hierarchy')
+    mission_stats = snapshot_scheduler.get('mission_stats')
+    satellite_stats = snapshot_scheduler.get('satellite_stats')
+
+    overview_card = dbc.Card([
+        dbc.CardHeader([
+            html.I(className="fas fa-satellite me-2"),
+            "Mission & Satellite Overview"
+        ]),
+        dbc.CardBody([
+            html.Div(create_overview(mission_stats, satellite_stats), id="analytics-overview"),
+            html.Small(freshness_label(mission_stats), id="analytics-overview-freshness", className="text-muted"),
+        ])
+    ], className="glass-card mb-4")
+
     # --- 1. Aggregate Query (Rubric) ---
     # This view performs aggregation (COUNT, AVG, etc.)
-    try:
-        dept_summary_data = db.get_department_summary()
-    except Exception as e:
-        dept_summary_data = []
-        print(f"Error loading dept summary: {e}")
+    dept_summary_data = dept_summary['data'] or []
 
     aggregate_query_card = dbc.Card([
         dbc.CardHeader([
@@ -25,6 +39,7 @@ def analytics_page():
         dbc.CardBody([
             html.P("This table runs an aggregate query (via a VIEW) to COUNT employees, equipment, and satellites per department.", className="text-secondary"),
             dash_table.DataTable(
+                id='analytics-dept-summary-table',
                 columns=[
                     {"name": "Dept", "id": "dept_name"},
                     {"name": "Head", "id": "Department_Head"},
@@ -45,17 +60,14 @@ def analytics_page():
                     'color': '#06b6d4',
                 },
                 page_size=5,
-            )
+            ),
+            html.Small(freshness_label(dept_summary), id="analytics-dept-summary-freshness", className="text-muted"),
         ])
     ], className="glass-card mb-4")
 
     # --- 2. Join Query (Rubric) ---
     # This view performs multiple JOINS
-    try:
-        join_data = db.get_all_employees() # This uses the Employee_Hierarchy view
-    except Exception as e:
-        join_data = []
-        print(f"Error loading join data: {e}")
+    join_data = hierarchy['data'] or []  # Same join as the Employee_Hierarchy view
         
     join_query_card = dbc.Card([
         dbc.CardHeader([
@@ -65,6 +77,7 @@ def analytics_page():
         dbc.CardBody([
             html.P("This table runs a JOIN query (via a VIEW) to link employees to their supervisors and departments.", className="text-secondary"),
             dash_table.DataTable(
+                id='analytics-join-table',
                 columns=[
                     {"name": "Employee", "id": "emp_name"},
                     {"name": "Position", "id": "position"},
@@ -83,7 +96,8 @@ def analytics_page():
                     'color': '#06b6d4',
                 },
                 page_size=5,
-            )
+            ),
+            html.Small(freshness_label(hierarchy), id="analytics-join-freshness", className="text-muted"),
         ])
     ], className="glass-card mb-4")
 
@@ -131,7 +145,7 @@ def analytics_page():
         ]),
         dbc.CardBody([
             html.H5("Get Employee Details (Procedure & Functions)"),
-            html.P("Enter an Employee ID to run 'GetEmployeeDetails', 'GetYearsOfService', and 'CountSubordinates'.", className="text-secondary"),
+            html.P("Enter an Employee ID to fetch details, years of service and subordinate counts in one batched call.", className="text-secondary"),
             dbc.InputGroup([
                 dbc.Input(id="analytics-emp-id-input", type="number", placeholder="Enter Employee ID (e.g., 1001)"),
                 dbc.Button("Run", id="analytics-run-proc-btn", color="success"),
@@ -140,6 +154,46 @@ def analytics_page():
             
             html.Hr(className="my-4"),
             
+            html.H5("Batch Employee Analytics"),
+            html.P("Run the same analytics for a list of employees, or leave blank for everyone.", className="text-secondary"),
+            dbc.InputGroup([
+                dbc.Input(id="analytics-batch-ids-input", type="text", placeholder="Employee IDs, comma separated"),
+                dbc.Button("Run Batch", id="analytics-run-batch-btn", color="success"),
+            ]),
+            dcc.Loading(
+                html.Div(className="mt-3", children=[
+                    html.Div(id="analytics-batch-feedback"),
+                    dash_table.DataTable(
+                        id='analytics-batch-table',
+                        columns=[
+                            {"name": "ID", "id": "emp_id"},
+                            {"name": "Name", "id": "emp_name"},
+                            {"name": "Department", "id": "dept_name"},
+                            {"name": "Supervisor", "id": "supervisor_name"},
+                            {"name": "Years", "id": "years_of_service", "type": "numeric"},
+                            {"name": "Direct Reports", "id": "direct_subordinates", "type": "numeric"},
+                            {"name": "All Reports", "id": "total_subordinates", "type": "numeric"},
+                            {"name": "Satellites", "id": "satellites_managed", "type": "numeric"},
+                        ],
+                        data=[],
+                        style_table={'overflowX': 'auto', 'background': 'transparent'},
+                        style_cell={
+                            'backgroundColor': 'rgba(0, 0, 0, 0.2)',
+                            'color': '#e5e7eb',
+                            'border': '1px solid rgba(255, 255, 255, 0.1)',
+                        },
+                        style_header={
+                            'backgroundColor': 'rgba(99, 102, 241, 0.2)',
+                            'color': '#06b6d4',
+                        },
+                        page_size=5,
+                        sort_action='native',
+                    )
+                ])
+            ),
+            
+            html.Hr(className="my-4"),
+            
             html.H5("Generate Salary Report (Procedure)"),
             html.P("Click to run the 'GenerateSalaryReport' procedure and display the results.", className="text-secondary"),
             dbc.Button("Run Salary Report", id="analytics-run-report-btn", color="info"),
@@ -180,6 +234,11 @@ def analytics_page():
             html.P("Database Analytics Dashboard (Fulfills Rubric)", className="text-secondary mb-0 mt-2")
         ], className="dashboard-header mb-4 fade-in"),
         
+        dcc.Store(id="analytics-snapshot-versions", data=snapshot_scheduler.versions()),
+        dcc.Interval(id="analytics-snapshot-interval", interval=10 * 1000, n_intervals=0),
+        
+        overview_card,
+        
         dbc.Row([
             dbc.Col([
                 aggregate_query_card,
@@ -190,4 +249,25 @@ def analytics_page():
                 procedure_card,
             ], lg=6),
         ])
-    ], fluid=True, className="dashboard-container")
\ No newline at end of file
+    ], fluid=True, className="dashboard-container")
+
+
+def create_overview(mission_stats, satellite_stats):
+    """Stat tiles from the mission and satellite snapshots"""
+    missions = (mission_stats or {}).get('data') or {}
+    satellites = (satellite_stats or {}).get('data') or {}
+    tiles = [
+        ("Missions", missions.get('total', 0)),
+        ("Completed", missions.get('completed', 0)),
+        ("In Progress", missions.get('in_progress', 0)),
+        ("Mission Budget", f"${float(missions.get('total_budget', 0) or 0):,.0f}"),
+        ("Satellites", satellites.get('total', 0)),
+        ("Operational", satellites.get('operational', 0)),
+    ]
+    return dbc.Row([
+        dbc.Col([
+            html.Small(label, className="text-secondary d-block"),
+            html.H5(str(value), className="mb-0", style={"color": "#e5e7eb"}),
+        ], width=6, md=2, className="mb-2")
+        for label, value in tiles
+    ])
@@ -64,14 +64,84 @@ def employees_page():
     except Exception:
         salary_chart = dbc.Alert("Salary analysis requires plotly", color="warning")
 
+    org_chart = dbc.Card([
+        dbc.CardHeader([
+            html.I(className="fas fa-sitemap me-2"), "Org Chart",
+            dbc.Button("Collapse All", id="org-chart-reset", size="sm", color="secondary",
+                       outline=True, className="float-end"),
+        ], className="mb-0"),
+        dbc.CardBody([
+            html.P("Click an employee to expand or collapse their reports.", className="text-secondary"),
+            dcc.Store(id="org-chart-expanded", data={'expanded': [], 'collapsed': []}),
+            dcc.Loading(dcc.Graph(id="org-chart-graph", figure=create_org_chart(db.get_org_tree()),
+                                  config={'displayModeBar': False})),
+        ])
+    ], className="mb-4 glass-card")
+
     return dbc.Container([
         html.H2("👨‍🚀 Employees", className="mb-4 page-title"),
         dbc.Card([
             dbc.CardHeader([html.I(className="fas fa-users me-2"), "Employee Directory"], className="mb-0"),
             dbc.CardBody(table, className="p-0")
         ], className="mb-4 glass-card"),
+        org_chart,
         dbc.Card([
             dbc.CardHeader([html.I(className="fas fa-chart-line me-2"), "Salary Analysis"], className="mb-0"),
             dbc.CardBody(salary_chart)
         ], className="glass-card")
     ], fluid=True, className="dashboard-container")
+
+
+def create_org_chart(tree):
+    """Org chart figure from a Database.get_org_tree result"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    nodes = (tree or {}).get('nodes', [])
+    positions = {n['emp_id']: (n['x'], n['y']) for n in nodes}
+
+    edge_x, edge_y = [], []
+    for supervisor_id, emp_id in (tree or {}).get('edges', []):
+        x0, y0 = positions[supervisor_id]
+        x1, y1 = positions[emp_id]
+        edge_x += [x0, x0, x1, x1, None]
+        edge_y += [y0, (y0 + y1) / 2, (y0 + y1) / 2, y1, None]
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y, mode='lines', hoverinfo='skip',
+                             line=dict(color='rgba(255,255,255,0.25)', width=1)))
+
+    # Collapsed nodes that still have reports are drawn as squares
+    fig.add_trace(go.Scatter(
+        x=[n['x'] for n in nodes],
+        y=[n['y'] for n in nodes],
+        mode='markers+text',
+        text=[n['emp_name'] for n in nodes],
+        textposition='bottom center',
+        customdata=[[n['emp_id'], n['expanded']] for n in nodes],
+        hovertext=[f"{n['emp_name']}<br>{n.get('position') or ''}<br>"
+                   f"{n['direct_subordinates']} direct / {n['total_subordinates']} total reports"
+                   for n in nodes],
+        hoverinfo='text',
+        marker=dict(
+            size=14,
+            symbol=['square' if n['direct_subordinates'] and not n['expanded'] else 'circle' for n in nodes],
+            color=['#06b6d4' if n['direct_subordinates'] else '#6366f1' for n in nodes],
+            line=dict(color='rgba(255,255,255,0.6)', width=1)
+        ),
+    ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e5e7eb', size=10),
+        showlegend=False,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False),
+        margin=dict(t=20, b=20, l=20, r=20),
+        height=500,
+        dragmode='pan'
+    )
+    if tree and tree.get('truncated'):
+        fig.add_annotation(text="Showing the first nodes only — expand a subtree to see more",
+                           xref='paper', yref='paper', x=0, y=1, showarrow=False,
+                           font=dict(color='#f59e0b'))
+    return fig
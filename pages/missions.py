@@ -23,13 +23,18 @@ def missions_page(user_role=None):
             ], width=12, md=6),
             dbc.Col([
                 html.Div([
-                    dbc.Input(
+                    dcc.Input(
                         id="mission-search",
                         type="text",
                         placeholder="🔍 Search missions...",
+                        debounce=0.3,  # seconds of idle typing before the server is queried
+                        list="mission-search-suggestions",
+                        autoComplete="off",
                         className="form-control mb-2",
                         style={"maxWidth": "400px", "marginLeft": "auto"}
                     ),
+                    html.Datalist(id="mission-search-suggestions"),
+                    dcc.Store(id="mission-search-suggestion-data"),
                 ], className="d-flex justify-content-end")
             ], width=12, md=6)
         ], className="align-items-center")
@@ -92,57 +97,7 @@ def missions_page(user_role=None):
     ], className="mb-4")
     
     # Mission cards grid
-    mission_cards = []
-    for i, mission in enumerate(missions[:12]):  # Show first 12
-        status = mission.get('status', 'Unknown')
-        status_colors = {
-            'Completed': '#10b981',
-            'In Progress': '#06b6d4',
-            'Planned': '#f59e0b',
-            'Cancelled': '#ef4444'
-        }
-        status_color = status_colors.get(status, '#6b7280')
-        
-        card = dbc.Col([
-            html.Div([
-                # Status badge
-                html.Div([
-                    html.Span(status, className="badge", style={
-                        "background": f"rgba{tuple(list(int(status_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + [0.2])}",
-                        "color": status_color,
-                        "border": f"1px solid {status_color}"
-                    })
-                ], className="mb-3"),
-                
-                # Mission name
-                html.H5(mission.get('mission_name', 'Unknown'), className="mb-2", style={"color": "#e5e7eb"}),
-                
-                # Details
-                html.Div([
-                    html.Div([
-                        html.I(className="fas fa-calendar me-2", style={"color": "#9ca3af"}),
-                        html.Small(str(mission.get('launch_date', 'N/A')), className="text-secondary")
-                    ], className="mb-2"),
-                    html.Div([
-                        html.I(className="fas fa-money-bill-wave me-2", style={"color": "#9ca3af"}),
-                        html.Small(f"${mission.get('budget', 0):,.0f}", className="text-secondary")
-                    ]),
-                ]),
-                
-                # Progress bar if in progress
-                html.Div([
-                    html.Hr(style={"borderColor": "rgba(255,255,255,0.1)", "margin": "1rem 0"}),
-                    html.Small("Mission Progress", className="text-muted d-block mb-1"),
-                    html.Div([
-                        html.Div(className="progress-bar", style={"width": "65%"})
-                    ], className="progress")
-                ]) if status == 'In Progress' else None,
-                
-            ], className="glass-card h-100 p-3 slide-up", style={"animationDelay": f"{i * 0.05}s"})
-        ], width=12, md=6, lg=4, className="mb-3")
-        mission_cards.append(card)
-    
-    missions_grid = dbc.Row(mission_cards)
+    missions_grid = dbc.Row(create_mission_cards(missions), id="missions-grid")
     
     # Enhanced data table
     table = dash_table.DataTable(
@@ -374,6 +329,61 @@ def missions_page(user_role=None):
     ], fluid=True)
 
 
+def create_mission_cards(missions):
+    """Build the mission card columns (first 12 missions)"""
+    mission_cards = []
+    for i, mission in enumerate(missions[:12]):  # Show first 12
+        status = mission.get('status', 'Unknown')
+        status_colors = {
+            'Completed': '#10b981',
+            'In Progress': '#06b6d4',
+            'Planned': '#f59e0b',
+            'Cancelled': '#ef4444'
+        }
+        status_color = status_colors.get(status, '#6b7280')
+        
+        card = dbc.Col([
+            html.Div([
+                # Status badge
+                html.Div([
+                    html.Span(status, className="badge", style={
+                        "background": f"rgba{tuple(list(int(status_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4)) + [0.2])}",
+                        "color": status_color,
+                        "border": f"1px solid {status_color}"
+                    })
+                ], className="mb-3"),
+                
+                # Mission name
+                html.H5(mission.get('mission_name', 'Unknown'), className="mb-2", style={"color": "#e5e7eb"}),
+                
+                # Details
+                html.Div([
+                    html.Div([
+                        html.I(className="fas fa-calendar me-2", style={"color": "#9ca3af"}),
+                        html.Small(str(mission.get('launch_date', 'N/A')), className="text-secondary")
+                    ], className="mb-2"),
+                    html.Div([
+                        html.I(className="fas fa-money-bill-wave me-2", style={"color": "#9ca3af"}),
+                        html.Small(f"${mission.get('budget', 0):,.0f}", className="text-secondary")
+                    ]),
+                ]),
+                
+                # Progress bar if in progress
+                html.Div([
+                    html.Hr(style={"borderColor": "rgba(255,255,255,0.1)", "margin": "1rem 0"}),
+                    html.Small("Mission Progress", className="text-muted d-block mb-1"),
+                    html.Div([
+                        html.Div(className="progress-bar", style={"width": "65%"})
+                    ], className="progress")
+                ]) if status == 'In Progress' else None,
+                
+            ], className="glass-card h-100 p-3 slide-up", style={"animationDelay": f"{i * 0.05}s"})
+        ], width=12, md=6, lg=4, className="mb-3")
+        mission_cards.append(card)
+    
+    return mission_cards
+
+
 def create_budget_chart(df):
     """Create enhanced budget chart with dark theme"""
     fig = go.Figure(data=[go.Bar(
@@ -4,6 +4,65 @@ import pandas as pd
 from config.database import db
 from datetime import datetime
 
+# Satellites whose ground tracks are drawn when the page opens
+GROUND_TRACK_DEFAULT_COUNT = 5
+
+def create_ground_track(tracks, current=None):
+    """World map of ground tracks plus the fleet's current positions
+
+    Args:
+        tracks: Database.get_satellite_positions result over a time window
+        current: Database.get_satellite_positions result at a single time
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for sat in (tracks or {}).get('satellites', []):
+        lats, lons = [], []
+        for i, (lat, lon) in enumerate(zip(sat['lat'], sat['lon'])):
+            # Break the line where the track wraps around the antimeridian
+            if i and abs(lon - sat['lon'][i - 1]) > 180:
+                lats.append(None)
+                lons.append(None)
+            lats.append(lat)
+            lons.append(lon)
+        fig.add_trace(go.Scattergeo(
+            lat=lats, lon=lons, mode='lines', name=sat['sat_name'] or f"#{sat['sat_id']}",
+            line=dict(width=1.5), hoverinfo='name'
+        ))
+
+    fleet = (current or {}).get('satellites', [])
+    if fleet:
+        fig.add_trace(go.Scattergeo(
+            lat=[sat['lat'][0] for sat in fleet],
+            lon=[sat['lon'][0] for sat in fleet],
+            mode='markers',
+            name='Now',
+            marker=dict(size=7, color='#06b6d4', line=dict(color='white', width=1)),
+            hovertext=[f"{sat['sat_name']}<br>{sat['alt_km'][0]:,.0f} km · {sat['speed_km_s'][0]:.2f} km/s"
+                       for sat in fleet],
+            hoverinfo='text'
+        ))
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e5e7eb'),
+        margin=dict(t=10, b=10, l=10, r=10),
+        height=450,
+        legend=dict(orientation='h', y=-0.05),
+        geo=dict(
+            projection_type='equirectangular',
+            showland=True, landcolor='rgba(99,102,241,0.15)',
+            showocean=True, oceancolor='rgba(0,0,0,0.2)',
+            showcountries=True, countrycolor='rgba(255,255,255,0.15)',
+            coastlinecolor='rgba(255,255,255,0.3)',
+            bgcolor='rgba(0,0,0,0)',
+            lataxis=dict(range=[-90, 90]),
+            lonaxis=dict(range=[-180, 180]),
+        ),
+    )
+    return fig
+
 def satellites_page(user_role=None):
     """Satellites monitoring page"""
     satellites = db.get_all_satellites()
@@ -60,6 +119,94 @@ def satellites_page(user_role=None):
         selected_rows=[]
     )
     
+    # --- GROUND TRACKS ---
+    ground_track = dbc.Card([
+        dbc.CardHeader([html.I(className="fas fa-globe-americas me-2"), "Ground Tracks"], className="mb-0"),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id='ground-track-satellites',
+                    options=[{'label': s.get('sat_name') or f"#{s['sat_id']}", 'value': s['sat_id']} for s in satellites],
+                    value=[s['sat_id'] for s in satellites[:GROUND_TRACK_DEFAULT_COUNT]],
+                    multi=True,
+                    placeholder="Satellites to trace"
+                ), md=9),
+                dbc.Col(dbc.Select(
+                    id='ground-track-hours',
+                    options=[
+                        {"label": "Next 90 minutes", "value": "1.5"},
+                        {"label": "Next 6 hours", "value": "6"},
+                        {"label": "Next 24 hours", "value": "24"},
+                    ],
+                    value="1.5"
+                ), md=3),
+            ], className="mb-3"),
+            dcc.Interval(id='ground-track-interval', interval=60 * 1000),
+            dcc.Loading(dcc.Graph(id='ground-track-graph', config={'displayModeBar': False})),
+        ])
+    ], className="glass-card")
+
+    # --- PASS SCHEDULE ---
+    locations = [loc for loc in db.get_all_locations() or []
+                 if loc.get('latitude') is not None and loc.get('longitude') is not None]
+    pass_schedule = dbc.Card([
+        dbc.CardHeader([html.I(className="fas fa-broadcast-tower me-2"), "Pass Schedule (UTC)"], className="mb-0"),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id='pass-location',
+                    options=[{'label': f"{loc.get('location_name')} ({loc.get('country') or '—'})", 'value': loc['loc_id']}
+                             for loc in locations],
+                    value=locations[0]['loc_id'] if locations else None,
+                    placeholder="Ground location"
+                ), md=5),
+                dbc.Col(dcc.DatePickerSingle(
+                    id='pass-date',
+                    date=datetime.utcnow().date(),
+                    display_format='YYYY-MM-DD'
+                ), md=4),
+                dbc.Col(dbc.InputGroup([
+                    dbc.InputGroupText("Min elevation °"),
+                    dbc.Input(id='pass-min-elevation', type="number", value=10, min=0, max=89, debounce=True),
+                ]), md=3),
+            ], className="mb-3"),
+            html.Div(id='pass-schedule-feedback'),
+            dcc.Loading(dash_table.DataTable(
+                id='pass-schedule-table',
+                columns=[
+                    {"name": "Satellite", "id": "sat_name"},
+                    {"name": "Rise", "id": "rise"},
+                    {"name": "Culmination", "id": "culmination"},
+                    {"name": "Set", "id": "set"},
+                    {"name": "Max Elevation (°)", "id": "max_elevation", "type": "numeric"},
+                    {"name": "Duration (min)", "id": "duration_min", "type": "numeric"},
+                    {"name": "Note", "id": "note"},
+                ],
+                data=[],
+                page_size=15,
+                sort_action='native',
+                filter_action='native',
+                style_table={'overflowX': 'auto', 'background': 'transparent'},
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '10px',
+                    'backgroundColor': 'rgba(0, 0, 0, 0.2)',
+                    'color': '#e5e7eb',
+                    'border': '1px solid rgba(255, 255, 255, 0.1)',
+                    'fontFamily': 'Inter, sans-serif'
+                },
+                style_header={
+                    'backgroundColor': 'rgba(99, 102, 241, 0.2)',
+                    'fontWeight': '700',
+                    'color': '#06b6d4',
+                    'textTransform': 'uppercase',
+                    'fontSize': '0.875rem',
+                    'border': '1px solid rgba(99, 102, 241, 0.3)'
+                },
+            )),
+        ])
+    ], className="glass-card mt-4")
+
     # --- MODALS AND CONTROLS FOR ADMIN ---
     admin_controls = []
     if is_admin:
@@ -154,5 +301,8 @@ def satellites_page(user_role=None):
         dbc.Card([
             dbc.CardHeader([html.I(className="fas fa-satellite me-2"), "Satellite Fleet"], className="mb-0"),
             dbc.CardBody(table, className="p-0")
-        ], className="glass-card")
+        ], className="glass-card mb-4"),
+
+        ground_track,
+        pass_schedule
     ], fluid=True, className="dashboard-container")
\ No newline at end of file
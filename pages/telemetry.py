@@ -3,6 +3,19 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 from config.database import db
 
+# Rows shown in the alerts and recent telemetry tables
+ALERTS_SHOWN = 100
+RECENT_TELEMETRY_SHOWN = 50
+
+def alert_rule_rows(rules):
+    """Alert rule rows for the rules table"""
+    return [{**rule, 'enabled': 'Yes' if rule.get('enabled', True) else 'No'} for rule in rules]
+
+def alert_rule_options(rules):
+    """Dropdown options for choosing an alert rule"""
+    return [{'label': f"#{rule['rule_id']} {rule.get('name') or rule.get('expression')}", 'value': rule['rule_id']}
+            for rule in rules]
+
 def telemetry_page():
     """Real-time telemetry monitoring - ADMIN ONLY"""
     telemetry = db.get_all_telemetry()
@@ -15,6 +28,92 @@ def telemetry_page():
     
     df = pd.DataFrame(telemetry)
     
+    style_cell = {
+        'textAlign': 'left',
+        'padding': '12px',
+        'backgroundColor': 'rgba(0, 0, 0, 0.2)',
+        'color': '#e5e7eb',
+        'border': '1px solid rgba(255, 255, 255, 0.1)',
+        'fontFamily': 'Inter, sans-serif'
+    }
+    style_header = {
+        'backgroundColor': 'rgba(99, 102, 241, 0.2)',
+        'fontWeight': '700',
+        'color': '#06b6d4',
+        'textTransform': 'uppercase',
+        'fontSize': '0.875rem',
+        'letterSpacing': '0.05em',
+        'border': '1px solid rgba(99, 102, 241, 0.3)'
+    }
+
+    alerts = db.get_telemetry_alerts(limit=ALERTS_SHOWN)
+    alerts_table = dash_table.DataTable(
+        id='telemetry-alerts-table',
+        columns=[
+            {"name": "Satellite ID", "id": "sat_id"},
+            {"name": "Timestamp", "id": "timestamp"},
+            {"name": "Data Type", "id": "data_type"},
+            {"name": "Value", "id": "value", "type": "numeric"},
+            {"name": "Rule", "id": "kind"},
+            {"name": "Severity", "id": "severity"},
+            {"name": "Details", "id": "message"},
+        ],
+        data=alerts,
+        style_table={'overflowX': 'auto', 'background': 'transparent'},
+        style_cell=style_cell,
+        style_header=style_header,
+        style_data_conditional=[
+            {'if': {'filter_query': '{kind} = "limit" || {kind} = "status"'}, 'color': '#f87171'},
+            {'if': {'filter_query': '{kind} = "zscore" || {severity} = "warning"'}, 'color': '#fbbf24'},
+            {'if': {'filter_query': '{severity} = "critical"'}, 'color': '#f87171'},
+            {'if': {'filter_query': '!({resolved_at} is blank)'}, 'opacity': 0.6},
+        ],
+        page_size=10,
+        sort_action='native'
+    )
+
+    rules = db.get_alert_rules() or []
+    rules_card = dbc.Card([
+        dbc.CardHeader([html.I(className="fas fa-sliders-h me-2"), "Alert Rules"], className="mb-0"),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col(dbc.Input(id='alert-rule-expression',
+                                  placeholder="battery_voltage < 24 for 30s on sat_id in {1, 2}"), md=5),
+                dbc.Col(dbc.Input(id='alert-rule-name', placeholder="Name (optional)"), md=3),
+                dbc.Col(dbc.Select(
+                    id='alert-rule-severity',
+                    options=[{'label': s.title(), 'value': s} for s in ('info', 'warning', 'critical')],
+                    value='warning'
+                ), md=2),
+                dbc.Col(dbc.Button("Add Rule", id='alert-rule-add-btn', color="primary", n_clicks=0), md=2),
+            ], className="mb-3"),
+            dbc.Row([
+                dbc.Col(dcc.Dropdown(
+                    id='alert-rule-delete-select',
+                    options=alert_rule_options(rules),
+                    placeholder="Select a rule to delete"
+                ), md=10),
+                dbc.Col(dbc.Button("Delete", id='alert-rule-delete-btn', color="danger", n_clicks=0), md=2),
+            ], className="mb-3"),
+            html.Div(id='alert-rule-feedback'),
+            dash_table.DataTable(
+                id='alert-rules-table',
+                columns=[
+                    {"name": "ID", "id": "rule_id"},
+                    {"name": "Name", "id": "name"},
+                    {"name": "Rule", "id": "expression"},
+                    {"name": "Severity", "id": "severity"},
+                    {"name": "Enabled", "id": "enabled"},
+                ],
+                data=alert_rule_rows(rules),
+                style_table={'overflowX': 'auto', 'background': 'transparent'},
+                style_cell=style_cell,
+                style_header=style_header,
+                page_size=10
+            ),
+        ])
+    ], className="glass-card mb-4")
+
     table = dash_table.DataTable(
         id='telemetry-table',
         columns=[
@@ -25,25 +124,10 @@ def telemetry_page():
             {"name": "Unit", "id": "unit"},
             {"name": "Status", "id": "status"},
         ],
-        data=df.head(50).to_dict('records'),
+        data=df.head(RECENT_TELEMETRY_SHOWN).to_dict('records'),
         style_table={'overflowX': 'auto', 'background': 'transparent'},
-        style_cell={
-            'textAlign': 'left',
-            'padding': '12px',
-            'backgroundColor': 'rgba(0, 0, 0, 0.2)',
-            'color': '#e5e7eb',
-            'border': '1px solid rgba(255, 255, 255, 0.1)',
-            'fontFamily': 'Inter, sans-serif'
-        },
-        style_header={
-            'backgroundColor': 'rgba(99, 102, 241, 0.2)',
-            'fontWeight': '700',
-            'color': '#06b6d4',
-            'textTransform': 'uppercase',
-            'fontSize': '0.875rem',
-            'letterSpacing': '0.05em',
-            'border': '1px solid rgba(99, 102, 241, 0.3)'
-        },
+        style_cell=style_cell,
+        style_header=style_header,
         page_size=15,
         sort_action='native',
         filter_action='native'
@@ -51,6 +135,15 @@ def telemetry_page():
     
     return dbc.Container([
         html.H2("📡 Telemetry Data", className="mb-4 page-title"),
+        dbc.Card([
+            dbc.CardHeader([
+                html.I(className="fas fa-exclamation-triangle me-2"), "Anomaly Alerts",
+                dbc.Badge(str(len(alerts)), id='telemetry-alert-count',
+                          color="danger" if alerts else "secondary", className="ms-2")
+            ], className="mb-0"),
+            dbc.CardBody(alerts_table, className="p-0")
+        ], className="glass-card mb-4"),
+        rules_card,
         dbc.Card([
             dbc.CardHeader([html.I(className="fas fa-signal me-2"), "Recent Telemetry"], className="mb-0"),
             dbc.CardBody(table, className="p-0")
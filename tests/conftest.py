@@ -0,0 +1,235 @@
+"""
+Shared test setup: a dummy Supabase configuration, a process-local cache,
+and an in-memory stand-in for the PostgREST client that Database uses.
+"""
+import copy
+import os
+import sys
+import threading
+
+os.environ.setdefault('SUPABASE_URL', 'http://localhost:54321')
+os.environ.setdefault('SUPABASE_KEY', 'test.test.test')
+os.environ.setdefault('SESSION_SECRET', 'test-session-secret')
+os.environ['CACHE_BACKEND'] = 'memory'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from postgrest.exceptions import APIError
+
+from config.database import db
+from utils.cache import shared_cache
+
+# table -> auto-increment column filled in on insert
+SERIAL_COLUMNS = {
+    'telemetry': 'telemetry_id',
+    'telemetry_archive': 'archive_id',
+    'alert_rule': 'rule_id',
+    'employee': 'emp_id',
+    'satellite': 'sat_id',
+}
+# table -> columns that must be unique together
+UNIQUE_KEYS = {
+    'research_fact': ('user_id', 'fact_id'),
+    'telemetry': ('telemetry_id',),
+    'employee': ('emp_id',),
+    'satellite': ('sat_id',),
+}
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """The subset of the postgrest-py request builder Database uses"""
+
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.action = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.orders = []
+        self.limit_count = None
+        self.row_range = None
+
+    def select(self, *columns):
+        self.columns = ','.join(columns) or '*'
+        return self
+
+    def insert(self, payload):
+        self.action, self.payload = 'insert', payload
+        return self
+
+    def upsert(self, payload, on_conflict=''):
+        self.action, self.payload, self.on_conflict = 'upsert', payload, on_conflict
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = 'update', payload
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def _compare(self, column, test):
+        self.filters.append(lambda row: row.get(column) is not None and test(row[column]))
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        return self._compare(column, lambda v: v > value)
+
+    def gte(self, column, value):
+        return self._compare(column, lambda v: v >= value)
+
+    def lt(self, column, value):
+        return self._compare(column, lambda v: v < value)
+
+    def lte(self, column, value):
+        return self._compare(column, lambda v: v <= value)
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    def execute(self):
+        if '(' in self.columns and self.table not in self.store.embeddable:
+            raise APIError({'code': 'PGRST200', 'message': 'Could not find a relationship'})
+        with self.store.lock:
+            self.store.requests.append((self.table, self.action))
+            return FakeResponse(copy.deepcopy(getattr(self, f'_{self.action}')()))
+
+    def _matching(self):
+        return [row for row in self.store.tables.setdefault(self.table, [])
+                if all(f(row) for f in self.filters)]
+
+    def _select(self):
+        rows = self._matching()
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        if self.row_range:
+            rows = rows[self.row_range[0]:self.row_range[1] + 1]
+        if self.limit_count is not None:
+            rows = rows[:self.limit_count]
+        if self.columns != '*':
+            wanted = [c.strip() for c in self.columns.split(',')]
+            rows = [{c: r.get(c) for c in wanted} for r in rows]
+        return rows
+
+    def _insert(self):
+        rows = self.store.prepare(self.table, self.payload)
+        self.store.tables.setdefault(self.table, []).extend(rows)
+        return rows
+
+    def _upsert(self):
+        key = tuple(c for c in (self.on_conflict or '').split(',') if c) or UNIQUE_KEYS.get(self.table)
+        table = self.store.tables.setdefault(self.table, [])
+        written = []
+        for row in self.payload if isinstance(self.payload, list) else [self.payload]:
+            existing = next((r for r in table if key and all(r.get(k) == row.get(k) for k in key)), None)
+            if existing is not None:
+                existing.update(row)
+                written.append(existing)
+            else:
+                written += self._insert_one(row)
+        return written
+
+    def _insert_one(self, row):
+        rows = self.store.prepare(self.table, row)
+        self.store.tables[self.table].extend(rows)
+        return rows
+
+    def _update(self):
+        rows = self._matching()
+        for row in rows:
+            row.update(self.payload)
+        return rows
+
+    def _delete(self):
+        rows = self._matching()
+        self.store.tables[self.table] = [r for r in self.store.tables[self.table] if r not in rows]
+        return rows
+
+
+class FakeRPC:
+    def __init__(self, handler, params):
+        self.handler = handler
+        self.params = params
+
+    def execute(self):
+        return FakeResponse(self.handler(self.params))
+
+
+class FakeSupabase:
+    """In-memory tables behind the client interface Database calls"""
+
+    def __init__(self):
+        self.tables = {}
+        self.rpcs = {}  # name -> handler(params) returning response data
+        self.embeddable = set()
+        self.requests = []
+        self.lock = threading.RLock()
+        self._serial = {}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        handler = self.rpcs.get(name)
+        if handler is None:
+            raise APIError({'code': 'PGRST202', 'message': f'Could not find the function public.{name}'})
+        return FakeRPC(handler, params)
+
+    def prepare(self, table, payload):
+        """Copies of rows to insert, with serial ids filled and unique keys checked"""
+        rows = [dict(r) for r in (payload if isinstance(payload, list) else [payload])]
+        serial = SERIAL_COLUMNS.get(table)
+        existing = self.tables.setdefault(table, [])
+        for row in rows:
+            if serial and row.get(serial) is None:
+                row[serial] = self._serial[table] = max(
+                    [self._serial.get(table, 0)] + [r.get(serial) or 0 for r in existing]) + 1
+        key = UNIQUE_KEYS.get(table)
+        if key:
+            seen = {tuple(r.get(k) for k in key) for r in existing}
+            for row in rows:
+                value = tuple(row.get(k) for k in key)
+                if value in seen:
+                    raise APIError({'code': '23505', 'message': f'duplicate key value {value}'})
+                seen.add(value)
+        return rows
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """Point the global Database at empty in-memory tables"""
+    store = FakeSupabase()
+    for attribute in ('client', 'admin', 'admin_raw_client'):
+        monkeypatch.setattr(db, attribute, store)
+    for flag in ('_embed_fact_users', '_fact_rpc_available', '_analytics_rpc_available'):
+        monkeypatch.setattr(db, flag, True)
+    monkeypatch.setattr(db, '_fact_id_hints', {})
+    shared_cache.backend.clear()
+    yield store
+    shared_cache.backend.clear()
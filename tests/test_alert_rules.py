@@ -0,0 +1,55 @@
+"""Alert rules: firing once per episode and reloading without stalling evaluation"""
+import threading
+
+from config.database import db
+from utils.alert_rules import AlertRuleEngine
+from utils.anomaly import AnomalyDetector
+
+
+def _rule(rule_id, expression):
+    return {'rule_id': rule_id, 'name': f'Rule {rule_id}', 'expression': expression,
+            'severity': 'warning', 'enabled': True}
+
+
+def _temperature(telemetry_id, value):
+    return {'telemetry_id': telemetry_id, 'sat_id': 1, 'temperature': value,
+            'timestamp': f'2025-01-01T00:00:{telemetry_id:02d}+00:00'}
+
+
+def test_rule_fires_once_and_resolves_in_the_shared_feed(fake_supabase):
+    fake_supabase.tables['alert_rule'] = [_rule(1, 'temperature > 50')]
+    detector = AnomalyDetector()
+    AlertRuleEngine(detector)
+
+    detector.ingest([_temperature(1, 60), _temperature(2, 70), _temperature(3, 40)])
+
+    alerts = AnomalyDetector().recent_alerts()
+    assert [(a['kind'], a['telemetry_id']) for a in alerts] == [('rule', 1)]
+    assert alerts[0]['resolved_at'] == _temperature(3, 40)['timestamp']
+
+
+def test_points_are_checked_with_the_old_rules_during_a_reload(fake_supabase, monkeypatch):
+    fake_supabase.tables['alert_rule'] = [_rule(1, 'temperature > 50')]
+    engine = AlertRuleEngine(AnomalyDetector())
+    engine.ensure_fresh()
+
+    fetching, release = threading.Event(), threading.Event()
+    fetch = db.get_alert_rules
+
+    def slow_fetch():
+        fetching.set()
+        release.wait(5)
+        return fetch()
+
+    monkeypatch.setattr(db, 'get_alert_rules', slow_fetch)
+    db.add_alert_rule(_rule(2, 'temperature > 0'))
+    reloader = threading.Thread(target=engine.ensure_fresh)
+    reloader.start()
+    assert fetching.wait(5)
+
+    fired = engine.evaluate([_temperature(1, 60)])
+    release.set()
+    reloader.join(5)
+
+    assert [a['rule_id'] for a in fired] == [1]
+    assert set(engine.rules) == {1, 2}
@@ -0,0 +1,52 @@
+"""Telemetry anomaly detection: id-ordered ingestion and the shared alert feed"""
+from config.database import db
+from utils.anomaly import AnomalyDetector
+
+
+def _reading(telemetry_id=None, battery_level=50.0):
+    row = {'sat_id': 1, 'battery_level': battery_level, 'timestamp': '2025-01-01T00:00:00+00:00'}
+    if telemetry_id is not None:
+        row['telemetry_id'] = telemetry_id
+    return row
+
+
+def _alerted_ids(detector):
+    return sorted(a['telemetry_id'] for a in detector.recent_alerts())
+
+
+def test_local_write_does_not_skip_another_workers_lower_id(fake_supabase):
+    fake_supabase.tables['telemetry'] = [_reading(1)]
+    detector = AnomalyDetector()
+    detector.poll()
+
+    # Another worker commits id 2 (no notification here), then this worker writes id 3
+    fake_supabase.tables['telemetry'].append(_reading(2, battery_level=5.0))
+    db.add_telemetry([_reading()])
+
+    assert detector.last_id == 3 and detector.processed == 3
+    assert _alerted_ids(detector) == [2]
+
+
+def test_rows_committed_after_a_higher_id_are_analysed_late(fake_supabase):
+    fake_supabase.tables['telemetry'] = [_reading(1), _reading(3)]
+    detector = AnomalyDetector()
+    detector.poll()
+    assert 2 in detector.gaps
+
+    fake_supabase.tables['telemetry'].append(_reading(2, battery_level=5.0))
+    detector.poll()
+
+    assert detector.processed == 3 and not detector.gaps
+    assert _alerted_ids(detector) == [2]
+
+
+def test_workers_share_one_alert_per_reading(fake_supabase):
+    fake_supabase.tables['telemetry'] = [_reading(1, battery_level=5.0), _reading(2, battery_level=150.0)]
+    first, second = AnomalyDetector(), AnomalyDetector()
+    first.poll()
+    second.poll()
+
+    alerts = second.recent_alerts()
+    assert [a['telemetry_id'] for a in alerts] == [2, 1]
+    assert alerts == first.recent_alerts()
+    assert [a['alert_id'] for a in first.recent_alerts(since_id=alerts[1]['alert_id'])] == [alerts[0]['alert_id']]
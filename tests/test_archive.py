@@ -0,0 +1,118 @@
+"""Telemetry archive: Gorilla block round trips and resumable archiving"""
+import asyncio
+import math
+
+import numpy as np
+import pytest
+
+import utils.archive
+from config.database import db
+from utils.archive import TelemetryArchive, decode_block, encode_block
+
+
+@pytest.mark.parametrize('times, values', [
+    ([1_700_000_000_000], [21.5]),
+    (list(range(0, 60_000, 1000)), [3.3] * 60),
+    ([0, 1000, 2003, 2990, 4100, 4100, 10**9, 10**9 + 1, 5 * 10**12],
+     [0.0, -0.0, 1e-300, -1e300, math.inf, -math.inf, math.nan, 7.25, 7.250000000000001]),
+])
+def test_blocks_round_trip_bit_for_bit(times, values):
+    decoded_times, decoded_values = decode_block(encode_block(times, values))
+
+    assert decoded_times.tolist() == times
+    assert decoded_values.view(np.uint64).tolist() == np.array(values, dtype=np.float64).view(np.uint64).tolist()
+
+
+def test_random_walks_round_trip():
+    rng = np.random.default_rng(7)
+    times = np.cumsum(rng.integers(900, 1100, 5000)).tolist()
+    values = np.cumsum(rng.normal(0, 0.1, 5000))
+
+    decoded_times, decoded_values = decode_block(encode_block(times, values))
+
+    assert decoded_times.tolist() == times
+    assert np.array_equal(decoded_values, values)
+
+
+def _reading(telemetry_id, data_type):
+    return {'telemetry_id': telemetry_id, 'sat_id': 1, 'data_type': data_type, 'value': telemetry_id * 0.5,
+            'timestamp': f'2025-01-01T00:{telemetry_id // 60:02d}:{telemetry_id % 60:02d}+00:00'}
+
+
+@pytest.fixture
+def telemetry(fake_supabase, monkeypatch):
+    monkeypatch.setattr(utils.archive, 'ARCHIVE_READ_CHUNK', 4)
+    fake_supabase.tables['telemetry'] = [_reading(n, 'temperature' if n % 2 else 'battery_level')
+                                         for n in range(1, 21)]
+    return fake_supabase
+
+
+def _archived_ids(data_type):
+    _, values = db.read_telemetry_archive(1, data_type)
+    return sorted(int(v * 2) for v in values)
+
+
+def test_archiving_again_stores_nothing_twice(telemetry):
+    archive = TelemetryArchive(block_points=3)
+
+    first = archive.archive('2025-02-01T00:00:00Z')
+    second = archive.archive('2025-02-01T00:00:00Z')
+
+    assert first['points'] == 20 and second['points'] == 0 and second['skipped'] == 20
+    assert len(telemetry.tables['telemetry_archive']) == first['blocks'] == 8
+    assert _archived_ids('temperature') == list(range(1, 21, 2))
+    assert len(telemetry.tables['telemetry']) == 20
+
+
+def test_failed_blocks_keep_their_rows_and_are_retried(telemetry, monkeypatch):
+    archive = TelemetryArchive(block_points=3)
+    store = db.add_archive_blocks
+
+    def temperature_unavailable(blocks):
+        results = store([b for b in blocks if b['data_type'] != 'temperature'])
+        stored = iter(results)
+        return [{'success': False, 'error': 'unavailable'} if b['data_type'] == 'temperature' else next(stored)
+                for b in blocks]
+
+    monkeypatch.setattr(db, 'add_archive_blocks', temperature_unavailable)
+    stats = archive.archive('2025-02-01T00:00:00Z', delete_raw=True)
+
+    assert stats['failed_blocks'] == 1 and stats['deleted'] == 10
+    assert {r['data_type'] for r in telemetry.tables['telemetry']} == {'temperature'}
+
+    monkeypatch.setattr(db, 'add_archive_blocks', store)
+    stats = archive.archive('2025-02-01T00:00:00Z', delete_raw=True)
+
+    assert stats['failed_blocks'] == 0 and stats['deleted'] == 10
+    assert telemetry.tables['telemetry'] == []
+    assert _archived_ids('temperature') == list(range(1, 21, 2))
+    assert _archived_ids('battery_level') == list(range(2, 21, 2))
+
+
+def test_archive_endpoint_runs_off_the_event_loop(telemetry, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import app, require_admin
+
+    reads_on_loop = []
+    read = db.get_telemetry_before
+
+    def recording_read(*args):
+        try:
+            asyncio.get_running_loop()
+            reads_on_loop.append(True)
+        except RuntimeError:
+            pass
+        return read(*args)
+
+    monkeypatch.setattr(db, 'get_telemetry_before', recording_read)
+    app.dependency_overrides[require_admin] = lambda: {'user_id': 'u1', 'role': 'admin'}
+    try:
+        client = TestClient(app)
+        assert client.post('/api/telemetry/archive', params={'before': 'yesterday'}).status_code == 400
+        stats = client.post('/api/telemetry/archive', params={'before': '2025-02-01T00:00:00Z'}).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert stats['points'] == 20
+    assert not reads_on_loop
@@ -0,0 +1,45 @@
+"""Role claims: granted by the user table, never by editable user metadata"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.auth
+from backend.api import get_current_claims
+from utils.auth import role_cache
+
+USER_ID = '00000000-0000-0000-0000-000000000002'
+
+
+@pytest.fixture
+def users(fake_supabase, monkeypatch):
+    monkeypatch.setattr(utils.auth, 'supabase', fake_supabase)
+    fake_supabase.tables['user'] = []
+    return fake_supabase.tables['user']
+
+
+def _claims_for(metadata_role):
+    user = SimpleNamespace(id=USER_ID, email='crew@example.com', user_metadata={'role': metadata_role})
+    return asyncio.run(get_current_claims(SimpleNamespace(user=user)))
+
+
+def test_metadata_role_does_not_grant_admin(users):
+    assert _claims_for('admin')['role'] == 'user'
+
+    role_cache.invalidate(USER_ID)
+    users.append({'user_id': USER_ID, 'role': 'Admin', 'email': 'crew@example.com', 'username': 'crew'})
+    assert _claims_for('user')['role'] == 'admin'
+
+
+def test_failed_role_read_falls_back_to_user_uncached(users, fake_supabase, monkeypatch):
+    users.append({'user_id': USER_ID, 'role': 'admin'})
+    table = fake_supabase.table
+
+    def unavailable(name):
+        raise ConnectionError('database unavailable')
+
+    monkeypatch.setattr(fake_supabase, 'table', unavailable)
+    assert _claims_for('admin')['role'] == 'user'
+
+    monkeypatch.setattr(fake_supabase, 'table', table)
+    assert _claims_for('user')['role'] == 'admin'
@@ -0,0 +1,93 @@
+"""Bulk writes: chunking, per-row results and the bulk API endpoints"""
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.api
+import config.database
+from backend.api import app, require_admin, verify_token
+from config.database import db
+
+ADMIN = {'user_id': '00000000-0000-0000-0000-000000000001', 'role': 'admin'}
+
+
+def _employee(emp_id=None, name='Ada', **extra):
+    row = {'emp_name': name, 'position': 'Engineer', 'salary': 1000.0, 'hire_date': '2020-01-01', **extra}
+    if emp_id is not None:
+        row['emp_id'] = emp_id
+    return row
+
+
+@pytest.fixture
+def chunked(fake_supabase, monkeypatch):
+    monkeypatch.setattr(config.database, 'BULK_CHUNK_SIZE', 3)
+    return fake_supabase
+
+
+def test_rows_are_written_in_chunks_with_a_result_each(chunked):
+    results = db.add_employees([_employee(name=f'E{n}') for n in range(7)])
+
+    assert chunked.requests.count(('employee', 'insert')) == 3  # 3 + 3 + 1
+    assert [r['index'] for r in results] == list(range(7))
+    assert all(r['success'] for r in results)
+    assert [r['data']['emp_name'] for r in results] == [f'E{n}' for n in range(7)]
+
+
+def test_a_rejected_chunk_is_retried_row_by_row(chunked):
+    chunked.tables['employee'] = [_employee(4, 'Existing')]
+
+    results = db.add_employees([_employee(n, f'E{n}') for n in range(1, 8)])
+
+    # Chunk 1-3 and chunk 7 succeed at once; chunk 4-6 fails and is retried per row
+    assert chunked.requests.count(('employee', 'insert')) == 1 + 1 + 3 + 1
+    assert [r['success'] for r in results] == [True, True, True, False, True, True, True]
+    assert 'duplicate' in results[3]['error']
+    assert sorted(r['emp_id'] for r in chunked.tables['employee']) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_rows_with_different_columns_keep_their_input_order(chunked):
+    rows = [_employee(name='A'), _employee(name='B', phone='555'), _employee(name='C')]
+
+    results = db.add_employees(rows)
+
+    assert [r['data']['emp_name'] for r in results] == ['A', 'B', 'C']
+    assert chunked.requests.count(('employee', 'insert')) == 2
+
+
+def test_deletes_report_missing_keys_per_chunk(chunked):
+    chunked.tables['employee'] = [_employee(n) for n in (1, 2, 3, 5)]
+
+    results = db.delete_employees([1, 2, 3, 4, 5])
+
+    assert chunked.requests.count(('employee', 'delete')) == 2
+    assert [r['success'] for r in results] == [True, True, True, False, True]
+    assert results[3]['error'] == 'Not found'
+    assert chunked.tables['employee'] == []
+
+
+@pytest.fixture
+def client(chunked):
+    app.dependency_overrides[verify_token] = lambda: ADMIN
+    app.dependency_overrides[require_admin] = lambda: ADMIN
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_bulk_endpoint_summarises_results(client, fake_supabase):
+    fake_supabase.tables['employee'] = [_employee(2)]
+    rows = [_employee(n, f'E{n}') for n in range(1, 5)]
+
+    summary = client.post('/api/employees/bulk', json={'operation': 'insert', 'rows': rows}).json()
+
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (4, 3, 1)
+    assert summary['results'][1]['success'] is False
+
+    upserted = client.post('/api/employees/bulk', json={'operation': 'upsert', 'rows': [_employee(2, 'New')]})
+    assert upserted.json()['succeeded'] == 1
+    assert next(r for r in fake_supabase.tables['employee'] if r['emp_id'] == 2)['emp_name'] == 'New'
+
+
+def test_bulk_endpoint_rejects_empty_and_oversized_requests(client, monkeypatch):
+    monkeypatch.setattr(backend.api, 'BULK_MAX_ROWS', 2)
+
+    assert client.post('/api/employees/bulk', json={'operation': 'delete', 'ids': []}).status_code == 400
+    assert client.post('/api/employees/bulk', json={'operation': 'delete', 'ids': [1, 2, 3]}).status_code == 413
@@ -0,0 +1,35 @@
+"""API response compression: JSON is gzip'd, streamed exports are not"""
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import app, require_admin, verify_token
+
+ADMIN = {'user_id': '00000000-0000-0000-0000-000000000001', 'role': 'admin'}
+
+
+@pytest.fixture
+def client(fake_supabase):
+    app.dependency_overrides[verify_token] = lambda: ADMIN
+    app.dependency_overrides[require_admin] = lambda: ADMIN
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_large_json_responses_are_gzipped(client, fake_supabase):
+    fake_supabase.tables['department'] = [{'dept_id': n, 'dept_name': f'Department {n}'} for n in range(100)]
+
+    response = client.get('/api/departments', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['content-encoding'] == 'gzip'
+    assert len(response.json()) == 100
+
+
+def test_exports_are_streamed_without_recompression(client, fake_supabase):
+    fake_supabase.tables['telemetry'] = [{'telemetry_id': n, 'value': n * 1.5} for n in range(1, 500)]
+
+    response = client.get('/api/export/telemetry?format=ndjson', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'content-encoding' not in response.headers
+    assert gzip.decompress(response.content).count(b'\n') == 499
@@ -0,0 +1,79 @@
+"""Exports: stable paging, Parquet typing and one-time download files"""
+import asyncio
+import io
+
+import pyarrow.parquet as pq
+
+from config.database import db
+from utils.exporter import discard_export, redeem_export_link, stream_export, write_export
+
+
+def test_composite_key_pages_cover_every_row_once(fake_supabase):
+    fake_supabase.tables['mission'] = [
+        {'mission_id': m, 'pad_id': p, 'loc_id': 1} for m in (3, 1, 2) for p in (2, 1)]
+
+    pages = list(db.iter_table('mission', ('mission_id', 'pad_id', 'loc_id'), chunk_size=4))
+
+    keys = [(r['mission_id'], r['pad_id']) for page in pages for r in page]
+    assert keys == sorted(keys) and len(keys) == 6
+
+
+def test_parquet_export_keeps_later_pages_that_change_json_type(fake_supabase, monkeypatch):
+    monkeypatch.setattr('config.database.EXPORT_CHUNK_SIZE', 2)
+    fake_supabase.tables['telemetry'] = [
+        {'telemetry_id': 1, 'value': 3, 'status': None},
+        {'telemetry_id': 2, 'value': 4, 'status': None},
+        {'telemetry_id': 3, 'value': 4.5, 'status': 'ok'},
+        {'telemetry_id': 4, 'value': None, 'status': {'code': 7}},
+    ]
+
+    chunks, _, _ = stream_export('telemetry', 'parquet')
+    table = pq.read_table(io.BytesIO(b''.join(chunks)))
+
+    assert table.column('value').to_pylist() == [3.0, 4.0, 4.5, None]
+    assert table.column('status').to_pylist() == [None, None, 'ok', '{"code": 7}']
+
+
+def test_written_exports_are_single_use_files(fake_supabase, monkeypatch, tmp_path):
+    monkeypatch.setattr('utils.exporter.EXPORT_DIR', str(tmp_path))
+    fake_supabase.tables['employee'] = [{'emp_id': 1, 'emp_name': 'Ada', 'dept_id': '1'}]
+    progress = []
+
+    token = write_export('employee', 'csv', {'dept_id': '1'}, progress=progress.append)
+    export = redeem_export_link(token)
+
+    assert progress and export['mimetype'] == 'text/csv'
+    with open(export['path'], 'rb') as f:
+        assert f.read().splitlines() == [b'emp_id,emp_name,dept_id', b'1,Ada,1']
+    assert redeem_export_link(token) is None
+    discard_export(export)
+    assert not list(tmp_path.iterdir())
+
+
+def test_export_pages_are_read_off_the_event_loop(fake_supabase, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.api import app, require_admin
+
+    monkeypatch.setattr('config.database.EXPORT_CHUNK_SIZE', 2)
+    fake_supabase.tables['telemetry'] = [{'telemetry_id': n, 'value': n} for n in range(1, 6)]
+    reads_on_loop = []
+    execute = type(fake_supabase.table('telemetry')).execute
+
+    def recording_execute(query):
+        try:
+            asyncio.get_running_loop()
+            reads_on_loop.append(query.table)
+        except RuntimeError:
+            pass
+        return execute(query)
+
+    monkeypatch.setattr(type(fake_supabase.table('telemetry')), 'execute', recording_execute)
+    app.dependency_overrides[require_admin] = lambda: {'user_id': 'u1', 'role': 'admin'}
+    try:
+        response = TestClient(app).get('/api/export/telemetry', params={'format': 'csv'})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.text.count('\n') == 6
+    assert not reads_on_loop
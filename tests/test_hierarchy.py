@@ -0,0 +1,71 @@
+"""Employee hierarchy index: tour ranges, cycles and staying in step with writes"""
+from config.database import db
+from utils.cache import shared_cache
+from utils.hierarchy import EmployeeHierarchy
+
+
+def _employee(emp_id, supervisor_id=None, salary=1000, dept_id=1):
+    return {'emp_id': emp_id, 'emp_name': f'E{emp_id}', 'position': 'Engineer',
+            'supervisor_id': supervisor_id, 'salary': salary, 'dept_id': dept_id}
+
+
+def _brute_force_subordinates(rows, emp_id):
+    under = set()
+    frontier = {emp_id}
+    while frontier:
+        frontier = {r['emp_id'] for r in rows if r['supervisor_id'] in frontier} - under - {emp_id}
+        under |= frontier
+    return under
+
+
+def test_tour_ranges_match_a_brute_force_walk(fake_supabase):
+    rows = [_employee(1)] + [_employee(n, supervisor_id=n // 2, salary=n * 100) for n in range(2, 40)]
+    fake_supabase.tables['employee'] = rows
+    index = EmployeeHierarchy()
+
+    for row in rows:
+        expected = _brute_force_subordinates(rows, row['emp_id'])
+        assert set(index.subordinates(row['emp_id'])) == expected
+        salary = sum(r['salary'] for r in rows if r['emp_id'] in expected | {row['emp_id']})
+        assert index.subtree_salary(row['emp_id']) == salary
+    assert [r['emp_id'] for r in index.chain_of_command(9)] == [4, 2, 1]
+
+
+def test_only_cycle_members_are_detached(fake_supabase):
+    # 5 and 6 supervise each other; 1 reports into the cycle without being on it
+    fake_supabase.tables['employee'] = [_employee(1, 5), _employee(5, 6), _employee(6, 5)]
+    index = EmployeeHierarchy()
+    index.ensure_fresh()
+
+    assert index.roots == [5]
+    assert index.chain_of_command(1) == [index.get(5)]
+    assert index.count_subordinates(5, transitive=True) == 2
+
+
+def test_local_write_does_not_hide_another_workers_write(fake_supabase):
+    fake_supabase.tables['employee'] = [_employee(1), _employee(2, 1)]
+    index = EmployeeHierarchy()
+    assert index.count_subordinates(1) == 1
+
+    # Another worker adds an employee (bumping the shared version) ...
+    fake_supabase.tables['employee'].append(_employee(3, 1))
+    shared_cache.bump('table:employee')
+    # ... then this worker writes before the index is read again
+    db.update_employee(2, {'salary': 2000})
+
+    assert index.count_subordinates(1) == 2
+    assert index.subtree_salary(1) == 4000
+
+
+def test_local_writes_are_applied_without_a_reload(fake_supabase):
+    fake_supabase.tables['employee'] = [_employee(1), _employee(2, 1)]
+    index = EmployeeHierarchy()
+    index.ensure_fresh()
+    reads = fake_supabase.requests.count(('employee', 'select'))
+
+    db.update_employee(2, {'salary': 5000})
+    db.add_employee(_employee(3, 2))
+
+    assert index.subtree_salary(1) == 7000
+    assert index.is_subordinate(3, 1)
+    assert fake_supabase.requests.count(('employee', 'select')) == reads
@@ -0,0 +1,70 @@
+"""CSV/Parquet bulk import: validation, row numbering and job progress"""
+import base64
+import io
+import time
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.cache import shared_cache
+from utils.importer import get_import_job, start_import
+
+
+def _upload(raw, mime):
+    return f"data:{mime};base64,{base64.b64encode(raw).decode()}"
+
+
+def _wait(job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_import_job(job_id)
+        if job and job['status'] != 'running':
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Import job {job_id} did not finish")
+
+
+def test_csv_import_reports_errors_by_file_line(fake_supabase):
+    csv = (
+        "emp_name,position,salary,hire_date\n"
+        "Ada,Engineer,90000,2020-01-15\n"
+        "Grace,Scientist,not-a-number,2019-03-01\n"
+        "Linus,Technician,55000,2021-07-30\n"
+    ).encode()
+
+    job = _wait(start_import('employees', 'staff.csv', _upload(csv, 'text/csv')))
+
+    assert job['status'] == 'done'
+    assert (job['processed'], job['written'], job['failed']) == (3, 2, 1)
+    assert job['errors'][0]['row'] == 3  # line 3 of the file (line 1 is the header)
+    assert sorted(e['emp_name'] for e in fake_supabase.tables['employee']) == ['Ada', 'Linus']
+
+
+def test_parquet_import_converts_dates_and_numbers_rows_from_one(fake_supabase):
+    table = pa.table({
+        'emp_name': ['Ada', 'Grace'],
+        'position': ['Engineer', None],
+        'salary': [90000.0, 80000.0],
+        'hire_date': pa.array([date(2020, 1, 15), date(2019, 3, 1)], type=pa.date32()),
+    })
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+
+    job = _wait(start_import('employees', 'staff.parquet', _upload(buffer.getvalue(), 'application/octet-stream')))
+
+    assert job['total_rows'] == 2
+    assert (job['written'], job['failed']) == (1, 1)
+    assert job['errors'][0]['row'] == 2
+    assert fake_supabase.tables['employee'][0]['hire_date'] == '2020-01-15'
+
+
+def test_job_progress_lives_in_the_shared_cache(fake_supabase):
+    csv = b"emp_name,position,salary,hire_date\nAda,Engineer,90000,2020-01-15\n"
+
+    job_id = start_import('employees', 'staff.csv', _upload(csv, 'text/csv'))
+    _wait(job_id)
+
+    # What another worker would read
+    assert shared_cache.get(f"import_job:{job_id}")['written'] == 1
+    assert get_import_job('unknown') is None
@@ -0,0 +1,43 @@
+"""Fleet propagation: Kepler solver accuracy and the positions request cap"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.api
+from backend.api import app, verify_token
+from utils.orbit import _solve_kepler, fleet_propagator
+from utils.ratelimit import endpoint_class
+
+
+def test_kepler_solution_round_trips_to_the_mean_anomaly():
+    mean_anomaly = np.linspace(-np.pi, np.pi, 721, dtype=np.float32)[None, :]
+    eccentricity = np.array([0.0, 0.001, 0.1, 0.5, 0.74, 0.9, 0.99], dtype=np.float32)[:, None]
+    M = np.repeat(mean_anomaly, len(eccentricity), axis=0)
+
+    E = _solve_kepler(M, eccentricity).astype(float)
+
+    e = eccentricity.astype(float)
+    residual = E - e * np.sin(E) - M.astype(float)
+    assert np.max(np.abs(residual)) < 1e-5
+
+
+@pytest.fixture
+def client(fake_supabase):
+    fake_supabase.tables['satellite_status_report'] = [
+        {'sat_id': n, 'sat_name': f'SAT-{n}', 'orbit_type': 'LEO'} for n in range(1, 11)]
+    fleet_propagator.reload()
+    app.dependency_overrides[verify_token] = lambda: {'user_id': 'u1', 'role': 'user'}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_positions_are_capped_by_satellites_times_times(client, monkeypatch):
+    monkeypatch.setattr(backend.api, 'POSITIONS_MAX_POINTS', 100)
+    window = {'start': '2025-01-01T00:00:00Z', 'end': '2025-01-01T00:10:00Z', 'step': 60}
+
+    assert client.get('/api/satellites/positions', params=window).status_code == 413
+
+    response = client.get('/api/satellites/positions', params={**window, 'sat_ids': '1,2'})
+    assert response.status_code == 200
+    assert len(response.json()['satellites']) == 2
+    assert endpoint_class('GET', '/api/satellites/positions') == 'bulk'
@@ -0,0 +1,48 @@
+"""Pass prediction: rise/set times against a fine-grid elevation scan"""
+import numpy as np
+import pytest
+
+from utils.orbit import FleetPropagator, time_grid
+from utils.passes import PassPredictor, elevation_deg, observer_ecef, to_timestamp
+
+SITE = (40.0, -75.0)
+START, END = '2025-03-01T00:00:00Z', '2025-03-01T06:00:00Z'
+MASK = 10.0
+
+
+@pytest.fixture
+def propagator(fake_supabase):
+    fake_supabase.tables['satellite_status_report'] = [
+        {'sat_id': n, 'sat_name': f'SAT-{n}', 'orbit_type': orbit}
+        for n, orbit in enumerate(['LEO', 'LEO', 'SSO', 'SSO', 'MEO', 'HEO'], start=1)]
+    propagator = FleetPropagator()
+    propagator.reload()
+    return propagator
+
+
+def _fine_passes(propagator, sat_id):
+    """(rise, set) pairs from a 1 s scan, edges of the window excluded"""
+    times = time_grid(START, END, 1)
+    grid = propagator.propagate(times, [sat_id], frame='ecef')
+    site, up = observer_ecef(*SITE)
+    above = elevation_deg(grid['x_km'], grid['y_km'], grid['z_km'], site, up)[0] >= MASK
+    edges = np.diff(above.astype(np.int8))
+    rises = [times[k + 1] for k in np.nonzero(edges == 1)[0]]
+    sets = [times[k] for k in np.nonzero(edges == -1)[0]]
+    if sets and (not rises or sets[0] < rises[0]):
+        sets = sets[1:]  # already up at the start
+    return list(zip(rises, sets))
+
+
+def test_rise_and_set_match_a_fine_scan(propagator):
+    passes = [p for p in PassPredictor(propagator).predict(*SITE, START, END, MASK) if not p['truncated']]
+    assert passes
+
+    for sat_id in {p['sat_id'] for p in passes}:
+        predicted = [(to_timestamp(p['rise_time']), to_timestamp(p['set_time']))
+                     for p in passes if p['sat_id'] == sat_id]
+        fine = _fine_passes(propagator, sat_id)
+        assert len(predicted) == len(fine)
+        for (rise, set_), (fine_rise, fine_set) in zip(predicted, fine):
+            # Predicted times are rounded to whole seconds; the scan is at 1 s
+            assert abs(rise - fine_rise) <= 2 and abs(set_ - fine_set) <= 2
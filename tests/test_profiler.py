@@ -0,0 +1,45 @@
+"""Callback profiler: switches and counters shared by every worker"""
+import pytest
+
+import utils.profiler
+from utils.cache import shared_cache
+from utils.profiler import CallbackProfiler
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two profilers standing in for two worker processes"""
+    monkeypatch.setattr(utils.profiler, 'FLAG_REFRESH_SECONDS', 0)
+    monkeypatch.setattr(utils.profiler, 'PUBLISH_INTERVAL_SECONDS', 0)
+    shared_cache.backend.clear()
+    yield CallbackProfiler(enabled=False), CallbackProfiler(enabled=False)
+    shared_cache.backend.clear()
+
+
+def test_switch_and_counters_cover_every_worker(workers):
+    first, second = workers
+    first.set_enabled(True, sampling=True)
+    assert second.enabled and second.sampling
+
+    # Deterministic sampling: first never profiles, second always does
+    first.sample_rate = 0.0
+    second.sample_rate = 1.0
+    first.wrap('load', lambda: 'x' * 10)()
+    second.wrap('load', lambda: 'x' * 10)()
+    second.wrap('save', lambda: None)()
+
+    rows = {row['callback']: row for row in first.snapshot()}
+    assert rows['load']['calls'] == 2 and rows['save']['calls'] == 1
+    assert rows['load']['profiled_calls'] == 1
+
+
+def test_reset_clears_every_worker(workers, tmp_path):
+    first, second = workers
+    first.set_enabled(True)
+    second.wrap('load', lambda: None)()
+
+    first.reset()
+    second.wrap('save', lambda: None)()
+
+    assert [row['callback'] for row in first.snapshot()] == ['save']
+    assert first.dump(str(tmp_path))
@@ -0,0 +1,60 @@
+"""Rate limiting: token buckets, in-flight caps and the 429 response"""
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.api
+from backend.api import app, verify_token
+from utils.ratelimit import RateLimiter, TokenBucket
+
+
+def test_bucket_refills_at_its_rate_up_to_the_burst():
+    bucket = TokenBucket(rate=2, burst=4, now=0.0)
+    bucket.tokens -= 4
+
+    assert bucket.wait(1, now=0.0) == pytest.approx(0.5)
+    assert bucket.wait(3, now=1.0) == pytest.approx(0.5)  # 2 tokens back after 1 s
+    assert bucket.wait(4, now=100.0) == 0.0 and bucket.tokens == 4
+
+
+def test_a_request_the_ip_rejects_costs_the_token_nothing():
+    limiter = RateLimiter(token_rate=0, token_burst=3, ip_rate=0, ip_burst=1)
+
+    assert limiter.acquire('read', '10.0.0.1', 'abc') == 0.0
+    for _ in range(5):
+        assert limiter.acquire('read', '10.0.0.1', 'abc') > 0  # IP bucket is empty
+
+    # The token still has 2 of its 3 tokens, whichever address it comes from
+    assert limiter.acquire('read', '10.0.0.2', 'abc') == 0.0
+    assert limiter.acquire('read', '10.0.0.3', 'abc') == 0.0
+    assert limiter.acquire('read', '10.0.0.4', 'abc') > 0
+    counters = limiter.snapshot()['classes']['read']
+    assert (counters['allowed'], counters['limited_ip'], counters['limited_token']) == (3, 5, 1)
+
+
+def test_in_flight_cap_admits_again_after_release():
+    limiter = RateLimiter(classes={'read': (1, 2), 'bulk': (5, 1)})
+
+    assert limiter.acquire('read', 'ip') == 0.0
+    assert limiter.acquire('read', 'ip') == 0.0
+    assert limiter.acquire('read', 'ip') == 1.0
+    limiter.release('read')
+    assert limiter.acquire('read', 'ip') == 0.0
+    assert limiter.snapshot()['classes']['read']['rejected_in_flight'] == 1
+
+
+@pytest.fixture
+def client(fake_supabase, monkeypatch):
+    monkeypatch.setattr(backend.api, 'rate_limiter', RateLimiter(ip_rate=0.4, ip_burst=1))
+    app.dependency_overrides[verify_token] = lambda: {'user_id': 'u1', 'role': 'user'}
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_middleware_answers_429_with_retry_after(client):
+    assert client.get('/api/departments').status_code == 200
+
+    limited = client.get('/api/departments')
+
+    assert limited.status_code == 429
+    assert limited.headers['Retry-After'] == '3'  # 1 token at 0.4/s, rounded up
+    assert client.get('/health').status_code == 200
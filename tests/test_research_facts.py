@@ -0,0 +1,75 @@
+"""Research fact id allocation under concurrent submissions"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.database import db
+
+USER = '00000000-0000-0000-0000-000000000001'
+
+
+def _fact(n):
+    return {'user_id': USER, 'fact_title': f'Fact {n}', 'description': 'd', 'category': 'Physics',
+            'source': 's', 'date_added': '2025-01-01'}
+
+
+def _submit_parallel(count, workers=16):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda n: db.add_research_fact(_fact(n)), range(count)))
+
+
+def _allocating_procedure(store):
+    """add_research_fact stand-in: max(fact_id) + 1 and insert under one lock"""
+    def handler(params):
+        with store.lock:
+            rows = [r for r in store.tables.setdefault('research_fact', []) if r['user_id'] == params['user_id_param']]
+            row = {'user_id': params['user_id_param'], 'fact_id': max([r['fact_id'] for r in rows], default=0) + 1,
+                   'fact_title': params['fact_title_param']}
+            store.tables['research_fact'].append(row)
+            return [dict(row)]
+    return handler
+
+
+def test_parallel_client_side_allocation_gives_unique_ids(fake_supabase):
+    results = _submit_parallel(200)
+
+    assert all(results)
+    assert sorted(r['fact_id'] for r in results) == list(range(1, 201))
+    assert not db._fact_rpc_available  # the procedure does not exist in the fake
+
+
+def test_client_side_allocation_retries_ids_taken_by_another_worker(fake_supabase):
+    db.add_research_fact(_fact(0))  # warms the hint: next id 2
+    # Another process inserts ids this one has not seen
+    fake_supabase.tables['research_fact'] += [{'user_id': USER, 'fact_id': i} for i in (2, 3, 4)]
+
+    results = _submit_parallel(50)
+
+    assert all(results)
+    ids = [r['fact_id'] for r in fake_supabase.tables['research_fact']]
+    assert len(ids) == len(set(ids)) == 54
+
+
+def test_parallel_procedure_allocation_gives_unique_ids(fake_supabase):
+    fake_supabase.rpcs['add_research_fact'] = _allocating_procedure(fake_supabase)
+
+    results = _submit_parallel(200)
+
+    assert sorted(r['fact_id'] for r in results) == list(range(1, 201))
+    assert db._fact_rpc_available
+
+
+def test_transient_procedure_error_keeps_fast_path(fake_supabase):
+    calls = []
+
+    def flaky(params):
+        calls.append(params)
+        if len(calls) == 1:
+            raise ConnectionError('connection reset')
+        return _allocating_procedure(fake_supabase)(params)
+
+    fake_supabase.rpcs['add_research_fact'] = flaky
+
+    assert db.add_research_fact(_fact(1)) is None
+    assert db._fact_rpc_available
+    assert db.add_research_fact(_fact(2))['fact_id'] == 1
+    assert len(calls) == 2
@@ -0,0 +1,62 @@
+"""Salary aggregates and the procedure-backed salary report"""
+from config.database import db
+from utils.salary import SalaryAnalytics
+
+
+def _employee(emp_id, salary, dept_id):
+    return {'emp_id': emp_id, 'emp_name': f'E{emp_id}', 'position': 'Engineer',
+            'salary': salary, 'dept_id': dept_id}
+
+
+def _brute_force_above_average(rows):
+    result = []
+    for row in rows:
+        peers = [r['salary'] for r in rows if r['dept_id'] == row['dept_id']]
+        if row['salary'] > sum(peers) / len(peers):
+            result.append(row['emp_id'])
+    return sorted(result)
+
+
+def test_aggregates_follow_inserts_moves_and_deletes(fake_supabase):
+    fake_supabase.tables['department'] = [{'dept_id': 1, 'dept_name': 'Ops'}, {'dept_id': 2, 'dept_name': 'R&D'}]
+    fake_supabase.tables['employee'] = [_employee(n, 1000 * n, 1 + n % 2) for n in range(1, 9)]
+    analytics = SalaryAnalytics()
+    analytics.ensure_fresh()
+
+    db.add_employee(_employee(9, 50000, 1))
+    db.update_employee(2, {'dept_id': 1})
+    db.delete_employee(3)
+
+    rows = fake_supabase.tables['employee']
+    assert [r['emp_id'] for r in analytics.above_average()] == _brute_force_above_average(rows)
+    stats = {s['dept_id']: s for s in analytics.department_stats()}
+    assert stats[1]['employee_count'] == len([r for r in rows if r['dept_id'] == 1])
+    assert stats[1]['max_salary'] == 50000
+
+
+def test_salary_report_comes_from_the_procedure_until_employees_change(fake_supabase):
+    calls = []
+
+    def procedure(params):
+        calls.append(params)
+        return [{'Emp_Name': 'Ada', 'Salary_Grade': 'A', 'Dept_Rank': 1}]
+
+    fake_supabase.rpcs['generate_salary_report'] = procedure
+
+    assert db.get_salary_report()[0]['Salary_Grade'] == 'A'
+    db.get_salary_report()
+    assert len(calls) == 1
+
+    db.add_employee(_employee(1, 1000, 1))
+    db.get_salary_report()
+    assert len(calls) == 2
+
+
+def test_department_stats_sort_ids_numerically(fake_supabase):
+    fake_supabase.tables['department'] = [{'dept_id': n, 'dept_name': f'D{n}'} for n in (2, 10, 11)]
+    fake_supabase.tables['employee'] = [_employee(n, 1000 * n, dept) for n, dept in
+                                        enumerate((10, 2, 11, 2), start=1)]
+    analytics = SalaryAnalytics()
+    analytics.ensure_fresh()
+
+    assert [s['dept_id'] for s in analytics.department_stats()] == [2, 10, 11]
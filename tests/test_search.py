@@ -0,0 +1,81 @@
+"""Search index and typeahead: ranking, fuzzy matches and sync after writes"""
+import app
+import utils.search
+from config.database import db
+from utils.search import SUGGEST_MAX_LIMIT, InvertedIndex, SearchService
+
+
+def _mission(n, name, objective='Survey'):
+    return {'mission_id': n, 'pad_id': 1, 'loc_id': 1, 'mission_name': name,
+            'objective': objective, 'status': 'Planned'}
+
+
+def test_index_ranks_exact_prefix_and_fuzzy_matches():
+    index = InvertedIndex()
+    index.upsert('a', [('Mars Orbiter', 3)], {})
+    index.upsert('b', [('Lunar Orbital Relay', 3)], {})
+    index.upsert('c', [('Venus Probe', 3)], {})
+
+    assert [d for d, _ in index.search('orbiter')] == ['a']
+    assert {d for d, _ in index.search('orb')} == {'a', 'b'}
+    assert [d for d, _ in index.search('venis')] == ['c']  # one substitution
+
+
+def test_suggestions_fill_the_largest_api_limit(fake_supabase):
+    fake_supabase.tables['mission'] = [_mission(n, f'Orbiter {n:02d}') for n in range(40)]
+    service = SearchService()
+
+    suggestions = service.suggest('orb', sources=['missions'], limit=SUGGEST_MAX_LIMIT)
+
+    assert len(suggestions) == SUGGEST_MAX_LIMIT
+
+
+def test_writes_are_searchable_and_renames_leave_no_stale_suggestions(fake_supabase):
+    fake_supabase.tables['mission'] = [_mission(1, 'Mars Orbiter')]
+    service = SearchService()
+    assert [s['label'] for s in service.suggest('mar')] == ['Mars Orbiter']
+
+    db.add_mission(_mission(2, 'Mars Lander'))
+    assert {s['label'] for s in service.suggest('mar')} == {'Mars Orbiter', 'Mars Lander'}
+
+    db.update_mission(1, 1, 1, {'mission_name': 'Europa Orbiter'})
+    assert [s['label'] for s in service.suggest('mar')] == ['Mars Lander']
+    assert [r['mission_name'] for r in service.search('missions', 'europa')] == ['Europa Orbiter']
+
+
+def test_mission_suggestions_are_tagged_with_their_query(fake_supabase, monkeypatch):
+    fake_supabase.tables['mission'] = [_mission(1, 'Mars Orbiter'), _mission(2, 'Venus Probe')]
+    monkeypatch.setattr(utils.search, 'search_service', SearchService())
+
+    # The clientside callback drops any answer whose query is not the box's value
+    assert app.suggest_missions('mars o') == {'query': 'mars o', 'labels': ['Mars Orbiter']}
+    assert app.suggest_missions('  ') == {'query': '  ', 'labels': []}
+
+
+def test_searches_use_the_previous_index_while_a_reload_runs(fake_supabase, monkeypatch):
+    fake_supabase.tables['mission'] = [_mission(1, 'Mars Orbiter')]
+    service = SearchService()
+    assert [r['mission_name'] for r in service.search('missions', 'mars')] == ['Mars Orbiter']
+    first = service.indexes['missions']
+
+    during = []
+    loader = utils.search.SEARCH_SOURCES['missions'][1]
+
+    def slow_loader():
+        # A second caller while this reload fetches: served from the old index
+        during.append([r['mission_name'] for r in service.search('missions', 'mars')])
+        return loader()
+
+    monkeypatch.setitem(utils.search.SEARCH_SOURCES, 'missions',
+                        ('mission', slow_loader) + utils.search.SEARCH_SOURCES['missions'][2:])
+    db.add_mission(_mission(2, 'Mars Lander'))
+
+    assert {r['mission_name'] for r in service.search('missions', 'mars')} == {'Mars Orbiter', 'Mars Lander'}
+    assert during == [['Mars Orbiter']]
+    assert service.indexes['missions'] is not first
+    assert service.index_version('missions') == db.table_version('mission')
+
+    # A reload that finds nothing new keeps the index
+    kept = service.indexes['missions']
+    service.reload('missions')
+    assert service.indexes['missions'] is kept
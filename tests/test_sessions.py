@@ -0,0 +1,24 @@
+"""Session signing key: shared by every worker, required at startup"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_sessions(**env):
+    base = {k: v for k, v in os.environ.items() if k not in ('SESSION_SECRET', 'SECRET_KEY')}
+    return subprocess.run(
+        [sys.executable, '-c', 'import utils.sessions as s; print(s.SESSION_SECRET.decode())'],
+        cwd=ROOT, env={**base, **env}, capture_output=True, text=True)
+
+
+def test_startup_fails_without_a_secret():
+    result = _import_sessions()
+    assert result.returncode != 0
+    assert 'SESSION_SECRET' in result.stderr
+
+
+def test_secret_key_is_the_fallback():
+    assert _import_sessions(SECRET_KEY='flask-key').stdout.strip() == 'flask-key'
+    assert _import_sessions(SECRET_KEY='flask-key', SESSION_SECRET='own-key').stdout.strip() == 'own-key'
@@ -0,0 +1,61 @@
+"""Analytics snapshots: shared versions across workers and the refresh claim"""
+import app
+import utils.snapshots
+from utils.cache import shared_cache
+from utils.snapshots import SNAPSHOT_DATASETS, SnapshotScheduler
+
+
+def _only_demo(monkeypatch, loader):
+    monkeypatch.setattr(utils.snapshots, 'SNAPSHOT_DATASETS', {'demo': (loader, 60, ('employee',))})
+
+
+def test_workers_share_snapshot_versions_and_data(fake_supabase, monkeypatch):
+    rows = [{'dept': 1, 'total': 10}]
+    _only_demo(monkeypatch, lambda: list(rows))
+    first, second = SnapshotScheduler(), SnapshotScheduler()
+
+    first.refresh('demo')
+    assert second.versions() == {'demo': 1}
+    assert second.get('demo')['data'] == rows
+
+    first.refresh('demo')  # unchanged data keeps the version
+    assert second.versions() == {'demo': 1}
+
+    rows.append({'dept': 2, 'total': 5})
+    second.refresh('demo')
+    assert first.versions() == {'demo': 2}
+    assert first.get('demo')['data'] == rows
+    assert shared_cache.get('snapshot:data:demo:1') is None  # old version dropped
+
+
+def test_only_the_claiming_worker_refreshes(fake_supabase, monkeypatch):
+    calls = []
+    _only_demo(monkeypatch, lambda: calls.append(1) or [len(calls)])
+    first, second = SnapshotScheduler(), SnapshotScheduler()
+
+    # Another worker holds the claim: nobody else reloads
+    assert shared_cache.add('snapshot:claim:demo', 0, 60)
+    assert not first.refresh_if_due('demo')
+    assert calls == []
+    shared_cache.delete('snapshot:claim:demo')
+
+    assert first.refresh_if_due('demo')
+    assert not second.refresh_if_due('demo')  # no longer due anywhere
+    assert calls == [1]
+    assert shared_cache.get('snapshot:claim:demo') is None
+
+
+def test_scheduler_starts_with_the_server_not_on_import(fake_supabase, monkeypatch):
+    assert utils.snapshots.snapshot_scheduler._thread is None  # app is imported above
+
+    scheduler = SnapshotScheduler()
+    monkeypatch.setattr(app, 'snapshot_scheduler', scheduler)
+    assert set(scheduler.versions()) == set(SNAPSHOT_DATASETS)
+
+    try:
+        app.server.test_client().get('/')
+        assert scheduler._thread is not None and scheduler._thread.is_alive()
+    finally:
+        scheduler.stop()
+        if scheduler._thread:
+            scheduler._thread.join(timeout=5)
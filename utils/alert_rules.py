@@ -0,0 +1,266 @@
+"""
+Telemetry Alert Rules - operator-defined conditions over incoming telemetry
+
+Rules live in the alert_rule table as one-line expressions:
+
+    battery_voltage < 24 for 30s on sat_id in {3, 7, 12}
+    temperature >= 85
+    altitude < 200 for 5m on sat_id = 4
+
+i.e. <data_type> <op> <number> [for <duration>] [on sat_id in {...} | on
+sat_id = <id> | on all], with op one of < <= > >= == != and durations in
+ms, s, m or h (seconds when no unit is given).
+
+Enabled rules are compiled once per table version and indexed by
+(data_type, sat_id), with (data_type, None) holding fleet-wide rules, so
+each incoming point is compared only with the rules that can match it.
+Rules are fetched and compiled outside the engine's lock and swapped in
+afterwards, so points keep being checked against the previous rules while
+one caller reloads.
+Every (rule, satellite) pair keeps a small window state: when the
+condition started holding and whether it has fired. A rule fires once
+when its condition has held for the whole duration (by telemetry
+timestamps) and stays quiet until a point clears it, which resolves the
+alert; repeated points never re-alert.
+
+Points arrive from the anomaly detector (utils.anomaly), so rule alerts
+share its alert feed, ids and de-duplication across workers.
+"""
+import operator
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from config.database import db
+from utils.anomaly import anomaly_detector, row_points
+from utils.table_sync import TableSync
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+SEVERITIES = ('info', 'warning', 'critical')
+# Recompile at least this often (picks up edits made outside the app)
+RULES_MAX_AGE_SECONDS = 60
+
+RULE_PATTERN = re.compile(
+    r'^\s*(?P<data_type>[A-Za-z_]\w*)\s*(?P<op><=|>=|==|!=|<|>)\s*'
+    r'(?P<threshold>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)'
+    r'(?:\s+for\s+(?P<duration>\d+\.?\d*)\s*(?P<unit>ms|s|m|h)?)?'
+    r'(?:\s+on\s+(?P<scope>.+?))?\s*$',
+    re.IGNORECASE,
+)
+SCOPE_PATTERN = re.compile(
+    r'^(?:all|sat_id\s*(?:==?\s*(?P<one>\d+)|in\s*[{\[(](?P<many>[\d\s,]*)[}\])]))$',
+    re.IGNORECASE,
+)
+
+
+class Rule:
+    """A compiled alert rule"""
+
+    __slots__ = ('rule_id', 'name', 'expression', 'data_type', 'op', 'compare',
+                 'threshold', 'duration', 'sat_ids', 'severity')
+
+    def __init__(self, rule_id, name, expression, data_type, op, threshold, duration, sat_ids, severity):
+        self.rule_id = rule_id
+        self.name = name
+        self.expression = expression
+        self.data_type = data_type
+        self.op = op
+        self.compare = OPERATORS[op]
+        self.threshold = threshold
+        self.duration = duration
+        self.sat_ids = sat_ids
+        self.severity = severity
+
+    @property
+    def signature(self):
+        return (self.expression, self.severity)
+
+
+def compile_rule(expression, rule_id=None, name=None, severity='warning'):
+    """
+    Parse a rule expression
+
+    Raises:
+        ValueError: The expression or severity is not valid
+    """
+    match = RULE_PATTERN.match(expression or '')
+    if not match:
+        raise ValueError(f"Invalid rule '{expression}', expected e.g. "
+                         "'battery_voltage < 24 for 30s on sat_id in {1, 2}'")
+    severity = (severity or 'warning').lower()
+    if severity not in SEVERITIES:
+        raise ValueError(f"Severity must be one of {', '.join(SEVERITIES)}")
+
+    duration = 0.0
+    if match['duration']:
+        duration = float(match['duration']) * DURATION_UNITS[(match['unit'] or 's').lower()]
+
+    sat_ids = None
+    if match['scope']:
+        scope = SCOPE_PATTERN.match(match['scope'].strip())
+        if not scope:
+            raise ValueError(f"Invalid scope '{match['scope']}', expected 'sat_id in {{...}}', "
+                             "'sat_id = <id>' or 'all'")
+        if scope['one']:
+            sat_ids = frozenset([int(scope['one'])])
+        elif scope['many'] is not None:
+            sat_ids = frozenset(int(s) for s in scope['many'].replace(',', ' ').split())
+            if not sat_ids:
+                raise ValueError("sat_id in {...} needs at least one id")
+
+    return Rule(rule_id, name or expression.strip(), expression.strip(), match['data_type'],
+                match['op'], float(match['threshold']), duration, sat_ids, severity)
+
+
+def _timestamp(value):
+    """Unix seconds for a telemetry timestamp (now when missing or unreadable)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except (TypeError, ValueError):
+            return time.time()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class WindowState:
+    """Condition window of one (rule, satellite) pair"""
+
+    __slots__ = ('since', 'alert')
+
+    def __init__(self):
+        self.since = None  # timestamp the condition started holding
+        self.alert = None  # alert raised for the current episode
+
+
+class AlertRuleEngine:
+    """Evaluates the alert_rule table against telemetry points"""
+
+    def __init__(self, detector=anomaly_detector):
+        self.detector = detector
+        self.rules = {}  # rule_id -> Rule
+        self.index = {}  # (data_type, sat_id or None) -> [Rule]
+        self.windows = {}  # (rule_id, sat_id) -> WindowState
+        self.errors = {}  # rule_id -> compile error
+        self.sync = TableSync(('alert_rule',), RULES_MAX_AGE_SECONDS)
+        self.lock = threading.RLock()
+        detector.on_points(self.evaluate)
+
+    # ============================================
+    # LOADING
+    # ============================================
+    def ensure_fresh(self):
+        """Recompile when the alert_rule table has changed (in any worker)"""
+        self.sync.refresh(self.reload)
+
+    def reload(self):
+        """Compile every enabled rule outside the lock, then swap the index in"""
+        versions = self.sync.current()
+        rules, errors = {}, {}
+        for row in db.get_alert_rules() or []:
+            if not row.get('enabled', True):
+                continue
+            try:
+                rule = compile_rule(row.get('expression'), row.get('rule_id'), row.get('name'),
+                                    row.get('severity'))
+            except ValueError as e:
+                errors[row.get('rule_id')] = str(e)
+                continue
+            rules[rule.rule_id] = rule
+        self.load(rules.values(), versions, errors)
+
+    def load(self, rules, versions=None, errors=None):
+        """Install compiled rules, keeping window state of rules that did not change"""
+        with self.lock:
+            previous = self.rules
+            self.rules = {rule.rule_id: rule for rule in rules}
+            index = {}
+            for rule in self.rules.values():
+                for sat_id in rule.sat_ids or (None,):
+                    index.setdefault((rule.data_type, sat_id), []).append(rule)
+            self.index = index
+            unchanged = {rule_id for rule_id, rule in self.rules.items()
+                         if rule_id in previous and previous[rule_id].signature == rule.signature}
+            self.windows = {key: state for key, state in self.windows.items() if key[0] in unchanged}
+            self.errors = dict(errors or {})
+            if versions is not None:
+                self.sync.mark_loaded(versions)
+
+    # ============================================
+    # EVALUATION
+    # ============================================
+    def evaluate(self, rows):
+        """
+        Advance rule windows with telemetry rows (in order)
+
+        Returns:
+            list: Alerts fired by these rows
+        """
+        self.ensure_fresh()
+        fired = []
+        with self.lock:
+            index, windows = self.index, self.windows
+            if not index:
+                return fired
+            for row in rows:
+                sat_id = row.get('sat_id')
+                when = None
+                for data_type, value in row_points(row):
+                    candidates = index.get((data_type, sat_id), []) + index.get((data_type, None), [])
+                    if not candidates or value is None:
+                        continue
+                    try:
+                        x = float(value)
+                    except (TypeError, ValueError):
+                        continue
+                    if when is None:
+                        when = _timestamp(row.get('timestamp'))
+                    for rule in candidates:
+                        key = (rule.rule_id, sat_id)
+                        state = windows.get(key)
+                        if not rule.compare(x, rule.threshold):
+                            if state is not None:
+                                if state.alert is not None:
+                                    self.detector.update_alert(
+                                        state.alert, resolved_at=row.get('timestamp') or time.time())
+                                del windows[key]
+                            continue
+                        if state is None:
+                            state = windows[key] = WindowState()
+                        if state.since is None or when < state.since:
+                            state.since = when
+                        if state.alert is None and when - state.since >= rule.duration:
+                            state.alert = self._fire(rule, row, sat_id, x, when - state.since)
+                            fired.append(state.alert)
+        return fired
+
+    def _fire(self, rule, row, sat_id, value, held):
+        held_text = f" for {held:g}s" if rule.duration else ''
+        return self.detector.record_alert(
+            row, (sat_id, rule.data_type), value, 'rule',
+            f"{rule.name}: {rule.data_type} {value:g} {rule.op} {rule.threshold:g}{held_text}",
+            rule_id=rule.rule_id, severity=rule.severity, resolved_at=None,
+        )
+
+    def active_alerts(self):
+        """Rule alerts whose condition still holds"""
+        with self.lock:
+            return [dict(state.alert) for state in self.windows.values() if state.alert is not None]
+
+
+# Create global alert rule engine instance
+rule_engine = AlertRuleEngine()
@@ -0,0 +1,362 @@
+"""
+Telemetry Anomaly Detection - online statistics per (sat_id, data_type)
+
+Each telemetry series keeps O(1) state: a Welford running mean/variance
+over its whole history and an exponentially weighted mean/variance that
+tracks recent behaviour. Every ingested point is checked, before it is
+folded into the state, against:
+
+- limit rules: fixed (low, high) bounds per data_type, optionally
+  overridden per (sat_id, data_type)
+- a z-score rule: |value - ewma| / ewm_std above ANOMALY_Z_THRESHOLD once
+  the series has ANOMALY_WARMUP_POINTS points
+- status: rows whose status says the satellite itself reported a fault
+
+Points arrive through poll(), which reads rows newer than the last
+telemetry_id seen, in id order, so every process's writes are analysed the
+same way. A write through Database.add_telemetry triggers a poll rather
+than handing over its own rows: those would move the last id past lower
+ids that another worker has not committed yet. Ids a poll skipped over are
+looked up again for ANOMALY_GAP_SECONDS, and rows committed that late are
+analysed when they appear. Other consumers (utils.alert_rules) subscribe
+with on_points() and add to the same feed.
+
+Alerts live in the shared cache under ids from a shared counter, so every
+worker serves the same feed. Workers replaying the same rows raise the
+same alerts; a claim per (telemetry_id, kind, series, rule) lets only the
+first of them store each one.
+"""
+import math
+import threading
+import time
+
+from config.database import db
+from utils.cache import shared_cache
+
+# EWMA smoothing factor (weight of the newest point)
+ANOMALY_EWMA_ALPHA = 0.05
+# z-score above which a point is flagged
+ANOMALY_Z_THRESHOLD = 4.0
+# Points a series needs before the z-score rule applies
+ANOMALY_WARMUP_POINTS = 20
+# Alert ids scanned by recent_alerts, and how long alerts are kept
+ANOMALY_MAX_ALERTS = 1000
+ANOMALY_ALERT_TTL_SECONDS = 24 * 3600
+# Rows read per poll request
+ANOMALY_POLL_LIMIT = 5000
+# How long ids skipped by a poll are looked for (a row can commit after
+# rows with higher ids), and how many are remembered
+ANOMALY_GAP_SECONDS = 30
+ANOMALY_MAX_GAPS = 500
+# Row statuses that are alerts on their own
+FAULT_STATUSES = {'critical', 'error', 'fault', 'failure', 'anomaly'}
+# Reading columns of a one-row-per-sample telemetry table
+TELEMETRY_FIELDS = ('altitude', 'velocity', 'temperature', 'battery_level')
+
+# Shared counter behind alert ids
+ALERT_SEQUENCE_KEY = 'anomaly:alert_id'
+
+# data_type -> (low, high); None leaves a side open
+DEFAULT_LIMITS = {
+    'battery_level': (20.0, 100.0),
+    'battery_voltage': (24.0, 34.0),
+    'temperature': (-40.0, 85.0),
+    'altitude': (160.0, None),
+}
+
+
+def _alert_key(alert_id):
+    return f"anomaly:alert:{alert_id}"
+
+
+def row_points(row):
+    """(data_type, value) readings carried by a telemetry row (long or wide layout)"""
+    if 'data_type' in row:
+        return ((row['data_type'], row.get('value')),)
+    return [(field, row.get(field)) for field in TELEMETRY_FIELDS if row.get(field) is not None]
+
+
+class SeriesState:
+    """Running statistics of one (sat_id, data_type) series"""
+
+    __slots__ = ('count', 'mean', 'm2', 'ewma', 'ewm_var', 'last_value', 'last_time')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = 0.0
+        self.ewm_var = 0.0
+        self.last_value = None
+        self.last_time = None
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 6),
+            'std': round(self.std, 6),
+            'ewma': round(self.ewma, 6),
+            'ewm_std': round(math.sqrt(self.ewm_var), 6),
+            'last_value': self.last_value,
+            'last_time': self.last_time,
+        }
+
+
+class AnomalyDetector:
+    """Streams telemetry points through per-series statistics and rules"""
+
+    def __init__(self, alpha=ANOMALY_EWMA_ALPHA, z_threshold=ANOMALY_Z_THRESHOLD,
+                 warmup=ANOMALY_WARMUP_POINTS, limits=None):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)  # data_type or (sat_id, data_type)
+        self.series = {}  # (sat_id, data_type) -> SeriesState
+        self.processed = 0
+        self.last_id = None
+        self.gaps = {}  # skipped telemetry_id -> when it was skipped
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._point_listeners = []
+        db.on_change('telemetry', self._on_telemetry_change)
+
+    @property
+    def last_alert_id(self):
+        """Highest alert id handed out by any worker"""
+        return shared_cache.get(ALERT_SEQUENCE_KEY, 0)
+
+    def set_limits(self, data_type, low=None, high=None, sat_id=None):
+        """Bounds for a data_type (all satellites, or one satellite when sat_id is given)"""
+        key = data_type if sat_id is None else (sat_id, data_type)
+        with self._lock:
+            if low is None and high is None:
+                self.limits.pop(key, None)
+            else:
+                self.limits[key] = (low, high)
+
+    # ============================================
+    # INGESTION
+    # ============================================
+    def ingest(self, rows):
+        """
+        Check and absorb telemetry rows, in order
+
+        Rows are either one point each (sat_id, data_type, value) or one
+        reading per column (sat_id plus TELEMETRY_FIELDS, as in the telemetry
+        table of SETUP_GUIDE.md); timestamp, status and telemetry_id are
+        optional. Rows with a telemetry_id already seen are skipped, unless
+        the id is a gap left by an earlier call.
+
+        Returns:
+            list: Alerts raised by these rows
+        """
+        raised, fresh = [], []
+        alpha, keep = self.alpha, 1.0 - self.alpha
+        z_threshold, warmup = self.z_threshold, self.warmup
+        with self._lock:
+            series, limits, gaps = self.series, self.limits, self.gaps
+            last_id = self.last_id
+            for row in rows:
+                row_id = row.get('telemetry_id')
+                if row_id is not None:
+                    if last_id is None or row_id > last_id:
+                        if last_id is not None and row_id > last_id + 1:
+                            now = time.time()
+                            for missing in range(max(last_id + 1, row_id - ANOMALY_MAX_GAPS), row_id):
+                                gaps[missing] = now
+                            while len(gaps) > ANOMALY_MAX_GAPS:
+                                del gaps[next(iter(gaps))]
+                        last_id = row_id
+                    elif gaps.pop(row_id, None) is None:
+                        continue
+                fresh.append(row)
+                sat_id = row.get('sat_id')
+                points = row_points(row)
+                status = row.get('status')
+                fault = bool(status) and str(status).lower() in FAULT_STATUSES
+
+                for data_type, value in points:
+                    if value is None:
+                        continue
+                    try:
+                        x = float(value)
+                    except (TypeError, ValueError):
+                        continue
+                    key = (sat_id, data_type)
+                    state = series.get(key)
+                    if state is None:
+                        state = series[key] = SeriesState()
+
+                    # Rules see the state before this point
+                    limit = limits.get(key) or limits.get(data_type)
+                    if limit is not None:
+                        low, high = limit
+                        if low is not None and x < low:
+                            raised.append(self._alert(row, key, x, 'limit', state,
+                                                      f"{data_type} {x:g} below limit {low:g}"))
+                        elif high is not None and x > high:
+                            raised.append(self._alert(row, key, x, 'limit', state,
+                                                      f"{data_type} {x:g} above limit {high:g}"))
+                    n = state.count
+                    if n >= warmup and state.ewm_var > 0.0:
+                        z = (x - state.ewma) / math.sqrt(state.ewm_var)
+                        if z > z_threshold or z < -z_threshold:
+                            raised.append(self._alert(
+                                row, key, x, 'zscore', state,
+                                f"{data_type} {x:g} is {z:+.1f}σ from recent mean {state.ewma:.4g}", score=z))
+
+                    # Welford (whole history) and EWMA (recent) updates
+                    n += 1
+                    delta = x - state.mean
+                    state.mean += delta / n
+                    state.m2 += delta * (x - state.mean)
+                    if n == 1:
+                        state.ewma = x
+                    else:
+                        diff = x - state.ewma
+                        state.ewma += alpha * diff
+                        state.ewm_var = keep * (state.ewm_var + alpha * diff * diff)
+                    state.count = n
+                    state.last_value = x
+                    state.last_time = row.get('timestamp')
+
+                if fault:
+                    raised.append(self._alert(row, (sat_id, points[0][0] if len(points) == 1 else None),
+                                              None, 'status', None, f"Satellite reported status {status}"))
+            self.processed += len(fresh)
+            self.last_id = last_id
+            listeners = list(self._point_listeners)
+        raised = [self._publish(alert) for alert in raised]
+        for listener in listeners:
+            try:
+                raised += listener(fresh) or []
+            except Exception as e:
+                print(f"Error in telemetry point listener: {e}")
+        return raised
+
+    def on_points(self, listener):
+        """
+        Register listener(rows) for every telemetry row ingested (once per
+        row, in order); it may return alerts of its own to add to the result
+        """
+        with self._lock:
+            self._point_listeners.append(listener)
+
+    def record_alert(self, row, key, value, kind, message, **fields):
+        """Add an alert raised outside the built-in rules; returns the stored alert"""
+        alert = self._alert(row, key, value, kind, None, message)
+        alert.update(fields)
+        return self._publish(alert)
+
+    def update_alert(self, alert, **fields):
+        """Change fields of a published alert (e.g. resolved_at) in the shared feed"""
+        alert.update(fields)
+        if alert.get('alert_id'):
+            key = _alert_key(alert['alert_id'])
+            stored = shared_cache.get(key)
+            if stored is not None:
+                stored.update(fields)
+                shared_cache.set(key, stored, ANOMALY_ALERT_TTL_SECONDS)
+        return alert
+
+    def _alert(self, row, key, value, kind, state, message, score=None):
+        return {
+            'alert_id': None,
+            'sat_id': key[0],
+            'data_type': key[1],
+            'telemetry_id': row.get('telemetry_id'),
+            'timestamp': row.get('timestamp'),
+            'value': value,
+            'kind': kind,
+            'score': round(score, 2) if score is not None else None,
+            'expected': round(state.ewma, 4) if state is not None and state.count else None,
+            'message': message,
+            'detected_at': time.time(),
+        }
+
+    def _publish(self, alert):
+        """Give an alert a shared id and store it, unless another worker already did"""
+        try:
+            alert['alert_id'] = shared_cache.backend.incr(ALERT_SEQUENCE_KEY)
+        except Exception as e:
+            print(f"Error allocating alert id: {e}")
+            return alert
+        if alert['telemetry_id'] is not None:
+            claim = (f"anomaly:claim:{alert['telemetry_id']}:{alert['kind']}:{alert['sat_id']}:"
+                     f"{alert['data_type']}:{alert.get('rule_id')}")
+            if not shared_cache.add(claim, alert['alert_id'], ANOMALY_ALERT_TTL_SECONDS):
+                alert['alert_id'] = shared_cache.get(claim, alert['alert_id'])
+                return alert
+        shared_cache.set(_alert_key(alert['alert_id']), alert, ANOMALY_ALERT_TTL_SECONDS)
+        return alert
+
+    def _on_telemetry_change(self, table, op, rows):
+        # Read back in id order with every other worker's rows rather than
+        # ingesting these directly (see the module docstring)
+        if op in ('insert', 'upsert') and rows:
+            self.poll(wait=True)
+
+    def poll(self, wait=False):
+        """
+        Analyse telemetry rows written since the last poll (by any process)
+
+        Args:
+            wait: Wait for a poll running in another thread instead of returning 0
+
+        Returns:
+            int: Rows read
+        """
+        if not self._poll_lock.acquire(blocking=wait):
+            return 0  # another thread is already polling
+        try:
+            count = self._poll_gaps()
+            while True:
+                rows = db.get_telemetry_since(self.last_id, ANOMALY_POLL_LIMIT) or []
+                if rows:
+                    self.ingest(rows)
+                count += len(rows)
+                if len(rows) < ANOMALY_POLL_LIMIT:
+                    return count
+        finally:
+            self._poll_lock.release()
+
+    def _poll_gaps(self):
+        """Analyse rows that committed after a poll had passed their ids"""
+        cutoff = time.time() - ANOMALY_GAP_SECONDS
+        with self._lock:
+            for row_id in [i for i, skipped in self.gaps.items() if skipped < cutoff]:
+                del self.gaps[row_id]
+            ids = list(self.gaps)
+        rows = db.get_telemetry_by_ids(ids) if ids else []
+        if rows:
+            self.ingest(rows)
+        return len(rows or [])
+
+    # ============================================
+    # READS
+    # ============================================
+    def recent_alerts(self, since_id=0, sat_id=None, limit=100):
+        """Newest alerts first, optionally only those after since_id or for one satellite"""
+        last = self.last_alert_id
+        alerts = []
+        for alert_id in range(last, max(since_id or 0, last - ANOMALY_MAX_ALERTS), -1):
+            alert = shared_cache.get(_alert_key(alert_id))
+            if alert is not None and (sat_id is None or alert['sat_id'] == sat_id):
+                alerts.append(alert)
+                if len(alerts) >= limit:
+                    break
+        return alerts
+
+    def series_stats(self, sat_id=None):
+        """Current statistics per series"""
+        with self._lock:
+            return [{'sat_id': key[0], 'data_type': key[1], **state.to_dict()}
+                    for key, state in self.series.items() if sat_id is None or key[0] == sat_id]
+
+
+# Create global anomaly detector instance
+anomaly_detector = AnomalyDetector()
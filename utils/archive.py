@@ -0,0 +1,380 @@
+"""
+Telemetry Archive - Gorilla-compressed blocks of historical telemetry
+
+Old telemetry is moved out of row-per-reading JSON into per-series blocks
+(one series per (sat_id, data_type), up to ARCHIVE_BLOCK_POINTS points per
+block) stored in the telemetry_archive table. Inside a block, following the
+Gorilla time-series encoding:
+
+- timestamps (milliseconds) are stored as delta-of-delta, so readings on a
+  steady cadence cost one bit each and small jitter a few bits
+- values (float64) are XORed with the previous value and only the
+  meaningful bits between the leading and trailing zeros are written,
+  reusing the previous bit window when the new one fits inside it
+
+Both are lossless (timestamps to the millisecond). Block metadata (series,
+time range, point count, unit) sits in plain columns so a time-range read
+fetches only the overlapping blocks, then decodes them straight into NumPy
+arrays. Only numeric readings are archived; status text stays with the raw
+rows, which are deleted only when asked. Each block also records the
+telemetry_id range it came from, which is how archiving resumes without
+storing a point twice.
+"""
+import base64
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from config.database import db
+from utils.anomaly import row_points
+
+# Points per block (bounds decode work for narrow reads)
+ARCHIVE_BLOCK_POINTS = 4096
+# Raw rows read per request while archiving
+ARCHIVE_READ_CHUNK = 1000
+
+BLOCK_MAGIC = b'TLG1'
+# magic, point count, first timestamp (ms), first value
+BLOCK_HEADER = struct.Struct('>4sIqd')
+MASK64 = (1 << 64) - 1
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# ============================================
+# BIT STREAMS
+# ============================================
+class BitWriter:
+    """Appends big-endian bit fields to a byte buffer"""
+
+    __slots__ = ('buffer', 'acc', 'nbits')
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value, width):
+        self.acc = (self.acc << width) | (value & ((1 << width) - 1))
+        self.nbits += width
+        if self.nbits >= 64:
+            extra = self.nbits & 7
+            self.buffer += (self.acc >> extra).to_bytes((self.nbits - extra) >> 3, 'big')
+            self.acc &= (1 << extra) - 1
+            self.nbits = extra
+
+    def getvalue(self):
+        """Buffer contents, the last byte padded with zero bits"""
+        if not self.nbits:
+            return bytes(self.buffer)
+        pad = -self.nbits & 7
+        return bytes(self.buffer) + (self.acc << pad).to_bytes((self.nbits + pad) >> 3, 'big')
+
+
+class BitReader:
+    """Reads big-endian bit fields written by BitWriter"""
+
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data, pos=0):
+        self.data = bytes(data) + bytes(9)  # reads near the end never run short
+        self.pos = pos
+
+    def read(self, width):
+        pos = self.pos
+        start, end = pos >> 3, (pos + width + 7) >> 3
+        self.pos = pos + width
+        return (int.from_bytes(self.data[start:end], 'big') >> ((end << 3) - pos - width)) & ((1 << width) - 1)
+
+    def read_bit(self):
+        pos = self.pos
+        self.pos = pos + 1
+        return (self.data[pos >> 3] >> (7 - (pos & 7))) & 1
+
+
+# ============================================
+# BLOCK ENCODING
+# ============================================
+def encode_block(times_ms, values):
+    """
+    Compress one series' points (timestamps ascending)
+
+    Args:
+        times_ms: Integer millisecond timestamps
+        values: Floats, same length
+
+    Returns:
+        bytes: Block payload
+    """
+    count = len(times_ms)
+    if count == 0:
+        raise ValueError("Cannot encode an empty block")
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64).tolist()
+    times = [int(t) for t in times_ms]
+    out = BitWriter()
+    write = out.write
+    prev_time, prev_delta = times[0], 0
+    prev_bits, prev_lead, prev_trail = bits[0], -1, 0
+
+    for i in range(1, count):
+        # Timestamp: delta-of-delta in the smallest bucket that fits
+        t = times[i]
+        delta = t - prev_time
+        dod = delta - prev_delta
+        if dod == 0:
+            write(0, 1)
+        elif -63 <= dod <= 64:
+            write(0b10, 2)
+            write(dod + 63, 7)
+        elif -255 <= dod <= 256:
+            write(0b110, 3)
+            write(dod + 255, 9)
+        elif -2047 <= dod <= 2048:
+            write(0b1110, 4)
+            write(dod + 2047, 12)
+        else:
+            write(0b1111, 4)
+            write(dod & MASK64, 64)
+        prev_time, prev_delta = t, delta
+
+        # Value: XOR with the previous value's bits
+        x = bits[i] ^ prev_bits
+        prev_bits = bits[i]
+        if x == 0:
+            write(0, 1)
+            continue
+        lead = min(64 - x.bit_length(), 31)
+        trail = (x & -x).bit_length() - 1
+        if prev_lead >= 0 and lead >= prev_lead and trail >= prev_trail:
+            write(0b10, 2)
+            write(x >> prev_trail, 64 - prev_lead - prev_trail)
+        else:
+            significant = 64 - lead - trail
+            write(0b11, 2)
+            write(lead, 5)
+            write(significant & 63, 6)  # 64 is stored as 0
+            write(x >> trail, significant)
+            prev_lead, prev_trail = lead, trail
+
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, count, times[0], float(values[0])) + out.getvalue()
+
+
+def decode_block(payload):
+    """
+    Decompress a block
+
+    Returns:
+        tuple: (int64 millisecond timestamps, float64 values) arrays
+    """
+    magic, count, first_time, first_value = BLOCK_HEADER.unpack_from(payload)
+    if magic != BLOCK_MAGIC:
+        raise ValueError("Not a telemetry archive block")
+    reader = BitReader(memoryview(payload)[BLOCK_HEADER.size:])
+    read, read_bit = reader.read, reader.read_bit
+    times = [first_time] * count
+    bits = [struct.unpack('>Q', struct.pack('>d', first_value))[0]] * count
+    prev_time, prev_delta = first_time, 0
+    prev_bits, lead, trail = bits[0], 0, 0
+
+    for i in range(1, count):
+        if not read_bit():
+            dod = 0
+        elif not read_bit():
+            dod = read(7) - 63
+        elif not read_bit():
+            dod = read(9) - 255
+        elif not read_bit():
+            dod = read(12) - 2047
+        else:
+            dod = read(64)
+            if dod >> 63:
+                dod -= 1 << 64
+        prev_delta += dod
+        prev_time += prev_delta
+        times[i] = prev_time
+
+        if read_bit():
+            if read_bit():
+                lead = read(5)
+                significant = read(6) or 64
+                trail = 64 - lead - significant
+            prev_bits ^= read(64 - lead - trail) << trail
+        bits[i] = prev_bits
+
+    return np.array(times, dtype=np.int64), np.array(bits, dtype=np.uint64).view(np.float64)
+
+
+# ============================================
+# ARCHIVE
+# ============================================
+def to_millis(value):
+    """Milliseconds since the epoch for a timestamp (naive times are UTC)"""
+    if isinstance(value, (int, float)):
+        return round(value * 1000)
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - EPOCH) // timedelta(milliseconds=1)
+
+
+def _iso(millis):
+    return datetime.fromtimestamp(millis / 1000, timezone.utc).isoformat(timespec='milliseconds')
+
+
+class TelemetryArchive:
+    """Moves raw telemetry into compressed blocks and reads it back"""
+
+    def __init__(self, block_points=ARCHIVE_BLOCK_POINTS):
+        self.block_points = block_points
+
+    def archive(self, before, delete_raw=False):
+        """
+        Compress telemetry rows older than before into archive blocks
+
+        Rows are read in telemetry_id order and each series resumes after
+        the highest id already archived for it, so running again (or after a
+        partial failure) adds only what is missing. Full blocks are stored
+        as each read chunk completes; the last partial block of each series
+        at the end. After a series' block fails to store, the rest of that
+        series is left for the next run.
+
+        Args:
+            before: Cutoff (datetime or ISO string)
+            delete_raw: Delete rows once every point they carry is in a
+                stored block (rows with no numeric readings are kept)
+
+        Returns:
+            dict: Rows, points, blocks and byte counts (raw JSON vs compressed)
+        """
+        cutoff = _iso(to_millis(before))
+        watermarks = db.get_archive_watermarks()
+        pending = {}  # (sat_id, data_type) -> {'times', 'values', 'ids', 'unit'}
+        outstanding = {}  # telemetry_id -> points not yet in a stored block
+        failed = set()  # series whose block could not be stored
+        stats = {'rows': 0, 'points': 0, 'skipped': 0, 'blocks': 0, 'raw_bytes': 0,
+                 'archived_bytes': 0, 'deleted': 0, 'failed_blocks': 0}
+
+        def store(full):
+            """Store finished blocks; ids of rows now fully archived"""
+            done = []
+            while full:
+                # One block per series per request, so a series whose block
+                # fails never gets a later block (and watermark) past the gap
+                batch, later = [], []
+                for key, series in full:
+                    if key not in failed:
+                        (later if any(key == k for k, _ in batch) else batch).append((key, series))
+                full = later
+                blocks = [self._block(key, series) for key, series in batch]
+                results = db.add_archive_blocks(blocks) if blocks else []
+                for (key, series), block, result in zip(batch, blocks, results):
+                    if not result['success']:
+                        stats['failed_blocks'] += 1
+                        failed.add(key)
+                        continue
+                    stats['blocks'] += 1
+                    stats['archived_bytes'] += len(block['payload'])
+                    for row_id in series['ids']:
+                        outstanding[row_id] -= 1
+                        if not outstanding[row_id]:
+                            del outstanding[row_id]
+                            done.append(row_id)
+            return done
+
+        def delete(row_ids):
+            if delete_raw and row_ids:
+                stats['deleted'] += sum(1 for r in db.delete_telemetry(row_ids) if r['success'])
+
+        after_id = None
+        while True:
+            rows = db.get_telemetry_before(cutoff, after_id, ARCHIVE_READ_CHUNK)
+            if not rows:
+                break
+            after_id = rows[-1]['telemetry_id']
+            stats['rows'] += len(rows)
+            stats['raw_bytes'] += len(json.dumps(rows, default=str))
+            full, archived = [], []
+            for row in rows:
+                if row.get('timestamp') is None:
+                    continue
+                row_id = row['telemetry_id']
+                millis = to_millis(row['timestamp'])
+                points = 0
+                for data_type, value in row_points(row):
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        continue
+                    key = (row.get('sat_id'), data_type)
+                    if row_id <= watermarks.get(key, 0):
+                        stats['skipped'] += 1
+                        points += 1
+                        continue
+                    if key in failed:
+                        # Keeps the row: this point will not be in a stored block
+                        outstanding[row_id] = outstanding.get(row_id, 0) + 1
+                        continue
+                    series = pending.setdefault(
+                        key, {'times': [], 'values': [], 'ids': [], 'unit': row.get('unit')})
+                    series['times'].append(millis)
+                    series['values'].append(value)
+                    series['ids'].append(row_id)
+                    outstanding[row_id] = outstanding.get(row_id, 0) + 1
+                    stats['points'] += 1
+                    points += 1
+                    if len(series['times']) >= self.block_points:
+                        full.append((key, pending.pop(key)))
+                if points and row_id not in outstanding:
+                    archived.append(row_id)  # every point was archived by an earlier run
+            delete(archived + store(full))
+            if len(rows) < ARCHIVE_READ_CHUNK:
+                break
+        delete(store(list(pending.items())))
+        return stats
+
+    def _block(self, key, series):
+        order = np.argsort(np.asarray(series['times'], dtype=np.int64), kind='stable')
+        times = np.asarray(series['times'], dtype=np.int64)[order]
+        values = np.asarray(series['values'], dtype=np.float64)[order]
+        return {
+            'sat_id': key[0],
+            'data_type': key[1],
+            'unit': series['unit'],
+            'start_time': _iso(int(times[0])),
+            'end_time': _iso(int(times[-1])),
+            'point_count': len(times),
+            'first_telemetry_id': series['ids'][0],
+            'last_telemetry_id': series['ids'][-1],
+            'payload': base64.b64encode(encode_block(times.tolist(), values)).decode('ascii'),
+        }
+
+    def read(self, sat_id, data_type, start=None, end=None):
+        """
+        Archived points of one series between start and end (inclusive)
+
+        Returns:
+            tuple: (datetime64[ms] timestamps, float64 values), time ordered
+        """
+        start_ms = to_millis(start) if start is not None else None
+        end_ms = to_millis(end) if end is not None else None
+        blocks = db.get_archive_blocks(sat_id, data_type,
+                                       _iso(start_ms) if start_ms is not None else None,
+                                       _iso(end_ms) if end_ms is not None else None)
+        parts = [decode_block(base64.b64decode(block['payload'])) for block in blocks or []]
+        if not parts:
+            return np.array([], dtype='datetime64[ms]'), np.array([], dtype=np.float64)
+        times = np.concatenate([p[0] for p in parts])
+        values = np.concatenate([p[1] for p in parts])
+        keep = np.ones(len(times), dtype=bool)
+        if start_ms is not None:
+            keep &= times >= start_ms
+        if end_ms is not None:
+            keep &= times <= end_ms
+        times, values = times[keep], values[keep]
+        order = np.argsort(times, kind='stable')
+        return times[order].astype('datetime64[ms]'), values[order]
+
+
+# Create global telemetry archive instance
+telemetry_archive = TelemetryArchive()
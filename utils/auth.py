@@ -1,8 +1,86 @@
 """
 Authentication Module - Supabase Auth Integration with Role Management
 """
-from config.database import supabase
-import json
+from config.database import supabase, db
+from utils.cache import shared_cache
+from utils.sessions import session_manager
+
+# Cached role/claims lifetime; explicit invalidation covers role changes
+# made through this process
+ROLE_CACHE_TTL_SECONDS = 300
+VALID_ROLES = ('user', 'admin')
+
+
+class RoleCache:
+    """
+    TTL cache of user claims (role, email, username) keyed by user_id
+
+    Used by Auth.sign_in and the API's role dependency so a role check does
+    not cost a user-table query per login or request. Entries live in the
+    shared cache, so a role change made in one worker is seen by all.
+
+    The role comes only from the user table: user_metadata is editable by
+    the user, so a missing row or a failed read yields 'user', never admin.
+    """
+
+    def __init__(self, ttl=ROLE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+
+    def _key(self, user_id):
+        return shared_cache.versioned_key('claims', ('roles',)) + str(user_id)
+
+    def get(self, user_id):
+        """
+        Claims for a user, reading the user table on a miss
+
+        Returns:
+            dict: {'user_id', 'role', 'email', 'username'}
+        """
+        if not user_id:
+            return None
+        cached = shared_cache.get(self._key(user_id))
+        if cached:
+            return cached
+
+        claims = {'user_id': user_id, 'role': 'user', 'email': None, 'username': None}
+        try:
+            record = (supabase.table('user')
+                      .select('role', 'email', 'username')
+                      .eq('user_id', user_id)
+                      .limit(1)
+                      .execute())
+            if record.data:
+                row = record.data[0]
+                role = (row.get('role') or 'user').lower()
+                claims.update(
+                    role=role if role in VALID_ROLES else 'user',
+                    email=row.get('email'),
+                    username=row.get('username'),
+                )
+        except Exception as db_error:
+            print(f"Could not fetch role from database: {db_error}")
+            # Don't cache a guess
+            return claims
+        self.set(user_id, claims)
+        return dict(claims)
+
+    def get_role(self, user_id):
+        claims = self.get(user_id)
+        return claims['role'] if claims else None
+
+    def set(self, user_id, claims):
+        shared_cache.set(self._key(user_id), dict(claims, user_id=user_id), self.ttl)
+
+    def invalidate(self, user_id=None):
+        """Forget one user's claims, or everyone's"""
+        if user_id is None:
+            shared_cache.bump('roles')
+        else:
+            shared_cache.delete(self._key(user_id))
+
+
+# Create global role cache instance
+role_cache = RoleCache()
 
 
 class Auth:
@@ -53,6 +131,13 @@ class Auth:
                     supabase.table('user').insert(user_data).execute()
                 except Exception as db_error:
                     print(f"Warning: Could not insert into user table: {db_error}")
+                # Research facts may already reference this id as 'Unknown'
+                db.invalidate_username_cache(response.user.id)
+                role_cache.set(response.user.id, {
+                    'role': user_role,
+                    'email': email,
+                    'username': user_data['username'],
+                })
                 
                 return {
                     "success": True,
@@ -100,22 +185,10 @@ class Auth:
             })
             
             if response.user:
-                # Get user role from user metadata or database
-                user_role = "user"  # Default
-                
-                # Try to get from user metadata
-                if response.user.user_metadata:
-                    user_role = response.user.user_metadata.get('role', 'user')
-                
-                # Try to get from database User table
-                try:
-                    user_record = supabase.table('user').select('role').eq('email', email).execute()
-                    if user_record.data and len(user_record.data) > 0:
-                        user_role = user_record.data[0].get('role', 'user')
-                except Exception as db_error:
-                    print(f"Could not fetch role from database: {db_error}")
-                # Normalize role to lowercase for consistent RBAC checks
-                user_role = (user_role or 'user').lower()
+                # Role from the User table only (user_metadata is editable
+                # by the user); cached by user_id so repeat logins skip the
+                # query. Normalized to lowercase for RBAC checks
+                user_role = role_cache.get_role(response.user.id)
                 
                 return {
                     "success": True,
@@ -147,6 +220,44 @@ class Auth:
                 "error": error_msg
             }
     
+    def set_user_role(self, user_id, role):
+        """
+        Change a user's role and drop their cached claims
+        
+        Args:
+            user_id: User id
+            role: 'user' or 'admin'
+            
+        Returns:
+            dict: Success status
+        """
+        role = (role or '').lower()
+        if role not in VALID_ROLES:
+            return {
+                "success": False,
+                "error": f"Role must be one of: {', '.join(VALID_ROLES)}"
+            }
+        try:
+            response = db.admin.table('user').update({'role': role}).eq('user_id', user_id).execute()
+            role_cache.invalidate(user_id)
+            # Stored sessions carry the old role claim
+            session_manager.end_user_sessions(user_id)
+            if not response.data:
+                return {
+                    "success": False,
+                    "error": "User not found"
+                }
+            return {
+                "success": True,
+                "user_id": user_id,
+                "role": role
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
     def sign_out(self):
         """
         Sign out current user
@@ -280,46 +391,45 @@ auth = Auth()
 
 # Session management helpers for Dash
 def store_session(session_data):
-    """Prepare session payload for dcc.Store. Returns a plain dict."""
+    """Issue a signed session token for dcc.Store from a sign-in result."""
     try:
-        user_data = session_data.get("user", {})
-        access_token = session_data.get("access_token")
-        role = (session_data.get("role", "user") or "user").lower()
-
-        return {
-            "access_token": access_token,
-            "user_id": user_data.get("id") if isinstance(user_data, dict) else None,
-            "email": user_data.get("email") if isinstance(user_data, dict) else None,
-            "role": role,
-        }
+        user_data = session_data.get("user") or {}
+        if not isinstance(user_data, dict) or not user_data.get("id"):
+            return None
+        role = session_data.get("role") or user_data.get("role") or "user"
+        return session_manager.issue(user_data["id"], role=role, email=user_data.get("email"))
     except Exception as e:
         print(f"Error storing session: {e}")
         return None
 
 
 def load_session(session_value):
-    """Load session data from dcc.Store. Accepts dict or JSON string."""
+    """
+    Validate a session token from dcc.Store
+
+    Returns:
+        dict: {'user_id', 'email', 'role'} or None if the token is missing,
+        forged, expired or revoked
+    """
     try:
-        if not session_value:
+        claims = session_manager.claims(session_value)
+        if not claims or not claims.get('uid'):
             return None
-        if isinstance(session_value, dict):
-            # Normalize role if present
-            if 'role' in session_value and isinstance(session_value['role'], str):
-                session_value = {
-                    **session_value,
-                    'role': session_value['role'].lower()
-                }
-            return session_value
-        if isinstance(session_value, str):
-            data = json.loads(session_value)
-            if 'role' in data and isinstance(data['role'], str):
-                data['role'] = data['role'].lower()
-            return data
-        return None
+        role = claims.get('role')
+        return {
+            'user_id': claims['uid'],
+            'email': claims.get('email'),
+            'role': role.lower() if isinstance(role, str) else 'user',
+        }
     except Exception:
         return None
 
 
+def end_session(session_value):
+    """Revoke a session token on logout"""
+    session_manager.end(session_value)
+
+
 def check_authentication(session_data):
     """
     Check if user is authenticated based on session data
@@ -337,10 +447,7 @@ def check_authentication(session_data):
         session = load_session(session_data)
         if not session:
             return False
-        # Treat presence of either access_token or a user_id as authenticated
-        if session.get("access_token") or session.get("user_id"):
-            return True
-        return False
+        return True
     except:
         return False
 
@@ -0,0 +1,220 @@
+"""
+Shared Cache - a cache backend every worker process on the host can see
+
+With CACHE_BACKEND=disk (the default) entries and version counters live in a
+diskcache directory (SQLite plus files), so gunicorn workers, the Dash app
+and the API share one copy instead of each warming and invalidating its own.
+CACHE_BACKEND=memory keeps everything in the current process.
+
+Invalidation works through versions rather than messages: a write bumps the
+version of its namespace (Database bumps 'table:<name>' on every write), and
+cached results are stored under keys that embed the versions they were built
+from. Every worker reads the current version on lookup, so a bump made by any
+process retires the old entries everywhere; they then age out via TTL or the
+size limit.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'disk').lower()
+CACHE_DIR = os.getenv('CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), '.shared_cache'))
+# Disk backend size limit (bytes) and memory backend entry limit
+CACHE_SIZE_LIMIT = int(os.getenv('CACHE_SIZE_LIMIT', str(256 * 1024 * 1024)))
+CACHE_MEMORY_MAX_ENTRIES = 10000
+# Lifetime of cached results when the caller does not give one; bounds
+# staleness for writes made outside the app (SQL editor, other services)
+CACHE_DEFAULT_TTL = 60
+
+_MISSING = object()
+
+
+class MemoryBackend:
+    """Process-local LRU; values are pickled so callers never share objects"""
+
+    def __init__(self, max_entries=CACHE_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> (expires_at or None, pickled value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] is not None and entry[0] <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key, value, ttl=None):
+        entry = (time.time() + ttl if ttl else None, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def add(self, key, value, ttl=None):
+        entry = (time.time() + ttl if ttl else None, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            current = self._data.get(key)
+            if current is not None and (current[0] is None or current[0] > time.time()):
+                return False
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None or (entry[0] is not None and entry[0] <= time.time()):
+            return default
+        return pickle.loads(entry[1])
+
+    def incr(self, key, delta=1):
+        with self._lock:
+            value = pickle.loads(self._data[key][1]) + delta if key in self._data else delta
+            self._data[key] = (None, pickle.dumps(value))
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskBackend:
+    """diskcache directory shared by every process that opens it"""
+
+    def __init__(self, directory=CACHE_DIR, size_limit=CACHE_SIZE_LIMIT):
+        import diskcache
+        self.cache = diskcache.Cache(directory, size_limit=size_limit)
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, expire=ttl)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+    def add(self, key, value, ttl=None):
+        # Atomic across processes, so only one caller stores the value
+        return self.cache.add(key, value, expire=ttl)
+
+    def pop(self, key, default=None):
+        # Atomic across processes, so only one caller gets the value
+        return self.cache.pop(key, default)
+
+    def incr(self, key, delta=1):
+        # Atomic across processes (runs in one SQLite transaction)
+        return self.cache.incr(key, delta, default=0)
+
+    def clear(self):
+        self.cache.clear()
+
+
+def _create_backend(kind):
+    if kind == 'disk':
+        try:
+            return DiskBackend()
+        except Exception as e:
+            print(f"Error opening shared cache in {CACHE_DIR}, using a per-process cache: {e}")
+    return MemoryBackend()
+
+
+class SharedCache:
+    """Versioned get/set on top of a backend; backend errors count as misses"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return not isinstance(self.backend, MemoryBackend)
+
+    def get(self, key, default=None):
+        try:
+            return self.backend.get(key, default)
+        except Exception as e:
+            print(f"Error reading cache key {key}: {e}")
+            return default
+
+    def set(self, key, value, ttl=CACHE_DEFAULT_TTL):
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            print(f"Error writing cache key {key}: {e}")
+
+    def delete(self, key):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f"Error deleting cache key {key}: {e}")
+
+    def add(self, key, value, ttl=CACHE_DEFAULT_TTL):
+        """Store a key only if it is absent; True for the one caller that stored it"""
+        try:
+            return self.backend.add(key, value, ttl)
+        except Exception as e:
+            print(f"Error adding cache key {key}: {e}")
+            return False
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value; only one caller ever gets it"""
+        try:
+            return self.backend.pop(key, default)
+        except Exception as e:
+            print(f"Error popping cache key {key}: {e}")
+            return default
+
+    # ============================================
+    # VERSIONS
+    # ============================================
+    def version(self, namespace):
+        """Current version of a namespace (0 until first bumped)"""
+        return self.get(f"version:{namespace}", 0)
+
+    def bump(self, namespace):
+        """Advance a namespace's version, retiring its entries in every worker"""
+        try:
+            return self.backend.incr(f"version:{namespace}")
+        except Exception as e:
+            print(f"Error bumping cache version {namespace}: {e}")
+            return None
+
+    def versioned_key(self, name, namespaces, *parts):
+        versions = ','.join(f"{ns}={self.version(ns)}" for ns in namespaces)
+        return f"{name}|{versions}|{'|'.join(map(str, parts))}"
+
+    def get_or_load(self, name, namespaces, loader, *parts, ttl=CACHE_DEFAULT_TTL):
+        """
+        Cached loader() result for the current versions of namespaces
+
+        Exceptions from loader propagate and nothing is cached.
+        """
+        key = self.versioned_key(name, namespaces, *parts)
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        self.set(key, value, ttl)
+        return value
+
+
+# Create global shared cache instance
+shared_cache = SharedCache(_create_backend(CACHE_BACKEND))
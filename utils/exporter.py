@@ -0,0 +1,304 @@
+"""
+Data Export - streamed CSV, gzip'd NDJSON and Parquet downloads
+
+Exports page through the table with Database.iter_table and encode one page
+at a time, so memory stays flat no matter how large the table is. The same
+generators back /api/export in the API and the dashboard's background export
+job, which writes the file for the Flask download route in app.py.
+"""
+import csv
+import io
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+import zlib
+
+from config.database import db
+
+# Tables and views that may be exported, with the unique key pages are
+# ordered by (a single column is paged by keyset, a composite one by range)
+EXPORTABLE_TABLES = {
+    'department': 'dept_id',
+    'employee': 'emp_id',
+    'employee_hierarchy': 'emp_id',
+    'satellite': 'sat_id',
+    'satellite_status_report': 'sat_id',
+    'mission': ('mission_id', 'pad_id', 'loc_id'),
+    'active_missions': ('mission_id', 'pad_id', 'loc_id'),
+    'telemetry': 'telemetry_id',
+    'equipment': 'equip_id',
+    'research_fact': ('user_id', 'fact_id'),
+    'department_summary': 'dept_name',
+}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/gzip', 'ndjson.gz'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Download links handed out by the dashboard stay valid this long
+EXPORT_LINK_TTL_SECONDS = 300
+# Where dashboard exports are written until downloaded (shared by the host's workers)
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'space-research-exports'))
+
+_COLUMN_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+_TOKEN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def parse_filters(text):
+    """
+    Parse 'column=value, column=value' into an equality filter dict
+
+    Raises:
+        ValueError: On malformed pairs or invalid column names
+    """
+    filters = {}
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        column, sep, value = part.partition('=')
+        column = column.strip()
+        if not sep or not _COLUMN_NAME.match(column):
+            raise ValueError(f"Invalid filter '{part.strip()}', expected column=value")
+        filters[column] = value.strip()
+    return filters
+
+
+def stream_export(table, fmt, filters=None):
+    """
+    Build a streamed export
+
+    Args:
+        table: Name from EXPORTABLE_TABLES
+        fmt: 'csv', 'ndjson' (gzip'd) or 'parquet'
+        filters: Optional {column: value} equality filters
+
+    Returns:
+        tuple: (byte chunk generator, mimetype, download filename)
+    """
+    if table not in EXPORTABLE_TABLES:
+        raise ValueError(f"Table '{table}' cannot be exported")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    for column in (filters or {}):
+        if not _COLUMN_NAME.match(column):
+            raise ValueError(f"Invalid filter column '{column}'")
+
+    pages = db.iter_table(table, EXPORTABLE_TABLES[table], filters=filters)
+    encoder = {'csv': _encode_csv, 'ndjson': _encode_ndjson_gz, 'parquet': _encode_parquet}[fmt]
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"{table}_{time.strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return encoder(pages), mimetype, filename
+
+
+def _encode_csv(pages):
+    writer = None
+    buffer = io.StringIO()
+    for rows in pages:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _encode_ndjson_gz(pages):
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for rows in pages:
+        text = ''.join(json.dumps(row, default=str) + '\n' for row in rows)
+        chunk = compressor.compress(text.encode('utf-8'))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back in pieces"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_kind(values):
+    """
+    Column kind for a Parquet export, chosen from the first page
+
+    A Parquet file has one schema, so the kind must hold every later page
+    too: JSON numbers are float (PostgREST sends whole floats as ints), and
+    anything that is not all numbers or all booleans is a string, with JSON
+    objects and arrays written as JSON text.
+    """
+    kinds = {type(v) for v in values if v is not None}
+    if kinds == {bool}:
+        return 'bool'
+    if kinds and kinds <= {int, float}:
+        return 'float'
+    return 'string'
+
+
+def _parquet_cell(kind, value):
+    """Value coerced to a column kind, or None when it cannot hold it"""
+    if value is None:
+        return None
+    if kind == 'string':
+        return value if isinstance(value, str) else json.dumps(value, default=str)
+    if kind == 'bool':
+        return value if isinstance(value, bool) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _encode_parquet(pages):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {'bool': pa.bool_(), 'float': pa.float64(), 'string': pa.string()}
+    sink = _ChunkSink()
+    writer = None
+    kinds = None
+    for rows in pages:
+        if writer is None:
+            kinds = {name: _parquet_kind([row.get(name) for row in rows]) for name in rows[0]}
+            schema = pa.schema([(name, arrow_types[kind]) for name, kind in kinds.items()])
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+        columns = []
+        for name, kind in kinds.items():
+            values = [row.get(name) for row in rows]
+            cells = [_parquet_cell(kind, v) for v in values]
+            dropped = sum(1 for v, c in zip(values, cells) if v is not None and c is None)
+            if dropped:
+                print(f"Parquet export: {dropped} value(s) in column {name} are not {kind}, written as null")
+            columns.append(pa.array(cells, type=arrow_types[kind]))
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is not None:
+        writer.close()
+    yield sink.drain()
+
+
+# ============================================
+# ONE-TIME DOWNLOAD LINKS FOR THE DASHBOARD
+# ============================================
+# The dashboard writes exports in a background job (its own process), so a
+# finished export is a file in EXPORT_DIR named '<token>__<filename>'; any
+# worker on the host can serve it, and claiming it is an atomic rename
+
+def _expired(path):
+    try:
+        return os.path.getmtime(path) < time.time() - EXPORT_LINK_TTL_SECONDS
+    except OSError:
+        return False
+
+
+def _remove_expired():
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if _expired(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def write_export(table, fmt, filters=None, progress=None):
+    """
+    Write an export to EXPORT_DIR and return a single-use download token
+
+    Args:
+        table, fmt, filters: As for stream_export
+        progress: Optional callback(bytes written) called after each chunk
+
+    Returns:
+        str: Token for /export/<token>, valid EXPORT_LINK_TTL_SECONDS
+    """
+    chunks, _, filename = stream_export(table, fmt, filters)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_expired()
+    token = secrets.token_urlsafe(24)
+    partial = os.path.join(EXPORT_DIR, f"{token}.part")
+    written = 0
+    try:
+        with open(partial, 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(written)
+        os.replace(partial, os.path.join(EXPORT_DIR, f"{token}__{filename}"))
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return token
+
+
+def redeem_export_link(token):
+    """
+    Claim the export file for a token (single use)
+
+    Returns:
+        dict: path, filename and mimetype, or None for an unknown, used or
+        expired token. Call discard_export once the file has been sent.
+    """
+    if not _TOKEN.match(token or ''):
+        return None
+    try:
+        names = [n for n in os.listdir(EXPORT_DIR)
+                 if n.startswith(f"{token}__") and not n.endswith('.sending')]
+    except OSError:
+        return None
+    if not names:
+        return None
+    path = os.path.join(EXPORT_DIR, names[0])
+    claimed = f"{path}.sending"
+    try:
+        os.rename(path, claimed)
+    except OSError:
+        return None  # redeemed by another request
+    export = {'path': claimed, 'filename': names[0].split('__', 1)[1], 'mimetype': 'application/octet-stream'}
+    if _expired(claimed):
+        discard_export(export)
+        return None
+    for mimetype, extension in EXPORT_FORMATS.values():
+        if export['filename'].endswith(f".{extension}"):
+            export['mimetype'] = mimetype
+    return export
+
+
+def discard_export(export):
+    """Delete a redeemed export file"""
+    try:
+        os.remove(export['path'])
+    except OSError:
+        pass
@@ -0,0 +1,406 @@
+"""
+Employee Hierarchy - in-process index over employee.supervisor_id
+
+Employees are laid out in Euler-tour (pre-order) order, so every subtree is a
+contiguous range [tin, tin + size). Subordinate counts and "is X under Y"
+checks are O(1), subtree salary totals are O(log n) through a Fenwick tree
+over the tour, and a chain of command is a walk up the parent links.
+
+Writes made through Database are applied from its change notifications:
+salary and other non-structural edits update the index in place, while
+inserts, deletes and supervisor moves re-tour the cached rows on the next
+query (no database round trip). Writes made by other workers trigger a
+full reload through TableSync (utils/table_sync.py), as does an index older
+than HIERARCHY_MAX_AGE_SECONDS.
+"""
+import threading
+from collections import deque
+
+from config.database import db
+from utils.table_sync import TableSync
+
+# Reload from the database at least this often
+HIERARCHY_MAX_AGE_SECONDS = 60
+# Org-chart requests never return more nodes than this
+MAX_TREE_NODES = 2000
+
+
+class FenwickTree:
+    """Binary indexed tree: point updates and prefix sums in O(log n)"""
+
+    def __init__(self, values):
+        self.size = len(values)
+        self.tree = [0.0] * (self.size + 1)
+        for i, value in enumerate(values, start=1):
+            self.tree[i] += value
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index, delta):
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end):
+        """Sum of values[0:end]"""
+        total = 0.0
+        i = end
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_sum(self, start, end):
+        """Sum of values[start:end]"""
+        return self.prefix_sum(end) - self.prefix_sum(start)
+
+
+def _salary(row):
+    try:
+        return float(row.get('salary') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class EmployeeHierarchy:
+    """Supervisor tree with Euler-tour ranges and subtree salary sums"""
+
+    def __init__(self, max_age=HIERARCHY_MAX_AGE_SECONDS):
+        self.sync = TableSync(('employee', 'department'), max_age)
+        self.rows = {}           # emp_id -> employee row
+        self.dept_names = {}     # dept_id -> dept_name
+        self.parent = {}         # emp_id -> supervisor emp_id (None for roots)
+        self.children = {}       # emp_id -> [emp_id, ...] sorted
+        self.roots = []
+        self.order = []          # Euler tour (pre-order) of emp_ids
+        self.tin = {}            # emp_id -> position in order
+        self.size = {}           # emp_id -> subtree size, including the employee
+        self.depth = {}
+        self.salaries = None     # FenwickTree over order
+        # Bumped on every change that can alter query results
+        self.version = 0
+        # Bumped only when the tree shape changes; keys the cached layout
+        self.structure_version = 0
+        self._layout = (None, {})
+        self._dirty = False
+        self.lock = threading.RLock()
+        db.on_change('employee', self._on_employee_change)
+        db.on_change('department', self._on_department_change)
+
+    # ============================================
+    # LOADING AND MAINTENANCE
+    # ============================================
+    def ensure_fresh(self):
+        """Reload when stale and re-tour after structural changes"""
+        self.sync.refresh(self.reload)
+        with self.lock:
+            if self._dirty:
+                self._rebuild()
+
+    def reload(self):
+        """Fetch every employee (and department name) and rebuild the index"""
+        versions = self.sync.current()
+        rows = {}
+        for page in db.iter_table('employee', 'emp_id'):
+            for row in page:
+                rows[row['emp_id']] = row
+        departments = db.get_all_departments() or []
+        with self.lock:
+            self.rows = rows
+            self.dept_names = {d.get('dept_id'): d.get('dept_name') for d in departments}
+            self.sync.mark_loaded(versions)
+            self._rebuild()
+
+    def _rebuild(self):
+        rows = self.rows
+        parent = {}
+        children = {emp_id: [] for emp_id in rows}
+        for emp_id, row in rows.items():
+            supervisor = row.get('supervisor_id')
+            if supervisor in rows and supervisor != emp_id:
+                parent[emp_id] = supervisor
+                children[supervisor].append(emp_id)
+            else:
+                parent[emp_id] = None
+        for kids in children.values():
+            kids.sort()
+
+        order, tin, depth = [], {}, {}
+        roots = sorted(emp_id for emp_id, sup in parent.items() if sup is None)
+
+        def tour(root):
+            depth[root] = 0
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                tin[node] = len(order)
+                order.append(node)
+                for child in reversed(children[node]):
+                    depth[child] = depth[node] + 1
+                    stack.append(child)
+
+        for root in roots:
+            tour(root)
+        # Employees left over sit on a supervisor cycle or report into one.
+        # Follow the supervisors up to the cycle and detach its lowest id,
+        # which makes the cycle (and everyone under it) one tree
+        for emp_id in sorted(rows):
+            if emp_id in tin:
+                continue
+            path, seen = [], set()
+            node = emp_id
+            while node not in seen:
+                path.append(node)
+                seen.add(node)
+                node = parent[node]
+            head = min(path[path.index(node):])
+            children[parent[head]].remove(head)
+            parent[head] = None
+            roots.append(head)
+            tour(head)
+
+        size = {}
+        for node in reversed(order):
+            size[node] = 1 + sum(size[child] for child in children[node])
+
+        self.parent, self.children, self.roots = parent, children, roots
+        self.order, self.tin, self.size, self.depth = order, tin, size, depth
+        self.salaries = FenwickTree([_salary(rows[emp_id]) for emp_id in order])
+        self._dirty = False
+        self.version += 1
+        self.structure_version += 1
+
+    def _on_employee_change(self, table, op, rows):
+        with self.lock:
+            if not self.sync.loaded_at:
+                return
+            for row in rows:
+                emp_id = row.get('emp_id')
+                if emp_id is None:
+                    continue
+                old = self.rows.get(emp_id)
+                if op == 'delete':
+                    if old is not None:
+                        del self.rows[emp_id]
+                        self._dirty = True
+                    continue
+                merged = {**old, **row} if old else dict(row)
+                self.rows[emp_id] = merged
+                if old is None or old.get('supervisor_id') != merged.get('supervisor_id'):
+                    self._dirty = True
+                elif not self._dirty:
+                    # Same position in the tree: patch the salary sum in place
+                    delta = _salary(merged) - _salary(old)
+                    if delta:
+                        self.salaries.add(self.tin[emp_id], delta)
+            self.sync.advance('employee')
+            self.version += 1
+
+    def _on_department_change(self, table, op, rows):
+        with self.lock:
+            for row in rows:
+                if op == 'delete':
+                    self.dept_names.pop(row.get('dept_id'), None)
+                elif 'dept_name' in row:
+                    self.dept_names[row.get('dept_id')] = row.get('dept_name')
+            self.sync.advance('department')
+            self.version += 1
+
+    # ============================================
+    # QUERIES
+    # ============================================
+    def get(self, emp_id):
+        self.ensure_fresh()
+        return self.rows.get(emp_id)
+
+    def direct_subordinates(self, emp_id):
+        """Ids of employees reporting directly to emp_id"""
+        self.ensure_fresh()
+        with self.lock:
+            return list(self.children.get(emp_id, []))
+
+    def count_subordinates(self, emp_id, transitive=False):
+        """Direct or transitive subordinate count, or None for an unknown id"""
+        self.ensure_fresh()
+        with self.lock:
+            if emp_id not in self.rows:
+                return None
+            if transitive:
+                return self.size[emp_id] - 1
+            return len(self.children[emp_id])
+
+    def subordinates(self, emp_id):
+        """Ids of everyone under emp_id, in tour order"""
+        self.ensure_fresh()
+        with self.lock:
+            if emp_id not in self.rows:
+                return []
+            start = self.tin[emp_id]
+            return self.order[start + 1:start + self.size[emp_id]]
+
+    def is_subordinate(self, emp_id, supervisor_id):
+        """True if emp_id reports (directly or not) to supervisor_id"""
+        self.ensure_fresh()
+        with self.lock:
+            if emp_id not in self.tin or supervisor_id not in self.tin or emp_id == supervisor_id:
+                return False
+            start = self.tin[supervisor_id]
+            return start < self.tin[emp_id] < start + self.size[supervisor_id]
+
+    def chain_of_command(self, emp_id):
+        """Supervisors of emp_id from the direct supervisor up to the top"""
+        self.ensure_fresh()
+        with self.lock:
+            return self._chain(emp_id)
+
+    def _chain(self, emp_id):
+        chain = []
+        current = self.parent.get(emp_id)
+        while current is not None:
+            chain.append(self.rows[current])
+            current = self.parent.get(current)
+        return chain
+
+    def subtree_salary(self, emp_id, include_self=True):
+        """Total salary of emp_id's reporting tree, or None for an unknown id"""
+        self.ensure_fresh()
+        with self.lock:
+            if emp_id not in self.rows:
+                return None
+            start = self.tin[emp_id]
+            if not include_self:
+                start += 1
+            return self.salaries.range_sum(start, self.tin[emp_id] + self.size[emp_id])
+
+    def summary(self, emp_id):
+        """Hierarchy facts for one employee, or None for an unknown id"""
+        self.ensure_fresh()
+        with self.lock:
+            row = self.rows.get(emp_id)
+            if row is None:
+                return None
+            start, end = self.tin[emp_id], self.tin[emp_id] + self.size[emp_id]
+            return {
+                'emp_id': emp_id,
+                'emp_name': row.get('emp_name'),
+                'depth': self.depth[emp_id],
+                'direct_subordinates': len(self.children[emp_id]),
+                'total_subordinates': self.size[emp_id] - 1,
+                'subtree_salary': round(self.salaries.range_sum(start, end), 2),
+                'chain_of_command': [
+                    {'emp_id': r.get('emp_id'), 'emp_name': r.get('emp_name'), 'position': r.get('position')}
+                    for r in self._chain(emp_id)
+                ],
+            }
+
+    def layout(self):
+        """
+        Org-chart coordinates {emp_id: (x, y)}, computed once per tree shape
+
+        Leaves take consecutive x positions in tour order, each supervisor
+        is centred over its first and last report, and y is -depth.
+        """
+        self.ensure_fresh()
+        with self.lock:
+            return self._positions()
+
+    def _positions(self):
+        if self._layout[0] == self.structure_version:
+            return self._layout[1]
+        x = {}
+        next_leaf = 0
+        for emp_id in self.order:
+            if not self.children[emp_id]:
+                x[emp_id] = float(next_leaf)
+                next_leaf += 1
+        for emp_id in reversed(self.order):
+            kids = self.children[emp_id]
+            if kids:
+                x[emp_id] = (x[kids[0]] + x[kids[-1]]) / 2
+        positions = {emp_id: (x[emp_id], -self.depth[emp_id]) for emp_id in self.order}
+        self._layout = (self.structure_version, positions)
+        return positions
+
+    def tree(self, root=None, depth=2, expanded=(), collapsed=(), max_nodes=MAX_TREE_NODES):
+        """
+        Part of the org chart with precomputed coordinates
+
+        Args:
+            root: Employee to start from (None starts from every top-level employee)
+            depth: Levels shown below the start before nodes stay collapsed
+            expanded: Employee ids whose reports are shown regardless of depth
+            collapsed: Employee ids whose reports are hidden regardless of depth
+            max_nodes: Cap on returned nodes (breadth first)
+
+        Returns:
+            dict: version, root, nodes, edges ([supervisor, report] pairs) and
+            truncated, or None for an unknown root
+        """
+        self.ensure_fresh()
+        with self.lock:
+            positions = self._positions()
+            if root is None:
+                start = list(self.roots)
+            elif root in self.rows:
+                start = [root]
+            else:
+                return None
+            expanded = set(expanded or ())
+            collapsed = set(collapsed or ())
+            max_nodes = max(1, min(max_nodes, MAX_TREE_NODES))
+            nodes, edges = [], []
+            truncated = False
+            queue = deque((emp_id, 0) for emp_id in start)
+            while queue:
+                if len(nodes) >= max_nodes:
+                    truncated = True
+                    break
+                emp_id, level = queue.popleft()
+                row = self.rows[emp_id]
+                kids = self.children[emp_id]
+                is_open = (bool(kids) and emp_id not in collapsed
+                           and (level + 1 < depth or emp_id in expanded))
+                x, y = positions[emp_id]
+                nodes.append({
+                    'emp_id': emp_id,
+                    'emp_name': row.get('emp_name'),
+                    'position': row.get('position'),
+                    'supervisor_id': self.parent.get(emp_id),
+                    'x': x,
+                    'y': y,
+                    'direct_subordinates': len(kids),
+                    'total_subordinates': self.size[emp_id] - 1,
+                    'expanded': is_open,
+                })
+                if is_open:
+                    for child in kids:
+                        queue.append((child, level + 1))
+            shown = {node['emp_id'] for node in nodes}
+            for node in nodes:
+                if node['supervisor_id'] in shown:
+                    edges.append([node['supervisor_id'], node['emp_id']])
+            return {'version': self.structure_version, 'root': root, 'nodes': nodes,
+                    'edges': edges, 'truncated': truncated}
+
+    def joined_rows(self):
+        """Employee rows with dept_name and supervisor name, like the employee_hierarchy view"""
+        self.ensure_fresh()
+        with self.lock:
+            result = []
+            for emp_id in sorted(self.rows):
+                row = self.rows[emp_id]
+                supervisor = self.rows.get(self.parent.get(emp_id))
+                supervisor_name = supervisor.get('emp_name') if supervisor else None
+                result.append({
+                    **row,
+                    'dept_name': self.dept_names.get(row.get('dept_id')),
+                    'supervisor_name': supervisor_name,
+                    'Supervisor_Name': supervisor_name,
+                })
+            return result
+
+
+# Create global hierarchy instance
+hierarchy_index = EmployeeHierarchy()
@@ -0,0 +1,175 @@
+"""
+Bulk Import - CSV/Parquet uploads for the admin dashboard
+
+Files are read in chunks, every row is validated against the API models and
+valid rows are upserted in batches on a background thread, so a large import
+never holds a Dash callback open. Callbacks poll the job for progress; job
+state is saved to the shared cache after every batch, so a poll served by
+any worker sees it.
+"""
+import base64
+import io
+import threading
+import time
+import uuid
+
+import pandas as pd
+from pydantic import ValidationError
+
+from backend.models import Employee, Satellite, Mission
+from config.database import db
+from utils.cache import shared_cache
+
+# Rows read, validated and written per batch
+IMPORT_BATCH_SIZE = 500
+# Row errors kept per job (the failure count is always exact)
+MAX_REPORTED_ERRORS = 1000
+# Jobs are forgotten this many seconds after their last progress update
+JOB_RETENTION_SECONDS = 3600
+
+IMPORT_TARGETS = {
+    'employees': (Employee, db.upsert_employees),
+    'satellites': (Satellite, db.upsert_satellites),
+    'missions': (Mission, db.upsert_missions),
+}
+
+
+class ImportJob:
+    """Progress and results of one upload"""
+
+    def __init__(self, entity, filename):
+        self.id = uuid.uuid4().hex
+        self.entity = entity
+        self.filename = filename
+        self.status = 'running'
+        self.message = None
+        self.total_rows = None
+        self.processed = 0
+        self.written = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.time()
+        self.finished = None
+
+    def add_error(self, row_number, error):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'error': error})
+
+    def to_dict(self):
+        elapsed = (self.finished or time.time()) - self.started
+        return {
+            'id': self.id,
+            'entity': self.entity,
+            'filename': self.filename,
+            'status': self.status,
+            'message': self.message,
+            'total_rows': self.total_rows,
+            'processed': self.processed,
+            'written': self.written,
+            'failed': self.failed,
+            'errors': list(self.errors),
+            'elapsed': round(elapsed, 2),
+            'rows_per_second': round(self.processed / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def _job_key(job_id):
+    return f"import_job:{job_id}"
+
+
+def _save_job(job):
+    shared_cache.set(_job_key(job.id), job.to_dict(), JOB_RETENTION_SECONDS)
+
+
+def start_import(entity, filename, contents):
+    """
+    Start importing a dcc.Upload payload in the background
+
+    Args:
+        entity: 'employees', 'satellites' or 'missions'
+        filename: Uploaded file name (extension selects the reader)
+        contents: dcc.Upload contents string ('data:...;base64,...')
+
+    Returns:
+        str: Job id for get_import_job
+    """
+    if entity not in IMPORT_TARGETS:
+        raise ValueError(f"Unsupported import target: {entity}")
+    _, _, encoded = contents.partition(',')
+    raw = base64.b64decode(encoded)
+
+    job = ImportJob(entity, filename)
+    _save_job(job)
+    threading.Thread(target=_run_import, args=(job, raw), daemon=True).start()
+    return job.id
+
+
+def get_import_job(job_id):
+    """Snapshot of a job's progress (from any worker), or None if unknown"""
+    return shared_cache.get(_job_key(job_id))
+
+
+def _is_parquet(filename):
+    name = (filename or '').lower()
+    return name.endswith('.parquet') or name.endswith('.pq')
+
+
+def _iter_batches(filename, raw, job):
+    """Yield DataFrames of at most IMPORT_BATCH_SIZE rows from a CSV or Parquet file"""
+    name = (filename or '').lower()
+    if _is_parquet(name):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(io.BytesIO(raw))
+        job.total_rows = parquet_file.metadata.num_rows
+        for batch in parquet_file.iter_batches(batch_size=IMPORT_BATCH_SIZE):
+            # date32 columns as datetime64 (not datetime.date) so they become ISO strings below
+            yield batch.to_pandas(date_as_object=False)
+    elif name.endswith('.csv'):
+        yield from pd.read_csv(io.BytesIO(raw), chunksize=IMPORT_BATCH_SIZE, dtype=str,
+                               keep_default_na=False, na_values=[''])
+    else:
+        raise ValueError("Upload a .csv or .parquet file")
+
+
+def _run_import(job, raw):
+    model, write = IMPORT_TARGETS[job.entity]
+    # Error rows are numbered as the user sees them: CSV line numbers count
+    # the header line, Parquet rows are numbered from 1
+    first_row = 1 if _is_parquet(job.filename) else 2
+    try:
+        for frame in _iter_batches(job.filename, raw, job):
+            # The models take dates as ISO strings
+            for column in frame.select_dtypes(include=['datetime', 'datetimetz']).columns:
+                frame[column] = frame[column].dt.strftime('%Y-%m-%d')
+            frame = frame.astype(object).where(frame.notna(), None)
+            valid_rows, row_numbers = [], []
+            for offset, record in enumerate(frame.to_dict('records')):
+                row_number = job.processed + offset + first_row
+                try:
+                    record = {k: v for k, v in record.items() if v is not None}
+                    valid_rows.append(model(**record).dict(exclude_none=True))
+                    row_numbers.append(row_number)
+                except ValidationError as e:
+                    job.add_error(row_number, '; '.join(
+                        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                    ))
+
+            if valid_rows:
+                for result in write(valid_rows):
+                    if result.get('success'):
+                        job.written += 1
+                    else:
+                        job.add_error(row_numbers[result['index']], result.get('error', 'Write failed'))
+            job.processed += len(frame)
+            _save_job(job)
+
+        job.status = 'done'
+        job.message = f"Imported {job.written} of {job.processed} rows"
+    except Exception as e:
+        print(f"Error importing {job.filename}: {e}")
+        job.status = 'failed'
+        job.message = str(e)
+    finally:
+        job.finished = time.time()
+        _save_job(job)
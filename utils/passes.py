@@ -0,0 +1,199 @@
+"""
+Pass Prediction - when each satellite is visible from a ground location
+
+For a location and time window the whole fleet is propagated on a coarse
+grid (PASS_STEP_SECONDS) in Earth-fixed coordinates, elevation above the
+local horizon is computed for every sample in one array expression, and
+rise/set events are read off the sign changes against the elevation mask.
+Every event is then refined by bisection on its bracketing interval, all
+events at once, to well under a second. Passes shorter than one grid step
+can be missed; lower the step for very low orbits and high masks.
+
+Results for a whole UTC day are cached per (location, day, mask) in the
+shared cache and keyed by the satellite/orbital_element table versions,
+so element edits retire them in every worker.
+"""
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+
+import numpy as np
+
+from utils.cache import shared_cache
+from utils.orbit import BLOCK_ELEMENTS, R_EARTH, fleet_propagator, time_grid, to_timestamp
+
+# Coarse sampling interval and default elevation mask
+PASS_STEP_SECONDS = 60
+PASS_MIN_ELEVATION_DEG = 10.0
+# Bisection steps per event: 60 s / 2**10 is about 0.06 s
+PASS_REFINE_ITERATIONS = 10
+# A day's passes stay cached this long unless the elements change
+PASS_CACHE_TTL = 6 * 3600
+# WGS-84 flattening
+EARTH_FLATTENING = 1 / 298.257223563
+
+
+def observer_ecef(lat_deg, lon_deg, alt_km=0.0):
+    """
+    Earth-fixed position and local 'up' unit vector of a geodetic location
+
+    Returns:
+        tuple: (position (3,), up (3,)) in km
+    """
+    lat, lon = np.radians(lat_deg), np.radians(lon_deg)
+    e2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+    n = R_EARTH / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    position = np.array([
+        (n + alt_km) * np.cos(lat) * np.cos(lon),
+        (n + alt_km) * np.cos(lat) * np.sin(lon),
+        (n * (1 - e2) + alt_km) * np.sin(lat),
+    ])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    return position, up
+
+
+def elevation_deg(x, y, z, site, up):
+    """Elevation (degrees) of Earth-fixed points seen from site"""
+    rx, ry, rz = x - site[0], y - site[1], z - site[2]
+    distance = np.sqrt(rx * rx + ry * ry + rz * rz)
+    return np.degrees(np.arcsin(np.clip((rx * up[0] + ry * up[1] + rz * up[2]) / distance, -1, 1)))
+
+
+class PassPredictor:
+    """Rise/set windows for the fleet over a location"""
+
+    def __init__(self, propagator=fleet_propagator):
+        self.propagator = propagator
+
+    def predict(self, lat, lon, start, end, min_elevation=PASS_MIN_ELEVATION_DEG,
+                sat_ids=None, step=PASS_STEP_SECONDS, alt_km=0.0):
+        """
+        Passes between start and end, ordered by rise time
+
+        Args:
+            lat, lon: Location in degrees
+            start, end: Window (unix seconds, datetime or ISO string)
+            min_elevation: Elevation mask in degrees
+            sat_ids: Restrict to these satellites (default: whole fleet)
+            step: Coarse sampling interval in seconds
+
+        Returns:
+            list: Dicts with sat_id, sat_name, rise_time, set_time,
+            culmination_time, max_elevation, duration_seconds and
+            truncated (the pass is already up at start or still up at end)
+        """
+        site, up = observer_ecef(float(lat), float(lon), alt_km)
+        times = time_grid(start, end, step)
+        self.propagator.ensure_fresh()
+        if sat_ids is None:
+            sat_ids = self.propagator.sat_ids.tolist()
+        block = max(1, BLOCK_ELEMENTS // len(times))
+
+        found = []
+        for offset in range(0, len(sat_ids), block):
+            found += self._coarse_passes(sat_ids[offset:offset + block], times, site, up, min_elevation)
+        if not found:
+            return []
+        self._refine(found, site, up, min_elevation)
+
+        names = dict(zip(self.propagator.sat_ids.tolist(), self.propagator.names))
+        passes = []
+        for p in sorted(found, key=lambda p: (p['rise'], p['sat_id'])):
+            passes.append({
+                'sat_id': p['sat_id'],
+                'sat_name': names.get(p['sat_id']),
+                'rise_time': _iso(p['rise']),
+                'set_time': _iso(p['set']),
+                'culmination_time': _iso(p['peak_time']),
+                'max_elevation': round(p['peak'], 2),
+                'duration_seconds': round(p['set'] - p['rise'], 1),
+                'truncated': p['truncated'],
+            })
+        return passes
+
+    def _coarse_passes(self, sat_ids, times, site, up, min_elevation):
+        grid = self.propagator.propagate(times, sat_ids, frame='ecef')
+        elevation = elevation_deg(grid['x_km'], grid['y_km'], grid['z_km'], site, up)
+        above = elevation >= min_elevation
+        # +1 where a pass starts between samples k and k+1, -1 where one ends
+        edges = np.diff(above.astype(np.int8), axis=1)
+        rows_up, k_up = np.nonzero(edges == 1)
+        rows_down, k_down = np.nonzero(edges == -1)
+
+        starts = {}
+        for row, k in zip(rows_up.tolist(), k_up.tolist()):
+            starts.setdefault(row, []).append(k + 1)
+        ends = {}
+        for row, k in zip(rows_down.tolist(), k_down.tolist()):
+            ends.setdefault(row, []).append(k)
+        last = len(times) - 1
+
+        passes = []
+        for row in set(starts) | set(ends) | set(np.nonzero(above[:, 0])[0].tolist()):
+            row_starts = ([0] if above[row, 0] else []) + starts.get(row, [])
+            row_ends = ends.get(row, []) + ([last] if above[row, last] else [])
+            for first, final in zip(row_starts, row_ends):
+                window = elevation[row, first:final + 1]
+                peak = int(np.argmax(window))
+                passes.append({
+                    'sat_id': int(grid['sat_ids'][row]),
+                    # Brackets for refinement (None: window edge, nothing to refine)
+                    'rise_bracket': (times[first - 1], times[first]) if first > 0 else None,
+                    'set_bracket': (times[final], times[final + 1]) if final < last else None,
+                    'rise': float(times[first]),
+                    'set': float(times[final]),
+                    'peak': float(window[peak]),
+                    'peak_time': float(times[first + peak]),
+                    'truncated': first == 0 or final == last,
+                })
+        return passes
+
+    def _refine(self, passes, site, up, min_elevation):
+        """Bisect every rise and set bracket together"""
+        events = [(p, 'rise') for p in passes if p['rise_bracket']]
+        events += [(p, 'set') for p in passes if p['set_bracket']]
+        if not events:
+            return
+        sat_ids = [p['sat_id'] for p, _ in events]
+        lo = np.array([p[f'{kind}_bracket'][0] for p, kind in events])
+        hi = np.array([p[f'{kind}_bracket'][1] for p, kind in events])
+        rising = np.array([kind == 'rise' for _, kind in events])
+        for _ in range(PASS_REFINE_ITERATIONS):
+            mid = (lo + hi) / 2
+            point = self.propagator.propagate_pairs(sat_ids, mid, frame='ecef')
+            visible = elevation_deg(point['x_km'], point['y_km'], point['z_km'], site, up) >= min_elevation
+            # Rising: the crossing is before mid if the satellite is already up
+            crossing_before = visible == rising
+            hi = np.where(crossing_before, mid, hi)
+            lo = np.where(crossing_before, lo, mid)
+        for (p, kind), when in zip(events, ((lo + hi) / 2).tolist()):
+            p[kind] = when
+
+    def day_passes(self, lat, lon, day=None, min_elevation=PASS_MIN_ELEVATION_DEG):
+        """Passes over a location during one UTC day, cached per (location, day, mask)"""
+        day = _as_date(day)
+        start = datetime.combine(day, dt_time(0), tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+        lat, lon, min_elevation = round(float(lat), 4), round(float(lon), 4), float(min_elevation)
+        return shared_cache.get_or_load(
+            'passes', ('table:satellite', 'table:orbital_element'),
+            lambda: self.predict(lat, lon, start, end, min_elevation),
+            lat, lon, day.isoformat(), min_elevation,
+            ttl=PASS_CACHE_TTL,
+        )
+
+
+def _as_date(day):
+    if day is None:
+        return datetime.now(timezone.utc).date()
+    if isinstance(day, datetime):
+        return day.astimezone(timezone.utc).date()
+    if isinstance(day, date):
+        return day
+    return date.fromisoformat(str(day)[:10])
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(to_timestamp(timestamp), timezone.utc).isoformat(timespec='seconds')
+
+
+# Create global pass predictor instance
+pass_predictor = PassPredictor()
@@ -0,0 +1,379 @@
+"""
+Callback Profiler - opt-in timing for every Dash callback
+
+install_callback_profiler(app) wraps each registered server-side callback.
+While enabled it records invocation counts, errors, wall time (total, max,
+p50/p95 over recent calls), time spent in database requests and request /
+response payload sizes. A sampled fraction of calls also runs under cProfile
+and the samples are merged per callback. dump() writes everything to disk
+for offline analysis (the .prof file opens in pstats or snakeviz).
+
+Enable it with DASH_PROFILE=1 or from the admin System Settings tab. The
+switches and the stats live in the shared cache, so they cover every worker:
+each worker re-reads the switches every FLAG_REFRESH_SECONDS (when disabled
+a wrapper only checks a local copy), publishes its own counters to its slot
+every PUBLISH_INTERVAL_SECONDS, and snapshot() / dump() merge all slots.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+
+from utils.cache import shared_cache
+
+PROFILE_ENABLED = os.getenv('DASH_PROFILE', '').lower() in ('1', 'true', 'yes')
+# Fraction of calls run under cProfile when sampling is on
+PROFILE_SAMPLE_RATE = float(os.getenv('DASH_PROFILE_SAMPLE_RATE', '0.05'))
+# Where dump() writes its files
+PROFILE_DUMP_DIR = os.getenv('DASH_PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'profiles'))
+# Recent durations kept per callback (per worker) for percentiles
+RECENT_SAMPLES = 200
+# How often a worker re-reads the shared on/off switches
+FLAG_REFRESH_SECONDS = 1.0
+# How often a worker publishes its counters to the shared cache
+PUBLISH_INTERVAL_SECONDS = 2.0
+# Counters of a worker that stopped publishing expire after this long
+STATS_TTL_SECONDS = 3600
+
+FLAGS_KEY = 'profiler:flags'
+WORKERS_KEY = 'profiler:workers'
+# Namespace bumped by reset(); counters from an older generation are ignored
+STATS_NAMESPACE = 'profiler:stats'
+
+_db_time = threading.local()
+_PROCESS_STARTED = time.time()
+
+
+class _SavedProfile:
+    """Lets pstats.Stats load a stats dict that went through the shared cache"""
+
+    def __init__(self, stats):
+        self.stats = dict(stats)
+
+    def create_stats(self):
+        pass
+
+
+class CallbackStats:
+    """Counters for one callback"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.db_calls = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+        self.profile = None  # merged pstats.Stats of sampled calls
+        self.profiled_calls = 0
+
+    def to_state(self):
+        """Plain-data copy for the shared cache"""
+        return {
+            'calls': self.calls, 'errors': self.errors, 'total_ms': self.total_ms,
+            'max_ms': self.max_ms, 'db_ms': self.db_ms, 'db_calls': self.db_calls,
+            'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out, 'recent': list(self.recent),
+            'profile': dict(self.profile.stats) if self.profile else None,
+            'profiled_calls': self.profiled_calls,
+        }
+
+    def merge(self, state):
+        """Add another worker's to_state() counters"""
+        for field in ('calls', 'errors', 'total_ms', 'db_ms', 'db_calls', 'bytes_in', 'bytes_out',
+                      'profiled_calls'):
+            setattr(self, field, getattr(self, field) + state[field])
+        self.max_ms = max(self.max_ms, state['max_ms'])
+        self.recent.extend(state['recent'])
+        if state['profile']:
+            profile = pstats.Stats(_SavedProfile(state['profile']))
+            if self.profile is None:
+                self.profile = profile
+            else:
+                self.profile.add(profile)
+
+    def to_dict(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 2) if recent else 0.0
+
+        return {
+            'callback': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 2),
+            'avg_ms': round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(self.max_ms, 2),
+            'db_ms': round(self.db_ms, 2),
+            'db_calls': self.db_calls,
+            'avg_kb_in': round(self.bytes_in / self.calls / 1024, 2) if self.calls else 0.0,
+            'avg_kb_out': round(self.bytes_out / self.calls / 1024, 2) if self.calls else 0.0,
+            'profiled_calls': self.profiled_calls,
+        }
+
+
+class CallbackProfiler:
+    """Collects CallbackStats for wrapped callbacks"""
+
+    def __init__(self, enabled=PROFILE_ENABLED, sample_rate=PROFILE_SAMPLE_RATE):
+        self.default_enabled = enabled
+        self.sample_rate = sample_rate
+        self.stats = {}          # this worker's counters since it last published a reset
+        self._lock = threading.Lock()
+        self._db_hooked = False
+        self._flags = (enabled, False)
+        self._flags_read_at = 0.0
+        self._slot = None        # this worker's key in the shared cache
+        self._generation = None  # STATS_NAMESPACE version self.stats belong to
+        self._published_at = 0.0
+        if enabled:
+            self.hook_database()
+
+    @property
+    def enabled(self):
+        return self._read_flags()[0]
+
+    @property
+    def sampling(self):
+        return self._read_flags()[1]
+
+    def _read_flags(self):
+        now = time.monotonic()
+        if now - self._flags_read_at >= FLAG_REFRESH_SECONDS:
+            self._flags_read_at = now
+            self._flags = tuple(shared_cache.get(FLAGS_KEY, (self.default_enabled, False)))
+            if self._flags[0]:
+                self.hook_database()
+        return self._flags
+
+    def set_enabled(self, enabled, sampling=None):
+        """Turn recording (and cProfile sampling) on or off in every worker"""
+        flags = (bool(enabled), self.sampling if sampling is None else bool(sampling))
+        shared_cache.set(FLAGS_KEY, flags, ttl=None)
+        self._flags, self._flags_read_at = flags, time.monotonic()
+        if flags[0]:
+            self.hook_database()
+
+    def reset(self):
+        """Discard the counters of every worker"""
+        shared_cache.bump(STATS_NAMESPACE)
+        shared_cache.set(f"{STATS_NAMESPACE}:started", time.time(), ttl=None)
+        with self._lock:
+            self.stats = {}
+            self._generation = shared_cache.version(STATS_NAMESPACE)
+
+    @property
+    def started(self):
+        """When the counters were last reset"""
+        return shared_cache.get(f"{STATS_NAMESPACE}:started") or _PROCESS_STARTED
+
+    # ============================================
+    # WRAPPING
+    # ============================================
+    def wrap(self, name, func):
+        """Return func wrapped with timing (a pass-through while disabled)"""
+        profiler = self
+
+        def profiled(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            _db_time.ms, _db_time.calls = 0.0, 0
+            profile = None
+            if profiler.sampling and random.random() < profiler.sample_rate:
+                profile = cProfile.Profile()
+            started = time.perf_counter()
+            failed = False
+            result = None
+            try:
+                if profile is not None:
+                    result = profile.runcall(func, *args, **kwargs)
+                else:
+                    result = func(*args, **kwargs)
+                return result
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000
+                profiler._record(name, elapsed, failed, args, result, profile)
+
+        profiled.__wrapped__ = func
+        return profiled
+
+    def _record(self, name, elapsed_ms, failed, args, result, profile):
+        bytes_in = _payload_size(args)
+        bytes_out = len(result) if isinstance(result, (str, bytes)) else _payload_size(result)
+        due = time.monotonic() - self._published_at >= PUBLISH_INTERVAL_SECONDS
+        if due or self._generation is None:
+            self._follow_resets()
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = CallbackStats(name)
+            stats.calls += 1
+            stats.errors += int(failed)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.recent.append(elapsed_ms)
+            stats.db_ms += getattr(_db_time, 'ms', 0.0)
+            stats.db_calls += getattr(_db_time, 'calls', 0)
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            if profile is not None:
+                stats.profiled_calls += 1
+                if stats.profile is None:
+                    stats.profile = pstats.Stats(profile)
+                else:
+                    stats.profile.add(profile)
+        if due:
+            self.publish()
+
+    def _follow_resets(self):
+        """Drop local counters if any worker reset since they were counted"""
+        generation = shared_cache.version(STATS_NAMESPACE)
+        with self._lock:
+            if generation != self._generation:
+                self.stats = {}
+                self._generation = generation
+        return generation
+
+    def publish(self):
+        """Write this worker's counters to its slot in the shared cache"""
+        self._published_at = time.monotonic()
+        generation = self._follow_resets()
+        with self._lock:
+            state = {name: stats.to_state() for name, stats in self.stats.items()}
+        if self._slot is None:
+            if not state:
+                return
+            try:
+                self._slot = shared_cache.backend.incr(WORKERS_KEY)
+            except Exception as e:
+                print(f"Error registering profiler worker: {e}")
+                return
+        shared_cache.set(f"{STATS_NAMESPACE}:{self._slot}",
+                         {'generation': generation, 'callbacks': state}, ttl=STATS_TTL_SECONDS)
+
+    def collect(self):
+        """Counters of every worker merged per callback"""
+        self.publish()
+        generation = shared_cache.version(STATS_NAMESPACE)
+        merged = {}
+        for slot in range(1, (shared_cache.get(WORKERS_KEY) or 0) + 1):
+            published = shared_cache.get(f"{STATS_NAMESPACE}:{slot}")
+            if not published or published['generation'] != generation:
+                continue
+            for name, state in published['callbacks'].items():
+                stats = merged.get(name)
+                if stats is None:
+                    stats = merged[name] = CallbackStats(name)
+                    stats.recent = deque()
+                stats.merge(state)
+        return merged
+
+    def hook_database(self):
+        """Time every PostgREST request so callbacks can report DB time"""
+        if self._db_hooked:
+            return
+        try:
+            from postgrest._sync import request_builder
+        except ImportError as e:
+            print(f"Callback profiler cannot time database calls: {e}")
+            return
+        for class_name in ('SyncQueryRequestBuilder', 'SyncSingleRequestBuilder',
+                           'SyncMaybeSingleRequestBuilder', 'SyncExplainRequestBuilder'):
+            cls = getattr(request_builder, class_name, None)
+            if cls is None or 'execute' not in vars(cls):
+                continue
+            cls.execute = _timed_execute(cls.execute)
+        self._db_hooked = True
+
+    # ============================================
+    # REPORTING
+    # ============================================
+    def snapshot(self):
+        """Per-callback stats across workers, slowest total first"""
+        rows = [stats.to_dict() for stats in self.collect().values()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def dump(self, directory=None):
+        """
+        Write a JSON summary and merged cProfile samples to disk
+
+        Returns:
+            list: Paths written
+        """
+        directory = directory or PROFILE_DUMP_DIR
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        merged = self.collect()
+        rows = sorted((stats.to_dict() for stats in merged.values()), key=lambda row: row['total_ms'], reverse=True)
+        summary_path = os.path.join(directory, f"callbacks_{stamp}.json")
+        with open(summary_path, 'w') as f:
+            json.dump({'started': self.started, 'dumped': time.time(), 'callbacks': rows}, f, indent=2)
+        paths = [summary_path]
+
+        profiles = [(name, stats.profile) for name, stats in merged.items() if stats.profile]
+        if profiles:
+            merged = pstats.Stats()
+            text = io.StringIO()
+            for name, profile in profiles:
+                merged.add(profile)
+                text.write(f"===== {name} =====\n")
+                profile.stream = text
+                profile.sort_stats('cumulative').print_stats(25)
+            prof_path = os.path.join(directory, f"callbacks_{stamp}.prof")
+            merged.dump_stats(prof_path)
+            text_path = os.path.join(directory, f"callbacks_{stamp}.txt")
+            with open(text_path, 'w') as f:
+                f.write(text.getvalue())
+            paths += [prof_path, text_path]
+        return paths
+
+
+def _timed_execute(execute):
+    def timed(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return execute(self, *args, **kwargs)
+        finally:
+            if hasattr(_db_time, 'ms'):
+                _db_time.ms += (time.perf_counter() - started) * 1000
+                _db_time.calls += 1
+    return timed
+
+
+def _payload_size(value):
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def install_callback_profiler(app):
+    """Wrap every server-side callback registered on app so far"""
+    for output_id, entry in app.callback_map.items():
+        func = entry.get('callback')
+        if func is None or getattr(func, '_profiled', False):
+            continue
+        # Dash keeps the user function's name on its wrapper
+        name = getattr(func, '__name__', None) or output_id
+        wrapped = callback_profiler.wrap(name, func)
+        wrapped._profiled = True
+        entry['callback'] = wrapped
+    return callback_profiler
+
+
+# Create global profiler instance
+callback_profiler = CallbackProfiler()
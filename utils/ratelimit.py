@@ -0,0 +1,169 @@
+"""
+Rate Limiting - token buckets and in-flight caps for the REST API
+
+Every request spends tokens from two buckets: one per bearer token and one
+per client IP (so rotating made-up tokens does not escape the limit). Each
+bucket refills at a steady rate up to a burst size; an empty bucket means
+429 with a Retry-After of the time until enough tokens are back.
+
+Independently, each endpoint class has a cap on requests in flight, so a
+handful of bulk exports cannot occupy every worker thread and every
+Supabase connection while cheap reads queue behind them.
+
+Limits are per API process; with several workers the effective limit is
+multiplied by the worker count.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Sustained requests per second and burst size
+TOKEN_RATE = float(os.getenv('API_RATE_PER_TOKEN', '10'))
+TOKEN_BURST = float(os.getenv('API_BURST_PER_TOKEN', '40'))
+IP_RATE = float(os.getenv('API_RATE_PER_IP', '30'))
+IP_BURST = float(os.getenv('API_BURST_PER_IP', '100'))
+# Buckets kept in memory; the least recently used are forgotten first
+MAX_BUCKETS = 50000
+
+# class -> (bucket tokens per request, max requests in flight)
+ENDPOINT_CLASSES = {
+    'read': (1, int(os.getenv('API_MAX_INFLIGHT_READ', '64'))),
+    'bulk': (5, int(os.getenv('API_MAX_INFLIGHT_BULK', '4'))),
+}
+
+# Paths that pull or write whole tables, or compute fleet-sized responses
+BULK_PREFIXES = ('/api/export/',)
+BULK_SUFFIXES = ('/bulk',)
+BULK_PATHS = ('/api/telemetry', '/api/telemetry/archive', '/api/satellites/positions')
+
+
+def endpoint_class(method, path):
+    """'bulk' for exports, bulk writes and full-table dumps, else 'read'"""
+    path = path.rstrip('/') or '/'
+    if path.startswith(BULK_PREFIXES) or path.endswith(BULK_SUFFIXES) or path in BULK_PATHS:
+        return 'bulk'
+    return 'read'
+
+
+class TokenBucket:
+    """Refills rate tokens per second up to burst"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def wait(self, cost, now):
+        """
+        Refill up to now and check for cost tokens without spending them
+
+        Returns:
+            float: 0 when available, otherwise seconds until cost tokens are available
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class RateLimiter:
+    """Per-token and per-IP buckets plus per-class in-flight counters"""
+
+    def __init__(self, token_rate=TOKEN_RATE, token_burst=TOKEN_BURST,
+                 ip_rate=IP_RATE, ip_burst=IP_BURST, classes=None):
+        self.limits = {'token': (token_rate, token_burst), 'ip': (ip_rate, ip_burst)}
+        self.classes = dict(classes or ENDPOINT_CLASSES)
+        self._buckets = OrderedDict()  # (kind, key) -> TokenBucket
+        self._in_flight = {name: 0 for name in self.classes}
+        self._lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.started = time.time()
+        self.counters = {name: {'allowed': 0, 'limited_token': 0, 'limited_ip': 0,
+                                'rejected_in_flight': 0, 'peak_in_flight': 0}
+                         for name in self.classes}
+
+    def _bucket(self, kind, key, now):
+        bucket = self._buckets.get((kind, key))
+        if bucket is None:
+            rate, burst = self.limits[kind]
+            bucket = self._buckets[(kind, key)] = TokenBucket(rate, burst, now)
+            while len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((kind, key))
+        return bucket
+
+    def acquire(self, endpoint, ip, token=None):
+        """
+        Admit a request: spend bucket tokens and take an in-flight slot
+
+        Returns:
+            float: 0 when admitted (call release(endpoint) afterwards),
+            otherwise the Retry-After in seconds
+        """
+        cost, max_in_flight = self.classes[endpoint]
+        counters = self.counters[endpoint]
+        now = time.monotonic()
+        with self._lock:
+            if self._in_flight[endpoint] >= max_in_flight:
+                counters['rejected_in_flight'] += 1
+                return 1.0
+            checks = [('ip', ip)]
+            if token:
+                checks.insert(0, ('token', hashlib.sha1(token.encode('utf-8')).hexdigest()))
+            # Spend only when every bucket admits, so a request the IP bucket
+            # rejects does not drain the token's budget (or the reverse)
+            buckets = [(kind, self._bucket(kind, key, now)) for kind, key in checks]
+            waits = [(kind, bucket.wait(cost, now)) for kind, bucket in buckets]
+            limited = [(kind, wait) for kind, wait in waits if wait]
+            if limited:
+                counters[f'limited_{limited[0][0]}'] += 1
+                return max(wait for _, wait in limited)
+            for _, bucket in buckets:
+                bucket.tokens -= cost
+            self._in_flight[endpoint] += 1
+            counters['allowed'] += 1
+            counters['peak_in_flight'] = max(counters['peak_in_flight'], self._in_flight[endpoint])
+            return 0.0
+
+    def release(self, endpoint):
+        with self._lock:
+            self._in_flight[endpoint] = max(0, self._in_flight[endpoint] - 1)
+
+    def snapshot(self):
+        """Counters, current in-flight requests and limits per endpoint class"""
+        with self._lock:
+            return {
+                'since': self.started,
+                'buckets': len(self._buckets),
+                'limits': {
+                    'per_token': {'rate': self.limits['token'][0], 'burst': self.limits['token'][1]},
+                    'per_ip': {'rate': self.limits['ip'][0], 'burst': self.limits['ip'][1]},
+                },
+                'classes': {
+                    name: {
+                        **self.counters[name],
+                        'in_flight': self._in_flight[name],
+                        'max_in_flight': self.classes[name][1],
+                        'cost': self.classes[name][0],
+                    } for name in self.classes
+                },
+            }
+
+
+def retry_after_header(seconds):
+    """Whole seconds for a Retry-After header (at least 1)"""
+    return str(max(1, math.ceil(seconds)))
+
+
+# Create global rate limiter instance
+rate_limiter = RateLimiter()
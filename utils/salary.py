@@ -0,0 +1,181 @@
+"""
+Salary Analytics - incrementally maintained per-department salary aggregates
+
+Each department keeps a running count, sum and sorted salary list, so the
+department average, minimum and maximum are O(1). Writes made through
+Database are applied from its change notifications (O(log n) search plus
+list insert/remove per changed row), so department stats and the
+above-average query are cheap reads, cached until the next change. Other workers' writes are picked up through TableSync.
+Salary grades are not computed here: the generate_salary_report procedure
+owns them (see Database.get_salary_report).
+"""
+import bisect
+import threading
+
+from config.database import db
+from utils.table_sync import TableSync
+
+# Reload from the database at least this often
+SALARY_MAX_AGE_SECONDS = 60
+
+
+def _salary(row):
+    try:
+        return float(row.get('salary') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class DepartmentSalaries:
+    """Running aggregates for one department"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.salaries = []  # ascending
+
+    def add(self, salary):
+        self.count += 1
+        self.total += salary
+        bisect.insort(self.salaries, salary)
+
+    def remove(self, salary):
+        index = bisect.bisect_left(self.salaries, salary)
+        if index < len(self.salaries) and self.salaries[index] == salary:
+            del self.salaries[index]
+            self.count -= 1
+            self.total -= salary
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class SalaryAnalytics:
+    """Per-department salary aggregates kept in step with employee writes"""
+
+    def __init__(self, max_age=SALARY_MAX_AGE_SECONDS):
+        self.sync = TableSync(('employee', 'department'), max_age)
+        self.rows = {}         # emp_id -> employee row
+        self.departments = {}  # dept_id -> DepartmentSalaries
+        self.dept_names = {}
+        self.version = 0
+        self._cache = {}       # read name -> (version, result)
+        self.lock = threading.RLock()
+        db.on_change('employee', self._on_employee_change)
+        db.on_change('department', self._on_department_change)
+
+    def ensure_fresh(self):
+        self.sync.refresh(self.reload)
+
+    def reload(self):
+        """Fetch every employee and department and rebuild the aggregates"""
+        versions = self.sync.current()
+        rows = {}
+        for page in db.iter_table('employee', 'emp_id'):
+            for row in page:
+                rows[row['emp_id']] = row
+        departments = db.get_all_departments() or []
+        with self.lock:
+            self.rows = {}
+            self.departments = {}
+            self.dept_names = {d.get('dept_id'): d.get('dept_name') for d in departments}
+            for emp_id, row in rows.items():
+                self._add(emp_id, row)
+            self.sync.mark_loaded(versions)
+            self.version += 1
+
+    def _add(self, emp_id, row):
+        self.rows[emp_id] = row
+        dept_id = row.get('dept_id')
+        if dept_id is not None:
+            self.departments.setdefault(dept_id, DepartmentSalaries()).add(_salary(row))
+
+    def _remove(self, emp_id):
+        row = self.rows.pop(emp_id, None)
+        if row is None or row.get('dept_id') is None:
+            return
+        stats = self.departments.get(row['dept_id'])
+        if stats is not None:
+            stats.remove(_salary(row))
+            if not stats.count:
+                del self.departments[row['dept_id']]
+
+    def _on_employee_change(self, table, op, rows):
+        with self.lock:
+            if not self.sync.loaded_at:
+                return
+            for row in rows:
+                emp_id = row.get('emp_id')
+                if emp_id is None:
+                    continue
+                old = self.rows.get(emp_id)
+                self._remove(emp_id)
+                if op != 'delete':
+                    self._add(emp_id, {**old, **row} if old else dict(row))
+            self.sync.advance('employee')
+            self.version += 1
+
+    def _on_department_change(self, table, op, rows):
+        with self.lock:
+            for row in rows:
+                if op == 'delete':
+                    self.dept_names.pop(row.get('dept_id'), None)
+                elif 'dept_name' in row:
+                    self.dept_names[row.get('dept_id')] = row.get('dept_name')
+            self.sync.advance('department')
+            self.version += 1
+
+    def _cached(self, name, build):
+        self.ensure_fresh()
+        with self.lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == self.version:
+                return cached[1]
+            result = build()
+            self._cache[name] = (self.version, result)
+            return result
+
+    # ============================================
+    # READS
+    # ============================================
+    def department_stats(self):
+        """Count, total, average, min and max salary per department"""
+        def build():
+            return [{
+                'dept_id': dept_id,
+                'dept_name': self.dept_names.get(dept_id),
+                'employee_count': stats.count,
+                'total_salary': round(stats.total, 2),
+                'avg_salary': round(stats.average, 2),
+                'min_salary': stats.salaries[0],
+                'max_salary': stats.salaries[-1],
+            } for dept_id, stats in sorted(self.departments.items(), key=lambda item: (item[0] is None, item[0]))]
+        return [dict(row) for row in self._cached('department_stats', build)]
+
+    def above_average(self):
+        """Employees earning more than their department's average salary"""
+        def build():
+            result = []
+            for emp_id in sorted(self.rows):
+                row = self.rows[emp_id]
+                stats = self.departments.get(row.get('dept_id'))
+                if stats is None:
+                    continue
+                salary = _salary(row)
+                if salary > stats.average:
+                    result.append({
+                        'emp_id': emp_id,
+                        'emp_name': row.get('emp_name'),
+                        'position': row.get('position'),
+                        'dept_id': row.get('dept_id'),
+                        'dept_name': self.dept_names.get(row.get('dept_id')),
+                        'salary': salary,
+                        'dept_avg': round(stats.average, 2),
+                    })
+            return result
+        return [dict(row) for row in self._cached('above_average', build)]
+
+
+# Create global salary analytics instance
+salary_analytics = SalaryAnalytics()
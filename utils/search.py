@@ -0,0 +1,451 @@
+"""
+Search - in-memory full-text index for missions, employees and research facts
+
+Each source is held in an inverted index (token -> postings) that supports
+exact, prefix and one-edit fuzzy matches with idf-weighted ranking. Indexes
+are reloaded through TableSync whenever Database.table_version changes (in
+any worker) or SEARCH_MAX_AGE_SECONDS passes. A reload builds the new index
+outside the lock and swaps it in, so searches keep using the previous index
+meanwhile; a reload that finds no changed rows keeps the current index.
+
+Typeahead suggestions come from a prefix trie over each source's display
+names, rebuilt alongside the index only when a name changed. Suggestion
+and search results are kept in an LRU cache keyed by the normalized query
+and the index generation, so repeated prefixes never touch the index and a
+write invalidates them.
+"""
+import bisect
+import math
+import re
+import threading
+from collections import OrderedDict
+
+from config.database import db
+from utils.table_sync import TableSync
+
+# Re-sync an index at least this often even without local writes
+SEARCH_MAX_AGE_SECONDS = 30
+# Prefix matches considered per query token
+MAX_PREFIX_EXPANSIONS = 50
+# Tokens shorter than this are matched exactly only
+MIN_FUZZY_LENGTH = 4
+
+# Largest suggestion limit the API accepts
+SUGGEST_MAX_LIMIT = 25
+# Completions kept per trie node (enough for the largest limit)
+TRIE_TOP_K = SUGGEST_MAX_LIMIT
+# Longest prefix looked up in the trie
+MAX_PREFIX_LENGTH = 64
+# Cached (source, query) result lists
+RESULT_CACHE_SIZE = 2048
+
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a value"""
+    if text is None:
+        return []
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _deletes(token):
+    """The token with each single character removed"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitution or transposition"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class InvertedIndex:
+    """Token postings with a sorted vocabulary (prefix scans) and a delete map (fuzzy)"""
+
+    def __init__(self):
+        self.postings = {}       # token -> {doc_id: weight}
+        self.doc_tokens = {}     # doc_id -> {token: weight}
+        self.docs = {}           # doc_id -> row
+        self.fingerprints = {}   # doc_id -> content hash
+        self.delete_map = {}     # token with one char removed -> {tokens}
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def upsert(self, doc_id, fields, row):
+        """
+        Index (or re-index) one document
+
+        Args:
+            doc_id: Hashable document key
+            fields: Iterable of (text, boost) pairs to tokenize
+            row: Row returned for matches
+        """
+        weights = {}
+        for text, boost in fields:
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0) + boost
+        with self.lock:
+            self._remove_postings(doc_id)
+            for token, weight in weights.items():
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    self._vocabulary_dirty = True
+                    for deleted in _deletes(token):
+                        self.delete_map.setdefault(deleted, set()).add(token)
+                postings[doc_id] = weight
+            self.doc_tokens[doc_id] = weights
+            self.docs[doc_id] = row
+
+    def remove(self, doc_id):
+        with self.lock:
+            self._remove_postings(doc_id)
+            self.docs.pop(doc_id, None)
+            self.fingerprints.pop(doc_id, None)
+
+    def _remove_postings(self, doc_id):
+        for token in self.doc_tokens.pop(doc_id, {}):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[token]
+                self._vocabulary_dirty = True
+                for deleted in _deletes(token):
+                    bucket = self.delete_map.get(deleted)
+                    if bucket:
+                        bucket.discard(token)
+                        if not bucket:
+                            del self.delete_map[deleted]
+
+    def sync(self, rows, key, fields):
+        """
+        Bring the index in line with a full row set, touching only changed rows
+
+        Args:
+            rows: Current rows of the source
+            key: row -> doc_id
+            fields: row -> [(text, boost), ...]
+
+        Returns:
+            tuple: (documents re-indexed, documents removed)
+        """
+        with self.lock:
+            seen = set()
+            changed = 0
+            for row in rows:
+                doc_id = key(row)
+                seen.add(doc_id)
+                fingerprint = hash(repr(sorted(row.items(), key=lambda item: item[0])))
+                if self.fingerprints.get(doc_id) == fingerprint:
+                    continue
+                self.upsert(doc_id, fields(row), row)
+                self.fingerprints[doc_id] = fingerprint
+                changed += 1
+            stale = [doc_id for doc_id in self.docs if doc_id not in seen]
+            for doc_id in stale:
+                self.remove(doc_id)
+            return changed, len(stale)
+
+    def vocabulary(self):
+        with self.lock:
+            if self._vocabulary_dirty:
+                self._vocabulary = sorted(self.postings)
+                self._vocabulary_dirty = False
+            return self._vocabulary
+
+    def expand(self, term, prefix=True, fuzzy=True):
+        """Index tokens matching a query term, as {token: match weight}"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = EXACT_WEIGHT
+        if prefix:
+            vocabulary = self.vocabulary()
+            start = bisect.bisect_left(vocabulary, term)
+            for token in vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not token.startswith(term):
+                    break
+                matches.setdefault(token, PREFIX_WEIGHT)
+        if fuzzy and not matches and len(term) >= MIN_FUZZY_LENGTH:
+            candidates = set(self.delete_map.get(term, ()))
+            for deleted in _deletes(term):
+                if deleted in self.postings:
+                    candidates.add(deleted)
+                candidates.update(self.delete_map.get(deleted, ()))
+            for token in candidates:
+                if _within_one_edit(term, token):
+                    matches.setdefault(token, FUZZY_WEIGHT)
+        return matches
+
+    def search(self, query, limit=20, prefix=True, fuzzy=True):
+        """
+        Rank documents for a free-text query
+
+        Documents matching more query terms rank first, then by summed
+        idf-weighted scores.
+
+        Returns:
+            list: (doc_id, score) pairs, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            total = len(self.docs) or 1
+            scores = {}
+            coverage = {}
+            for term in terms:
+                matched = set()
+                for token, match_weight in self.expand(term, prefix, fuzzy).items():
+                    postings = self.postings[token]
+                    idf = math.log(1 + total / len(postings))
+                    for doc_id, weight in postings.items():
+                        scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * match_weight
+                        matched.add(doc_id)
+                for doc_id in matched:
+                    coverage[doc_id] = coverage.get(doc_id, 0) + 1
+            ranked = sorted(scores, key=lambda d: (coverage[d], scores[d]), reverse=True)
+            return [(doc_id, round(scores[doc_id], 4)) for doc_id in ranked[:limit]]
+
+
+class PrefixTrie:
+    """
+    Character trie over display names with the best completions stored per node
+
+    Every word start of a name is inserted, so 'orb' completes
+    'Mars Orbiter Mission'. Lookups cost O(len(prefix)).
+    """
+
+    def __init__(self, top_k=TRIE_TOP_K):
+        self.top_k = top_k
+        self.root = {}
+        self.labels = {}  # doc_id -> label inserted
+
+    def insert(self, label, doc_id):
+        self.labels[doc_id] = label
+        words = tokenize(label)
+        if not words:
+            return
+        phrase = ' '.join(words)
+        starts = [0] + [i + 1 for i, ch in enumerate(phrase) if ch == ' ']
+        for position, start in enumerate(starts):
+            # Earlier word positions and shorter names rank first
+            entry = (position, len(phrase), label, doc_id)
+            node = self.root
+            for ch in phrase[start:start + MAX_PREFIX_LENGTH]:
+                node = node.setdefault(ch, {})
+                top = node.setdefault('', [])
+                if any(existing[3] == doc_id for existing in top):
+                    continue
+                bisect.insort(top, entry)
+                del top[self.top_k:]
+
+    def complete(self, prefix, limit=TRIE_TOP_K):
+        """Best (label, doc_id) completions for a normalized prefix"""
+        node = self.root
+        for ch in prefix[:MAX_PREFIX_LENGTH]:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return [(label, doc_id) for _, _, label, doc_id in node.get('', [])[:limit]]
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache"""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def normalize_query(text):
+    """Lowercase, tokenized form of a query used for trie lookups and cache keys"""
+    return ' '.join(tokenize(text))
+
+
+def _mission_key(row):
+    return (row.get('mission_id'), row.get('pad_id'), row.get('loc_id'))
+
+
+def _mission_fields(row):
+    return [(row.get('mission_name'), 3), (row.get('objective'), 1), (row.get('status'), 1)]
+
+
+def _employee_fields(row):
+    return [(row.get('emp_name'), 3), (row.get('position'), 2), (row.get('dept_name'), 1)]
+
+
+def _fact_fields(row):
+    return [(row.get('fact_title'), 3), (row.get('description'), 1),
+            (row.get('category'), 1), (row.get('username'), 1)]
+
+
+# name -> (table whose version drives refresh, loader, key, fields)
+SEARCH_SOURCES = {
+    'missions': ('mission', lambda: db.get_all_missions(), _mission_key, _mission_fields),
+    'employees': ('employee', lambda: db.get_all_employees(), lambda r: r.get('emp_id'), _employee_fields),
+    'research_facts': ('research_fact', lambda: db.get_all_research_facts(),
+                       lambda r: (r.get('fact_id'), r.get('user_id')), _fact_fields),
+}
+
+
+# name -> column shown as a typeahead suggestion
+SUGGEST_LABELS = {
+    'missions': 'mission_name',
+    'employees': 'emp_name',
+    'research_facts': 'fact_title',
+}
+
+
+class SearchService:
+    """Keeps one InvertedIndex and PrefixTrie per source in step with the database"""
+
+    def __init__(self, max_age=SEARCH_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self.indexes = {name: InvertedIndex() for name in SEARCH_SOURCES}
+        self.tries = {name: PrefixTrie() for name in SEARCH_SOURCES}
+        self.cache = LRUCache()
+        self.syncs = {name: TableSync((table,), max_age) for name, (table, *_) in SEARCH_SOURCES.items()}
+        # Bumped whenever an index actually changes; part of every cache key
+        self._generations = {name: 0 for name in SEARCH_SOURCES}
+        self.lock = threading.Lock()
+
+    def index_version(self, name):
+        """Table version the index was last synced at (None before first sync)"""
+        versions = self.syncs[name].versions
+        return versions[SEARCH_SOURCES[name][0]] if versions else None
+
+    def ensure_fresh(self, name):
+        """Re-sync a source if its table changed (in any worker) or the index is too old"""
+        self.syncs[name].refresh(lambda: self.reload(name))
+
+    def reload(self, name):
+        """Build a source's index and trie outside the lock, then swap them in"""
+        _, loader, key, fields = SEARCH_SOURCES[name]
+        sync = self.syncs[name]
+        versions = sync.current()
+        index = InvertedIndex()
+        index.sync(loader() or [], key, fields)
+        current = self.indexes[name]
+        if sync.versions is not None and index.fingerprints == current.fingerprints:
+            sync.mark_loaded(versions)  # nothing changed: keep the index and cached results
+            return
+        trie = self._build_trie(name, index, self.tries[name])
+        with self.lock:
+            self.indexes[name] = index
+            self.tries[name] = trie
+            self._generations[name] += 1
+            sync.mark_loaded(versions)
+
+    def _build_trie(self, name, index, trie):
+        """The current trie if no display name changed, else one built for index"""
+        label_column = SUGGEST_LABELS[name]
+        labels = {doc_id: str(row[label_column]) for doc_id, row in index.docs.items()
+                  if row.get(label_column)}
+        if labels == trie.labels:
+            return trie
+        rebuilt = PrefixTrie()
+        for doc_id, label in labels.items():
+            rebuilt.insert(label, doc_id)
+        return rebuilt
+
+    def search(self, name, query, limit=20):
+        """Rows of a source best matching query, each with a '_score'"""
+        self.ensure_fresh(name)
+        with self.lock:
+            index, generation = self.indexes[name], self._generations[name]
+        cache_key = ('search', name, normalize_query(query), limit, generation)
+        results = self.cache.get(cache_key)
+        if results is None:
+            results = []
+            for doc_id, score in index.search(query, limit=limit):
+                row = index.docs.get(doc_id)
+                if row is not None:
+                    results.append({**row, '_score': score})
+            self.cache.put(cache_key, results)
+        return [dict(row) for row in results]
+
+    def suggest(self, query, sources=None, limit=8):
+        """
+        Typeahead completions for a partial query
+
+        Args:
+            query: Text typed so far
+            sources: Source names to complete from (default: all)
+            limit: Maximum suggestions per source
+
+        Returns:
+            list: {'label', 'source', 'key'} dicts, best first per source
+        """
+        prefix = normalize_query(query)
+        if not prefix:
+            return []
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+        # Keep a trailing space so 'mars ' only completes the next word
+        if query.endswith(' '):
+            prefix += ' '
+        suggestions = []
+        for name in sources or SEARCH_SOURCES:
+            self.ensure_fresh(name)
+            with self.lock:
+                trie, generation = self.tries[name], self._generations[name]
+            cache_key = ('suggest', name, prefix, limit, generation)
+            completions = self.cache.get(cache_key)
+            if completions is None:
+                completions = trie.complete(prefix, limit)
+                self.cache.put(cache_key, completions)
+            suggestions.extend({'label': label, 'source': name, 'key': doc_id}
+                               for label, doc_id in completions)
+        return suggestions
+
+
+# Create global search instance
+search_service = SearchService()
@@ -0,0 +1,250 @@
+"""
+Signed Sessions - compact HMAC session tokens with an optional server-side store
+
+The browser's session-store holds one short string instead of the raw
+Supabase access token: base64url(JSON claims) + "." + base64url(HMAC-SHA256).
+Claims carry the user id, role, email and an expiry, so every callback can
+authenticate and authorize with a signature check and no database access.
+A token cannot be edited in the browser without breaking its signature.
+
+With SESSION_STORE=memory or SESSION_STORE=sqlite the token only carries a
+session id and the claims live server-side: sessions can then be revoked
+(logout, role change) before they expire. The SQLite store is a local file,
+so every gunicorn worker on the host sees the same sessions.
+
+SESSION_SECRET (or SECRET_KEY) is required: every worker must sign with the
+same key, so startup fails without one rather than issuing tokens that no
+other worker, or the next restart, can verify.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lifetime of a session token
+SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', str(8 * 3600)))
+# '' (stateless signed tokens), 'memory' or 'sqlite'
+SESSION_STORE = os.getenv('SESSION_STORE', '').lower()
+SESSION_DB_PATH = os.getenv('SESSION_DB_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), '.sessions.sqlite3'))
+# Upper bound on sessions held by the in-memory store
+SESSION_MEMORY_MAX = 10000
+
+_secret = os.getenv('SESSION_SECRET') or os.getenv('SECRET_KEY')
+if not _secret:
+    raise RuntimeError("SESSION_SECRET (or SECRET_KEY) must be set to sign session tokens")
+SESSION_SECRET = _secret.encode('utf-8')
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(payload):
+    return _b64encode(hmac.new(SESSION_SECRET, payload.encode('ascii'), hashlib.sha256).digest())
+
+
+def sign_claims(claims):
+    """Encode and sign a claims dict; 'exp' is required"""
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{payload}.{_signature(payload)}"
+
+
+@lru_cache(maxsize=4096)
+def _decode(token):
+    # Pure function of the token, so repeat checks of the same session are a dict lookup
+    try:
+        payload, signature = token.split('.', 1)
+        if not hmac.compare_digest(signature, _signature(payload)):
+            return None
+        claims = json.loads(_b64decode(payload))
+        return claims if isinstance(claims, dict) else None
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
+def verify_token(token):
+    """
+    Claims of a valid, unexpired token
+
+    Returns:
+        dict: Claims, or None when the signature or expiry check fails
+    """
+    if not isinstance(token, str) or '.' not in token:
+        return None
+    claims = _decode(token)
+    if not claims or claims.get('exp', 0) <= time.time():
+        return None
+    return dict(claims)
+
+
+# ============================================
+# SERVER-SIDE STORES
+# ============================================
+class MemorySessionStore:
+    """LRU of sessions in this process"""
+
+    def __init__(self, max_entries=SESSION_MEMORY_MAX):
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # sid -> claims
+        self._lock = threading.Lock()
+
+    def put(self, sid, claims):
+        with self._lock:
+            self._sessions[sid] = claims
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def get(self, sid):
+        with self._lock:
+            claims = self._sessions.get(sid)
+            if claims is None:
+                return None
+            if claims.get('exp', 0) <= time.time():
+                del self._sessions[sid]
+                return None
+            self._sessions.move_to_end(sid)
+            return dict(claims)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for sid in [sid for sid, claims in self._sessions.items() if claims.get('uid') == user_id]:
+                del self._sessions[sid]
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file shared by every worker on the host"""
+
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session ("
+            "sid TEXT PRIMARY KEY, user_id TEXT, claims TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS session_user ON session (user_id)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, sid, claims):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO session (sid, user_id, claims, expires) VALUES (?, ?, ?, ?)",
+            (sid, claims.get('uid'), json.dumps(claims), claims['exp']),
+        )
+        if now - self._last_purge > 600:
+            self._last_purge = now
+            conn.execute("DELETE FROM session WHERE expires <= ?", (now,))
+
+    def get(self, sid):
+        row = self._conn().execute(
+            "SELECT claims FROM session WHERE sid = ? AND expires > ?", (sid, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM session WHERE sid = ?", (sid,))
+
+    def delete_user(self, user_id):
+        self._conn().execute("DELETE FROM session WHERE user_id = ?", (user_id,))
+
+
+def _create_store(kind):
+    try:
+        if kind == 'memory':
+            return MemorySessionStore()
+        if kind == 'sqlite':
+            return SQLiteSessionStore()
+    except Exception as e:
+        print(f"Error opening {kind} session store, falling back to stateless tokens: {e}")
+    return None
+
+
+# ============================================
+# SESSIONS
+# ============================================
+class SessionManager:
+    """Issues and validates session tokens, backed by an optional store"""
+
+    def __init__(self, store=None, ttl=SESSION_TTL_SECONDS):
+        self.store = store
+        self.ttl = ttl
+
+    def issue(self, user_id, role='user', email=None):
+        """
+        Create a session for a signed-in user
+
+        Returns:
+            str: Signed token for the browser's session-store
+        """
+        claims = {'uid': user_id, 'role': (role or 'user').lower(), 'email': email,
+                  'exp': int(time.time() + self.ttl)}
+        if self.store is None:
+            return sign_claims(claims)
+        sid = secrets.token_urlsafe(16)
+        self.store.put(sid, claims)
+        return sign_claims({'sid': sid, 'exp': claims['exp']})
+
+    def claims(self, token):
+        """Claims for a token, or None if it is forged, expired or revoked"""
+        claims = verify_token(token)
+        if not claims or 'sid' not in claims:
+            return claims
+        if self.store is None:
+            return None
+        try:
+            return self.store.get(claims['sid'])
+        except Exception as e:
+            print(f"Error reading session store: {e}")
+            return None
+
+    def end(self, token):
+        """Revoke a session (a no-op for stateless tokens, which just expire)"""
+        claims = verify_token(token)
+        if claims and 'sid' in claims and self.store is not None:
+            try:
+                self.store.delete(claims['sid'])
+            except Exception as e:
+                print(f"Error deleting session: {e}")
+
+    def end_user_sessions(self, user_id):
+        """Revoke every stored session of a user, e.g. after a role change"""
+        if self.store is not None:
+            try:
+                self.store.delete_user(user_id)
+            except Exception as e:
+                print(f"Error deleting sessions for {user_id}: {e}")
+
+
+# Create global session manager instance
+session_manager = SessionManager(_create_store(SESSION_STORE))
@@ -0,0 +1,188 @@
+"""
+Analytics Snapshots - periodically materialized analytics datasets
+
+A daemon thread refreshes each dataset on its own interval (sooner when one
+of its source tables is written through Database, but never more often than
+SNAPSHOT_MIN_INTERVAL_SECONDS). Pages and callbacks read the latest snapshot
+instead of querying, so database load is bounded by the schedule rather than
+by how many people have the analytics page open.
+
+Snapshots and their versions live in the shared cache, so every worker
+serves the same versions and a client polling through different workers
+only downloads data that changed. Each worker runs the scheduler, but a
+refresh is claimed with SharedCache.add: one worker reloads a dataset while
+the others see it is no longer due. Workers keep the data of the version
+they last read, so polling reads only the small metadata entry.
+
+The scheduler is started by the server (see app.py) rather than on import,
+so scripts and tests that import the app do not poll the database.
+"""
+import hashlib
+import json
+import threading
+import time
+
+from config.database import db
+from utils.cache import shared_cache
+
+# Scheduler wake-up period
+SNAPSHOT_TICK_SECONDS = 1
+# Lower bound between refreshes of one dataset, even after writes
+SNAPSHOT_MIN_INTERVAL_SECONDS = 5
+# A refresh claim expires after this long (a worker that died mid-refresh)
+SNAPSHOT_CLAIM_SECONDS = 300
+
+# name -> (loader, refresh interval in seconds, tables that trigger an early refresh)
+SNAPSHOT_DATASETS = {
+    'department_summary': (lambda: db.get_department_summary(), 60, ('department', 'employee', 'satellite')),
+    'employee_hierarchy': (lambda: db.get_employee_hierarchy(), 60, ('employee', 'department')),
+    'salary_report': (lambda: db.get_salary_report(), 60, ('employee', 'department')),
+    'above_average': (lambda: db.get_employees_above_avg_salary(), 60, ('employee', 'department')),
+    'mission_stats': (lambda: db.get_mission_statistics(), 120, ('mission',)),
+    'satellite_stats': (lambda: db.get_satellite_statistics(), 120, ('satellite',)),
+}
+
+
+def _meta_key(name):
+    return f"snapshot:meta:{name}"
+
+
+def _data_key(name, version):
+    return f"snapshot:data:{name}:{version}"
+
+
+def _empty_meta(name):
+    return {'name': name, 'version': 0, 'refreshed_at': None, 'duration': None,
+            'error': None, 'digest': None, 'table_versions': None}
+
+
+class SnapshotScheduler:
+    """Refreshes SNAPSHOT_DATASETS on a background thread, sharing the results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_locks = {name: threading.Lock() for name in SNAPSHOT_DATASETS}
+        self._local = {}  # name -> (version, data) last read by this worker
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the scheduler thread (no-op if it is already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='analytics-snapshots', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for name in SNAPSHOT_DATASETS:
+                if self._stop.is_set():
+                    break
+                self.refresh_if_due(name)
+            self._stop.wait(SNAPSHOT_TICK_SECONDS)
+
+    def _table_versions(self, name):
+        return tuple(db.table_version(table) for table in SNAPSHOT_DATASETS[name][2])
+
+    def _meta(self, name):
+        return shared_cache.get(_meta_key(name)) or _empty_meta(name)
+
+    def _is_due(self, name):
+        meta = self._meta(name)
+        if meta['refreshed_at'] is None:
+            return True
+        age = time.time() - meta['refreshed_at']
+        interval = SNAPSHOT_DATASETS[name][1]
+        if age >= interval or (meta['error'] and age >= SNAPSHOT_MIN_INTERVAL_SECONDS):
+            return True
+        return age >= SNAPSHOT_MIN_INTERVAL_SECONDS and meta['table_versions'] != self._table_versions(name)
+
+    def refresh_if_due(self, name):
+        """Refresh a dataset if it is due and no other worker is refreshing it"""
+        if not self._is_due(name):
+            return False
+        claim = f"snapshot:claim:{name}"
+        if not shared_cache.add(claim, time.time(), SNAPSHOT_CLAIM_SECONDS):
+            return False
+        try:
+            # Another worker may have finished a refresh since the check
+            if not self._is_due(name):
+                return False
+            self.refresh(name)
+            return True
+        finally:
+            shared_cache.delete(claim)
+
+    def refresh(self, name):
+        """Reload one dataset now; the version only moves when the data changed"""
+        loader = SNAPSHOT_DATASETS[name][0]
+        with self._refresh_locks[name]:
+            table_versions = self._table_versions(name)
+            started = time.time()
+            meta = self._meta(name)
+            try:
+                data = loader()
+                digest = hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+                if digest != meta['digest']:
+                    previous = meta['version']
+                    meta.update(version=previous + 1, digest=digest)
+                    shared_cache.set(_data_key(name, meta['version']), data, ttl=None)
+                    shared_cache.delete(_data_key(name, previous))
+                meta['error'] = None
+            except Exception as e:
+                print(f"Error refreshing {name} snapshot: {e}")
+                meta['error'] = str(e)
+            meta.update(table_versions=table_versions, duration=round(time.time() - started, 3),
+                        refreshed_at=time.time())
+            shared_cache.set(_meta_key(name), meta, ttl=None)
+
+    def get(self, name):
+        """Latest snapshot of a dataset as a dict (data is None until first refresh)"""
+        meta = self._meta(name)
+        version = meta['version']
+        local = self._local.get(name)
+        if local is not None and local[0] == version:
+            data = local[1]
+        else:
+            data = shared_cache.get(_data_key(name, version)) if version else None
+            self._local[name] = (version, data)
+        return {
+            'name': name,
+            'version': version,
+            'data': data,
+            'refreshed_at': meta['refreshed_at'],
+            'duration': meta['duration'],
+            'error': meta['error'],
+        }
+
+    def versions(self):
+        """{name: version} for cheap change detection (the same in every worker)"""
+        return {name: self._meta(name)['version'] for name in SNAPSHOT_DATASETS}
+
+
+def freshness_label(snapshot):
+    """Short 'updated N ago' text for a snapshot dict"""
+    if not snapshot or snapshot.get('refreshed_at') is None:
+        return "Preparing snapshot…"
+    age = int(time.time() - snapshot['refreshed_at'])
+    if age < 60:
+        ago = f"{age}s ago"
+    elif age < 3600:
+        ago = f"{age // 60}m ago"
+    else:
+        ago = f"{age // 3600}h ago"
+    text = f"Snapshot v{snapshot['version']} · updated {ago}"
+    if snapshot.get('error'):
+        text += " · last refresh failed"
+    return text
+
+
+# Create global scheduler instance
+snapshot_scheduler = SnapshotScheduler()
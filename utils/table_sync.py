@@ -0,0 +1,66 @@
+"""
+Table Sync - keeps an in-process index in step with the tables it is built from
+
+An index built from whole tables records the table versions (see
+Database.table_version) it reflects. A version it has not seen means another
+worker wrote, and the index reloads; so does an index older than max_age
+(writes outside the app). Writes made through this process's Database are
+applied by the index's change listener, which then calls advance() for the
+table: the recorded version only moves forward if this write is the only one
+since, so a concurrent write from another worker still forces a reload.
+
+Reloads fetch outside the index's own lock. One caller reloads while the
+others keep reading the previous data (or wait, before the first load).
+"""
+import threading
+import time
+
+from config.database import db
+
+
+class TableSync:
+    """Table versions and load time of an index built from some tables"""
+
+    def __init__(self, tables, max_age):
+        self.tables = tuple(tables)
+        self.max_age = max_age
+        self.versions = None  # {table: version} the index reflects
+        self.loaded_at = 0.0
+        self._reload_lock = threading.Lock()
+
+    def current(self):
+        """Current versions of the tables"""
+        return {table: db.table_version(table) for table in self.tables}
+
+    def is_stale(self):
+        return (time.time() - self.loaded_at >= self.max_age
+                or self.versions != self.current())
+
+    def mark_loaded(self, versions):
+        """Record a finished load (versions read before its fetch started)"""
+        self.versions = dict(versions)
+        self.loaded_at = time.time()
+
+    def advance(self, table):
+        """
+        Account for a write this process applied to the index
+
+        Call from a change listener (after Database bumped the version).
+        """
+        if self.versions is None:
+            return
+        version = db.table_version(table)
+        if version == self.versions[table] + 1:
+            self.versions[table] = version
+
+    def refresh(self, reload):
+        """Call reload() if the index is stale, at most one caller at a time"""
+        if not self.is_stale():
+            return
+        if not self._reload_lock.acquire(blocking=not self.loaded_at):
+            return  # another caller is reloading; serve the current data
+        try:
+            if self.is_stale():
+                reload()
+        finally:
+            self._reload_lock.release()